@@ -0,0 +1,75 @@
+import sys
+import time
+import random
+import argparse
+from hammingIndex import HammingIndex, DEFAULT_CHUNKS
+from imageFingerprint import HASH_BITS, DEFAULT_THRESHOLD
+
+
+def make_fingerprints(count, near_duplicate_rate, max_flips, seed):
+    """Random fingerprints plus a share of near-duplicates with a few flipped bits."""
+    rng = random.Random(seed)
+    values = [rng.getrandbits(HASH_BITS) for _ in range(count)]
+    for i in range(int(count * near_duplicate_rate)):
+        value = values[rng.randrange(count)]
+        for _ in range(rng.randint(0, max_flips)):
+            value ^= 1 << rng.randrange(HASH_BITS)
+        values[i] = value
+    return values
+
+
+def benchmark(count, sample, threshold, chunks, seed):
+    values = make_fingerprints(count, 0.01, threshold, seed)
+
+    start = time.perf_counter()
+    index = HammingIndex(threshold, HASH_BITS, chunks)
+    for value in values:
+        index.add(value)
+    build = time.perf_counter() - start
+
+    rng = random.Random(seed + 1)
+    queries = [values[rng.randrange(count)] for _ in range(sample)]
+
+    start = time.perf_counter()
+    matches = 0
+    for value in queries:
+        matches += len(index.query(value))
+    indexed_per_query = (time.perf_counter() - start) / sample
+
+    # Brute force is timed on a slice so large sizes finish; its cost is linear in count
+    brute_slice = values[:min(count, 20000)]
+    start = time.perf_counter()
+    for value in queries[:max(1, sample // 10)]:
+        for other in brute_slice:
+            if (value ^ other).bit_count() <= threshold:
+                pass
+    brute_per_query = (time.perf_counter() - start) / max(1, sample // 10) * count / len(brute_slice)
+
+    return {
+        "count": count,
+        "build": build,
+        "indexed_us": indexed_per_query * 1e6,
+        "indexed_total": indexed_per_query * count,
+        "brute_total": brute_per_query * count,
+        "matches_per_query": matches / sample,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the multi-index Hamming table against all-pairs "
+                                                 "comparison on synthetic 64-bit fingerprints.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--sample", type=int, default=2000, help="Queries timed per size")
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--chunks", type=int, default=DEFAULT_CHUNKS)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"threshold={args.threshold} bits, chunks={args.chunks}, {args.sample} sampled queries per size")
+    print(f"{'images':>10} {'build s':>9} {'us/query':>9} {'index all s':>12} {'all-pairs s':>12} {'hits/query':>10}")
+    for size in args.sizes:
+        r = benchmark(size, min(args.sample, size), args.threshold, args.chunks, args.seed)
+        print(f"{r['count']:>10} {r['build']:>9.2f} {r['indexed_us']:>9.1f} {r['indexed_total']:>12.1f} "
+              f"{r['brute_total']:>12.1f} {r['matches_per_query']:>10.2f}")
+        sys.stdout.flush()
+    print("'index all' and 'all-pairs' are the estimated times to match every image against the whole set.")
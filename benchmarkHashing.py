@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import argparse
+from hashEngine import hash_files, format_bytes, IO_STRATEGIES, DEFAULT_WORKERS, DEFAULT_BLOCK_SIZE
+from fileIndex import scan
+
+
+def evict_from_page_cache(filepath):
+    """Ask the OS to drop cached pages of a file so every strategy starts cold (Linux only)."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    try:
+        fd = os.open(filepath, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+        return True
+    except OSError:
+        return False
+
+
+def collect_files(folder, min_size):
+    return [(record.path, record.size) for record in scan(folder) if record.size >= min_size]
+
+
+def benchmark(files, strategies, workers, block_size, repeats, cold):
+    total_bytes = sum(size for _, size in files)
+    results = {}
+    for strategy in strategies:
+        timings = []
+        for _ in range(repeats):
+            if cold:
+                for filepath, _ in files:
+                    evict_from_page_cache(filepath)
+            start = time.perf_counter()
+            for _ in hash_files((filepath for filepath, _ in files), workers=workers, block_size=block_size,
+                                io_strategy=strategy):
+                pass
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        results[strategy] = best
+        print(f"{strategy:>9}: best {best:.3f}s over {repeats} run(s), "
+              f"{format_bytes(total_bytes / best if best else 0)}/s")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare hashing I/O strategies on a directory of real files.")
+    parser.add_argument("directory", help="Directory on the mount to benchmark (walked recursively)")
+    parser.add_argument("--strategies", nargs="+", default=list(IO_STRATEGIES), choices=IO_STRATEGIES)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--min-size", type=int, default=0, help="Only hash files at least this many bytes")
+    parser.add_argument("--warm", action="store_true",
+                        help="Do not evict files from the page cache between runs")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        print(f"Error: '{args.directory}' is not a valid directory.")
+        sys.exit(1)
+
+    files = collect_files(args.directory, args.min_size)
+    if not files:
+        print("No files to hash.")
+        sys.exit(1)
+
+    print(f"Hashing {len(files)} file(s), {format_bytes(sum(size for _, size in files))} total, "
+          f"{args.workers} worker(s), {format_bytes(args.block_size)} blocks")
+    if not args.warm and not hasattr(os, "posix_fadvise"):
+        print("Note: page cache eviction is not available on this platform; later runs may be served from cache.")
+
+    results = benchmark(files, args.strategies, args.workers, args.block_size, args.repeats, not args.warm)
+    fastest = min(results, key=results.get)
+    print(f"Fastest on this mount: {fastest} (set FILETOOLS_IO_STRATEGY={fastest} to use it by default)")
@@ -1,19 +1,35 @@
 import os
-import subprocess
+import shutil
+import argparse
 import tkinter as tk
 from tkinter import filedialog
 import sys
+from exifToolProcess import ExifToolProcess, write_tags, default_executable, DEFAULT_PROCESSES
+from exifWriter import write_dates, DEFAULT_WORKERS
 
 # Path to local ExifTool executable and associated folder
 TOOLS_DIR = os.path.join(os.path.dirname(__file__), "tools")
 EXIFTOOL_PATH = os.path.join(TOOLS_DIR, "exiftool.exe")
 EXIFTOOL_FILES_DIR = os.path.join(TOOLS_DIR, "exiftool_files")
 
-def check_required_files():
+EXIFTOOL_PROCESSES = DEFAULT_PROCESSES  # ExifTool processes writing at once
+NATIVE_WORKERS = DEFAULT_WORKERS  # Files patched at once by the native writer
+
+# "native" patches JPEG/TIFF dates in place and hands other files to ExifTool; "exiftool" sends every file to ExifTool
+BACKENDS = ("native", "exiftool")
+
+def check_required_files(executable=EXIFTOOL_PATH):
     """
     Checks for the presence of exiftool.exe and exiftool_files directory.
     If missing, instructs the user and exits the program.
     """
+    if os.path.abspath(executable) != os.path.abspath(EXIFTOOL_PATH):
+        # A configured ExifTool (such as a Linux install) brings its own library files
+        if not (os.path.isfile(executable) or shutil.which(executable)):
+            print(f"\nExifTool not found at '{executable}'. Install it or point --exiftool at it.\n")
+            sys.exit(1)
+        return
+
     missing = []
     if not os.path.isfile(EXIFTOOL_PATH):
         missing.append("exiftool.exe")
@@ -32,41 +48,84 @@ def check_required_files():
         print("4. Restart this application\n")
         sys.exit(1)
 
-def add_date_taken_exiftool(file_path, date_taken):
+def normalize_date(date_taken):
+    """Return date_taken as 'YYYY:MM:DD HH:MM:SS', or None if it is in neither accepted format."""
+    # Allow date with or without time
+    if len(date_taken) == 10 and date_taken[4] == ':' and date_taken[7] == ':':
+        return date_taken + " 00:00:00"
+    if len(date_taken) != 19 or date_taken[4] != ':' or date_taken[7] != ':' or date_taken[10] != ' ':
+        return None
+    return date_taken
+
+def date_tags(date_taken):
+    return {"DateTimeOriginal": date_taken, "DateTimeDigitized": date_taken}
+
+def add_date_taken_exiftool(file_path, date_taken, exiftool=None, executable=None):
     """
     Uses a local ExifTool executable to set 'DateTimeOriginal' and 'DateTimeDigitized'.
+
+    exiftool may be a running ExifToolProcess to reuse; otherwise one is started with executable
+    (tools/exiftool.exe by default) for this file alone.
     """
     try:
         if not os.path.exists(file_path):
             print(f"Error: File '{file_path}' does not exist.")
             return False
 
-        # Allow date with or without time
-        if len(date_taken) == 10 and date_taken[4] == ':' and date_taken[7] == ':':
-            date_taken += " 00:00:00"
-        elif len(date_taken) != 19 or date_taken[4] != ':' or date_taken[7] != ':' or date_taken[10] != ' ':
+        normalized = normalize_date(date_taken)
+        if normalized is None:
             print("Error: Date must be in format 'YYYY:MM:DD' or 'YYYY:MM:DD HH:MM:SS'.")
             return False
 
-        cmd = [
-            EXIFTOOL_PATH,
-            f"-DateTimeOriginal={date_taken}",
-            f"-DateTimeDigitized={date_taken}",
-            "-overwrite_original",
-            file_path
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"ExifTool stderr:\n{result.stderr}")
+        if exiftool is not None:
+            result = exiftool.write_tags(file_path, date_tags(normalized))
+        else:
+            with ExifToolProcess(executable or EXIFTOOL_PATH) as exiftool:
+                result = exiftool.write_tags(file_path, date_tags(normalized))
+        if not result.ok:
+            print(f"ExifTool stderr:\n{result.message}")
             return False
 
         print(f"Success: Metadata updated via ExifTool on '{file_path}'.")
         return True
 
-    except subprocess.CalledProcessError as e:
+    except OSError as e:
         print(f"ExifTool error on '{file_path}': {e}")
         return False
 
+def add_date_taken_batch(file_paths, date_taken, executable=None, processes=EXIFTOOL_PROCESSES, backend="native"):
+    """
+    Sets the date taken on many files, natively where possible and through a few persistent
+    ExifTool processes otherwise.
+
+    Prints each file's result as it finishes and returns the number of files updated.
+    """
+    normalized = normalize_date(date_taken)
+    if normalized is None:
+        print("Error: Date must be in format 'YYYY:MM:DD' or 'YYYY:MM:DD HH:MM:SS'.")
+        return 0
+
+    existing = []
+    for file_path in file_paths:
+        if os.path.exists(file_path):
+            existing.append(file_path)
+        else:
+            print(f"Error: File '{file_path}' does not exist.")
+
+    executable = executable or EXIFTOOL_PATH
+    if backend == "native":
+        results = write_dates(existing, normalized, NATIVE_WORKERS, executable, processes)
+    else:
+        results = write_tags(existing, date_tags(normalized), executable, processes)
+    updated = 0
+    for result in results:
+        if result.ok:
+            updated += 1
+            print(f"Success: Metadata updated on '{result.path}' ({result.message}).")
+        else:
+            print(f"ExifTool error on '{result.path}':\n{result.message}")
+    return updated
+
 def select_photos():
     """
     Opens a file dialog for the user to select photos.
@@ -80,14 +139,31 @@ def select_photos():
     return list(file_paths)
 
 if __name__ == "__main__":
-    check_required_files()
+    parser = argparse.ArgumentParser(description="Set the date a photo was taken (DateTimeOriginal and "
+                                                 "DateTimeDigitized) with ExifTool.")
+    parser.add_argument("files", nargs="*", help="Photos to update (chosen in a dialog if omitted)")
+    parser.add_argument("--date", help="Date taken, YYYY:MM:DD or YYYY:MM:DD HH:MM:SS (asked for if omitted)")
+    parser.add_argument("--exiftool", help="ExifTool executable to run instead of tools/exiftool.exe, e.g. "
+                                           "'exiftool' on Linux (also set by FILETOOLS_EXIFTOOL)")
+    parser.add_argument("--processes", type=int, default=EXIFTOOL_PROCESSES,
+                        help="Persistent ExifTool processes writing at once")
+    parser.add_argument("--backend", default="native", choices=BACKENDS,
+                        help="native patches JPEG and TIFF dates in place and uses ExifTool for the rest")
+    args = parser.parse_args()
 
-    print("Please select the photos to update metadata.")
-    selected_files = select_photos()
+    executable = args.exiftool or default_executable()
+    # The native backend only needs ExifTool for files it cannot patch, and reports those if it is missing
+    if args.backend == "exiftool":
+        check_required_files(executable)
+
+    selected_files = args.files
+    if not selected_files:
+        print("Please select the photos to update metadata.")
+        selected_files = select_photos()
 
     if not selected_files:
         print("No photos were selected.")
     else:
-        date_taken = input("Enter the date taken (YYYY:MM:DD or YYYY:MM:DD HH:MM:SS): ").strip()
-        for file_path in selected_files:
-            add_date_taken_exiftool(file_path, date_taken)
+        date_taken = args.date or input("Enter the date taken (YYYY:MM:DD or YYYY:MM:DD HH:MM:SS): ").strip()
+        updated = add_date_taken_batch(selected_files, date_taken, executable, args.processes, args.backend)
+        print(f"{updated} of {len(selected_files)} photos updated.")
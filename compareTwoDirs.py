@@ -1,75 +1,228 @@
 import os
+import json
 import filecmp
+import argparse
 import tkinter as tk
 from tkinter import filedialog, messagebox
+from hashCache import HashCache
+from hashEngine import available_algorithms, DEFAULT_WORKERS
+from fileIndex import scan
+from merkleTree import DigestManifest, TreeDiff, build_tree, diff_trees, match_moves, relative_to_roots
+from treeManifest import write_manifest, diff_manifest
 
 
-def compare_directories(dir1, dir2):
-    print("\nStarting recursive comparison...\n")
+def _one_sided_files(root, items, on_error):
+    """Expand one-sided dircmp entries into (relative path, path, stat_result, None) file entries."""
+    entries, empty_dirs = [], []
+    for rel in items:
+        path = os.path.join(root, rel)
+        if os.path.isdir(path) and not os.path.islink(path):
+            records = list(scan(path, on_error=on_error))
+            entries.extend((os.path.relpath(record.path, root), record.path, record.stat, None) for record in records)
+            if not records:
+                empty_dirs.append(rel)
+            continue
+        try:
+            entries.append((rel, path, os.stat(path), None))
+        except OSError as e:
+            on_error(path, e)
+    return entries, empty_dirs
+
+
+def compare_directories(dir1, dir2, detect_moves=True, algorithm="sha256", cache=None, workers=DEFAULT_WORKERS):
+    """
+    Compare two trees by name, size and type with filecmp and return a TreeDiff.
+
+    With detect_moves, files found on one side only are matched across the whole tree by size
+    and then content hash, so a file moved to another folder is reported as moved rather than
+    as missing from one side and new on the other.
+    """
+    left_only, right_only, differing, errors = [], [], [], []
+    stack = [""]
+    while stack:
+        rel = stack.pop()
+        comparison = filecmp.dircmp(os.path.join(dir1, rel), os.path.join(dir2, rel))
+        left_only.extend(os.path.join(rel, item) for item in comparison.left_only)
+        right_only.extend(os.path.join(rel, item) for item in comparison.right_only)
+        differing.extend(os.path.join(rel, item) for item in comparison.diff_files)
+        errors.extend(os.path.join(rel, item) for item in comparison.funny_files)
+        # Recurse into common subdirectories
+        stack.extend(os.path.join(rel, common_dir) for common_dir in comparison.common_dirs)
+
+    moved = []
+    if detect_moves and left_only and right_only:
+        def report(path, e):
+            errors.append(relative_to_roots(path, (dir1, dir2)))
+            print(f"Error reading {path}: {e}")
+
+        left_files, left_empty = _one_sided_files(dir1, left_only, report)
+        right_files, right_empty = _one_sided_files(dir2, right_only, report)
+        moved, left_only, right_only = match_moves(left_files, right_files, algorithm, cache, workers, report)
+        left_only += left_empty
+        right_only += right_empty
+    return TreeDiff(sorted(left_only), sorted(right_only), sorted(differing), sorted(moved), sorted(errors), 0)
+
 
-    comparison = filecmp.dircmp(dir1, dir2)
+def compare_contents(dir1, dir2, algorithm="sha256", cache=None, manifest=None, workers=DEFAULT_WORKERS):
+    """
+    Compare two trees by file contents and return a TreeDiff.
 
+    Each tree gets per-directory Merkle digests (see merkleTree), so identical subtrees are
+    skipped as a whole and, with a manifest, are not even re-hashed on later runs.
+    """
+    def report(path, e):
+        print(f"Error reading {path}: {e}")
+
+    left = build_tree(dir1, algorithm, cache, manifest, workers, report)
+    right = build_tree(dir2, algorithm, cache, manifest, workers, report)
+    return diff_trees(left, right, algorithm, cache, workers, report)
+
+
+def print_report(diff, dir1, dir2):
     # Report files only in one of the directories
-    if comparison.left_only:
+    if diff.left_only:
         print(f"Only in {dir1}:")
-        for item in comparison.left_only:
+        for item in diff.left_only:
             print(f"  {item}")
 
-    if comparison.right_only:
+    if diff.right_only:
         print(f"Only in {dir2}:")
-        for item in comparison.right_only:
+        for item in diff.right_only:
             print(f"  {item}")
 
     # Report files that exist in both but differ
-    if comparison.diff_files:
-        print(f"Files that differ in both directories:")
-        for item in comparison.diff_files:
+    if diff.differing:
+        print("Files that differ in both directories:")
+        for item in diff.differing:
             print(f"  {item}")
 
+    if diff.moved:
+        print("Files moved or renamed:")
+        for src, dest in diff.moved:
+            print(f"  {src} -> {dest}")
+
     # Report funny files (errors)
-    if comparison.funny_files:
+    if diff.errors:
         print("Problematic files that couldn't be compared:")
-        for item in comparison.funny_files:
+        for item in diff.errors:
             print(f"  {item}")
 
-    # Recurse into common subdirectories
-    for common_dir in comparison.common_dirs:
-        compare_directories(
-            os.path.join(dir1, common_dir),
-            os.path.join(dir2, common_dir)
-        )
+    if diff.skipped_dirs:
+        print(f"{diff.skipped_dirs} identical subtrees skipped.")
+
+
+def write_json(diff, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(diff._asdict(), f, indent=2)
+
+
+def compare_with_manifest(args):
+    """Export a manifest of one directory, or compare one directory against a saved manifest."""
+    directory = args.dir1
+    if not directory:
+        root = tk.Tk()
+        root.withdraw()  # Hide the root window
+        directory = filedialog.askdirectory(title="Select Directory")
+        if not directory:
+            messagebox.showerror("Error", "Directory not selected. Exiting.")
+            return
+
+    cache = None if args.no_cache else HashCache()
+    try:
+        if args.export_manifest:
+            print(f"\nWriting manifest of {directory} to {args.export_manifest}...")
+            count = write_manifest(directory, args.export_manifest, args.algorithm, cache, args.workers,
+                                   lambda path, e: print(f"Error reading {path}: {e}"))
+            print(f"{count} files written.")
+            return
+        print(f"\nComparing {directory} against manifest {args.manifest}...\n")
+        diff, header = diff_manifest(args.manifest, directory, cache, args.workers,
+                                     lambda path, e: print(f"Error reading {path}: {e}"))
+    finally:
+        if cache is not None:
+            cache.close()
+    print_report(diff, f"{args.manifest} (saved from {header['root']})", directory)
+    if args.json:
+        write_json(diff, args.json)
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Recursively compare the contents of two directories.")
+    parser.add_argument("dir1", nargs="?", help="First directory (asked for in a dialog if omitted)")
+    parser.add_argument("dir2", nargs="?", help="Second directory (asked for in a dialog if omitted)")
+    parser.add_argument("--content", action="store_true",
+                        help="Compare file contents through per-directory Merkle digests instead of filecmp")
+    parser.add_argument("--algorithm", default="sha256", choices=available_algorithms(),
+                        help="Content hash used by --content and --export-manifest")
+    parser.add_argument("--no-moves", action="store_true",
+                        help="Do not hash one-sided files to find files that were moved or renamed")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Do not read or update the hash cache and directory digest manifest")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Files hashed concurrently")
+    parser.add_argument("--json", metavar="PATH", help="Also write the report as JSON")
+    parser.add_argument("--export-manifest", metavar="PATH",
+                        help="Hash the first directory into a compressed manifest at PATH and exit")
+    parser.add_argument("--manifest", metavar="PATH",
+                        help="Compare the first directory against a manifest saved with --export-manifest")
+    args = parser.parse_args()
+
     print("Directory Comparison Tool")
     print("--------------------------")
     print("This tool recursively compares the contents of two directories.")
     print("It lists files unique to each directory, files that differ, and problematic files.\n")
 
-    root = tk.Tk()
-    root.withdraw()  # Hide the root window
-
-    # Ask for first directory
-    dir1 = filedialog.askdirectory(title="Select First Directory")
-    if not dir1:
-        messagebox.showerror("Error", "First directory not selected. Exiting.")
+    if args.export_manifest or args.manifest:
+        compare_with_manifest(args)
         return
 
-    # Ask for second directory, opening one level up from dir1
-    parent_dir = os.path.dirname(dir1)
-    dir2 = filedialog.askdirectory(title="Select Second Directory", initialdir=parent_dir)
-    if not dir2:
-        messagebox.showerror("Error", "Second directory not selected. Exiting.")
-        return
+    dir1, dir2, content = args.dir1, args.dir2, args.content
+    if not (dir1 and dir2):
+        root = tk.Tk()
+        root.withdraw()  # Hide the root window
+
+        # Ask for first directory
+        dir1 = filedialog.askdirectory(title="Select First Directory")
+        if not dir1:
+            messagebox.showerror("Error", "First directory not selected. Exiting.")
+            return
+
+        # Ask for second directory, opening one level up from dir1
+        parent_dir = os.path.dirname(dir1)
+        dir2 = filedialog.askdirectory(title="Select Second Directory", initialdir=parent_dir)
+        if not dir2:
+            messagebox.showerror("Error", "Second directory not selected. Exiting.")
+            return
+
+        content = content or messagebox.askyesno(
+            "Comparison Mode", "Compare file contents?\n\nThis reads every file the first time; "
+                               "unchanged folders are skipped on later runs.")
 
     print(f"\nSelected Directories:\n  1: {dir1}\n  2: {dir2}")
-    compare_directories(dir1, dir2)
-
-    print("\nDisclaimer:")
-    print("This tool uses Python’s built-in filecmp module.")
-    print("- It compares files by name and shallow content (metadata and size), not deep content by default.")
-    print("- Symbolic links, permissions, timestamps, and file encoding differences are not checked.")
-    print("- Hidden/system files may be skipped depending on OS or permissions.\n")
-    print("For more robust comparison (e.g. hashing file contents), additional logic would be required.")
+    print("\nStarting recursive comparison...\n")
+    cache = None if args.no_cache else HashCache()
+    manifest = None if args.no_cache or not content else DigestManifest()
+    try:
+        if content:
+            diff = compare_contents(dir1, dir2, args.algorithm, cache, manifest, args.workers)
+        else:
+            diff = compare_directories(dir1, dir2, not args.no_moves, args.algorithm, cache, args.workers)
+    finally:
+        if cache is not None:
+            cache.close()
+        if manifest is not None:
+            manifest.close()
+    print_report(diff, dir1, dir2)
+
+    if args.json:
+        write_json(diff, args.json)
+
+    if not content:
+        print("\nDisclaimer:")
+        print("This tool uses Python’s built-in filecmp module.")
+        print("- It compares files by name and shallow content (metadata and size), not deep content by default.")
+        print("- Symbolic links, permissions, timestamps, and file encoding differences are not checked.")
+        print("- Hidden/system files may be skipped depending on OS or permissions.\n")
+        print("Run with --content to compare file contents by hash.")
 
 if __name__ == "__main__":
     main()
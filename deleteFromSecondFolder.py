@@ -1,56 +1,183 @@
 import os
-import hashlib
+import argparse
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from send2trash import send2trash
 from collections import defaultdict
+from hashCache import HashCache
+from treeManifest import write_manifest, read_manifest, read_manifest_header
+from hashEngine import (new_hasher, confirm_groups, needs_confirmation, available_algorithms,
+                        HASH_ALGORITHMS, IO_STRATEGIES, DEFAULT_WORKERS, DEFAULT_IO_STRATEGY)
 
+# Bytes hashed from each end of a file by the partial hash stage
+PARTIAL_HASH_SIZE = 65536
 
-def calculate_file_hash(filepath, block_size=65536):
-    """Calculate SHA-256 hash of a file."""
-    hasher = hashlib.sha256()
+
+def calculate_partial_hash(filepath, file_size, sample_size=PARTIAL_HASH_SIZE, algorithm="sha256"):
+    """Calculate the hash of the first and last sample_size bytes of a file."""
+    hasher = new_hasher(algorithm)
     with open(filepath, 'rb') as f:
-        buf = f.read(block_size)
-        while buf:
-            hasher.update(buf)
-            buf = f.read(block_size)
+        hasher.update(f.read(sample_size))
+        if file_size > sample_size:
+            f.seek(max(sample_size, file_size - sample_size))
+            hasher.update(f.read(sample_size))
     return hasher.hexdigest()
 
 
-def get_files_with_hashes(folder):
-    """Return a dictionary of {hash: [(filepath, size)]}"""
-    files_info = defaultdict(list)
-    for root, _, files in os.walk(folder):
-        for filename in files:
-            filepath = os.path.join(root, filename)
-            try:
-                file_hash = calculate_file_hash(filepath)
-                file_size = os.path.getsize(filepath)
-                files_info[file_hash].append((filepath, file_size))
-            except (IOError, OSError):
-                continue  # Skip unreadable files
-    return files_info
+def build_catalog(folders, algorithm="sha256", cache=None):
+    """
+    Return (catalog, bounds) listing every file under each folder without reading any contents.
+
+    bounds[i] is the (start, stop) row range of folders[i] in the catalog.
+    """
+    # NumPy and the catalog are loaded on first use, so --help and the folder dialogs open quickly
+    from fileCatalog import FileCatalog
+
+    catalog = FileCatalog.for_algorithm(algorithm)
+    bounds = []
+    for folder in folders:
+        start, stop = catalog.add_folder(folder)
+        bounds.append((start, stop))
+        if cache is not None:
+            cache.prune(folder, catalog.paths(start, stop))
+    return catalog, bounds
+
+
+def find_duplicates_staged(folder1, folder2, cache=None, workers=DEFAULT_WORKERS, io_strategy=DEFAULT_IO_STRATEGY,
+                           algorithm="sha256", confirm=True):
+    """
+    Return the files in folder2 that duplicate a file in folder1.
+
+    Candidates are narrowed by size, then by a hash of the first and last PARTIAL_HASH_SIZE bytes,
+    and only the survivors are fully hashed. When algorithm is a fast non-cryptographic hash and
+    confirm is True, matched groups are re-checked with SHA-256. Returns (duplicates, stats).
+
+    Both folders are held in one columnar FileCatalog (folder1 rows first) and every stage
+    intersects keys with NumPy, so memory stays at a few dozen bytes per file plus its path.
+    """
+    import numpy as np
+    from fileCatalog import hash_rows, rows_in_both, group_rows
+
+    def partial_hash(filepath, stat_result):
+        return calculate_partial_hash(filepath, stat_result.st_size, algorithm=algorithm)
+
+    print("Indexing folders...")
+    catalog, [(_, split), (_, total)] = build_catalog([folder1, folder2], algorithm, cache)
+
+    stats = defaultdict(int)
+    stats["files_folder1"] = split
+    stats["files_folder2"] = total - split
+
+    # Stage 1: only sizes present in both folders can hold duplicates
+    candidates = rows_in_both(catalog, np.arange(total), split, use_digest=False)
+    stats["size_candidates"] = len(candidates)
+    sizes = catalog.size_array()
+    # A partial hash of a small file reads the whole file, so go straight to the full hash
+    large = sizes[candidates] > 2 * PARTIAL_HASH_SIZE
+    partial_candidates = candidates[large]
+    full_candidates = candidates[~large]
+
+    # Stage 2: keep large files whose (size, head + tail hash) occurs in both folders
+    hashed = hash_rows(catalog, partial_candidates, workers=workers, hash_func=partial_hash)
+    stats["partial_hashed"] = len(partial_candidates)
+    stats["bytes_read"] = 2 * PARTIAL_HASH_SIZE * len(partial_candidates)
+    full_candidates = np.concatenate([full_candidates, rows_in_both(catalog, hashed, split)])
+
+    # Stage 3: full content hash of the survivors
+    hashed = hash_rows(catalog, full_candidates, workers=workers, algorithm=algorithm, io_strategy=io_strategy,
+                       cache=cache)
+    stats["full_hashed"] = len(full_candidates)
+    stats["bytes_read"] += int(sizes[hashed].sum())
+    matched = rows_in_both(catalog, hashed, split)
 
+    if confirm and needs_confirmation(algorithm):
+        # Stage 4: confirm fast-hash matches with SHA-256 before anything is sent to the recycle bin
+        matched_groups = [[catalog.path(row) for row in group] for group in group_rows(catalog, matched)]
+        stats["confirmed_hashed"] = len(matched)
+        folder2_paths = {catalog.path(row) for row in matched if row >= split}
+        duplicates = []
+        for group in confirm_groups(matched_groups, workers=workers, cache=cache, io_strategy=io_strategy):
+            right = [filepath for filepath in group if filepath in folder2_paths]
+            if len(right) < len(group):
+                duplicates.extend(right)
+    else:
+        duplicates = [catalog.path(row) for row in matched if row >= split]
+
+    stats["duplicates"] = len(duplicates)
+    return duplicates, stats
+
+
+def find_duplicates_in_manifest(manifest_path, folder2, cache=None, workers=DEFAULT_WORKERS,
+                                io_strategy=DEFAULT_IO_STRATEGY):
+    """
+    Return the files in folder2 that duplicate a file listed in a saved manifest of folder1.
+
+    The manifest (see treeManifest) stands in for folder1, so folder1 does not need to be
+    mounted. Its sizes and digests are read into the FileCatalog without their paths; only
+    folder2 files whose size occurs in the manifest are hashed, with the manifest's algorithm.
+    Returns (duplicates, stats) like find_duplicates_staged.
+    """
+    import numpy as np
+    from fileCatalog import FileCatalog, hash_rows, rows_in_both
+
+    header, entries = read_manifest(manifest_path)
+    algorithm = header["algorithm"]
+    catalog = FileCatalog.for_algorithm(algorithm)
+    for _, size, mtime_ns, digest in entries:
+        catalog.set_digest(catalog.add("", size, mtime_ns), digest)
+    split = len(catalog)
+    print("Indexing folder...")
+    _, total = catalog.add_folder(folder2)
+    if cache is not None:
+        cache.prune(folder2, catalog.paths(split, total))
+
+    stats = defaultdict(int)
+    stats["files_folder1"] = split
+    stats["files_folder2"] = total - split
 
-def compare_and_clean(folder1, folder2):
-    """Compare two folders and move matching duplicates from folder2 to Recycle Bin."""
-    print("Calculating hashes for folder 1...")
-    folder1_data = get_files_with_hashes(folder1)
+    # The manifest side already has digests, so only folder2's same-size files are read
+    candidates = rows_in_both(catalog, np.arange(total), split, use_digest=False)
+    stats["size_candidates"] = len(candidates)
+    hashed = hash_rows(catalog, candidates[candidates >= split], workers=workers, algorithm=algorithm,
+                       io_strategy=io_strategy, cache=cache)
+    stats["full_hashed"] = len(hashed)
+    stats["bytes_read"] = int(catalog.size_array()[hashed].sum())
+    matched = rows_in_both(catalog, np.concatenate([candidates[candidates < split], hashed]), split)
+    duplicates = [catalog.path(row) for row in matched if row >= split]
+    stats["duplicates"] = len(duplicates)
+    return duplicates, stats
 
-    print("Calculating hashes for folder 2...")
-    folder2_data = get_files_with_hashes(folder2)
 
-    folder1_hash_map = {hash_: {size for _, size in paths} for hash_, paths in folder1_data.items()}
+def print_stage_stats(stats):
+    """Print how many files survived each matching stage."""
+    print("Matching stages:")
+    print(f"  Files scanned:          {stats['files_folder1']} in folder 1, {stats['files_folder2']} in folder 2")
+    print(f"  Same-size candidates:   {stats['size_candidates']}")
+    print(f"  Partially hashed:       {stats['partial_hashed']}")
+    print(f"  Fully hashed:           {stats['full_hashed']}")
+    if stats["confirmed_hashed"]:
+        print(f"  SHA-256 confirmed:      {stats['confirmed_hashed']}")
+    print(f"  Duplicates in folder 2: {stats['duplicates']}")
+    print(f"  Bytes read (approx.):   {stats['bytes_read']}")
 
-    duplicates_to_remove = []
-    for hash_val, file_list in folder2_data.items():
-        if hash_val in folder1_hash_map:
-            folder1_sizes = folder1_hash_map[hash_val]
-            for filepath, size in file_list:
-                if size in folder1_sizes:
-                    duplicates_to_remove.append(filepath)
+
+def compare_and_clean(folder1, folder2, cache=None, workers=DEFAULT_WORKERS, io_strategy=DEFAULT_IO_STRATEGY,
+                      algorithm="sha256", confirm=True, manifest=None):
+    """
+    Compare two folders and move matching duplicates from folder2 to Recycle Bin.
+
+    When manifest is the path of a saved manifest of the reference folder, it is used in place
+    of folder1.
+    """
+    if manifest is not None:
+        duplicates_to_remove, stats = find_duplicates_in_manifest(manifest, folder2, cache, workers, io_strategy)
+    else:
+        duplicates_to_remove, stats = find_duplicates_staged(folder1, folder2, cache, workers, io_strategy,
+                                                             algorithm, confirm)
+    print_stage_stats(stats)
 
     if duplicates_to_remove:
+        from send2trash import send2trash
+
         print(f"Found {len(duplicates_to_remove)} duplicate file(s) in folder2.")
         for filepath in duplicates_to_remove:
             norm_path = os.path.normpath(filepath)
@@ -70,16 +197,52 @@ def select_folder(title):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move files in a second folder that duplicate files in a "
+                                                 "reference folder to the Recycle Bin.")
+    parser.add_argument("--algorithm", default="sha256", choices=list(HASH_ALGORITHMS),
+                        help="Hash used to group candidates; xxh3_128 and blake3 are faster than sha256")
+    parser.add_argument("--no-confirm", action="store_true",
+                        help="Skip the SHA-256 confirmation of matches found with a non-cryptographic hash")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of hashing threads")
+    parser.add_argument("--io-strategy", default=DEFAULT_IO_STRATEGY, choices=IO_STRATEGIES)
+    parser.add_argument("--export-manifest", metavar="PATH",
+                        help="Hash the reference folder into a compressed manifest at PATH and exit")
+    parser.add_argument("--manifest", metavar="PATH",
+                        help="Use a manifest saved with --export-manifest as the reference folder")
+    args = parser.parse_args()
+    if args.algorithm not in available_algorithms():
+        parser.error(f"Hash algorithm '{args.algorithm}' needs an optional package that is not installed.")
+    if args.export_manifest and needs_confirmation(args.algorithm):
+        parser.error("Manifests are matched without the reference files, so export them with a "
+                     "cryptographic hash such as sha256.")
+    algorithm = args.algorithm
+    if args.manifest:
+        algorithm = read_manifest_header(args.manifest)["algorithm"]
+        if needs_confirmation(algorithm) and not args.no_confirm:
+            parser.error(f"{args.manifest} was written with {algorithm}, whose matches cannot be "
+                         f"confirmed without the reference files; re-export it with sha256 or pass --no-confirm.")
+    confirmation = ", confirmed with SHA-256" if needs_confirmation(algorithm) and not args.no_confirm else ""
+
     print("This program compares two folders, identifies files in the second folder that are exact duplicates "
-          "(based on SHA-256 hash AND file size) of files in the first folder, and moves those duplicates to the Recycle Bin.\nWarning: May ignore some metadata, including \"Comments\" in Properties>Details diaglog on Windows.")
+          f"(based on {algorithm} hash AND file size{confirmation}) of files in the first folder, and moves those duplicates to the Recycle Bin.\nWarning: May ignore some metadata, including \"Comments\" in Properties>Details diaglog on Windows.")
 
     root = tk.Tk()
     root.withdraw()  # Hide the main tkinter window
 
-    # Select first folder
-    folder1 = select_folder("Select the first folder (reference folder)")
-    if not folder1:
-        messagebox.showerror("Error", "Reference folder selection was canceled.")
+    # Select first folder, unless a saved manifest of it is used instead
+    if args.manifest:
+        folder1 = os.path.dirname(os.path.abspath(args.manifest))
+    else:
+        folder1 = select_folder("Select the first folder (reference folder)")
+        if not folder1:
+            messagebox.showerror("Error", "Reference folder selection was canceled.")
+            exit()
+
+    if args.export_manifest:
+        with HashCache() as cache:
+            count = write_manifest(folder1, args.export_manifest, args.algorithm, cache, args.workers,
+                                   lambda path, e: print(f"Error reading {path}: {e}"))
+        messagebox.showinfo("Done", f"Manifest of {count} files written to {args.export_manifest}.")
         exit()
 
     # Suggest parent directory when picking second folder
@@ -94,6 +257,8 @@ if __name__ == "__main__":
     elif not os.path.isdir(folder1) or not os.path.isdir(folder2):
         messagebox.showerror("Error", "One or both folder paths are invalid.")
     else:
-        compare_and_clean(folder1, folder2)
+        with HashCache() as cache:
+            compare_and_clean(folder1, folder2, cache, args.workers, args.io_strategy, args.algorithm,
+                              not args.no_confirm, args.manifest)
         messagebox.showinfo("Done", "Duplicate cleanup completed. See console output for details.")
 
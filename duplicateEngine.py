@@ -0,0 +1,399 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import threading
+from collections import namedtuple
+from itertools import islice
+from hashEngine import hash_file, available_algorithms, needs_confirmation, CONFIRM_ALGORITHM
+from featureStore import FeatureStore
+from imageFingerprint import find_similar, DEFAULT_THRESHOLD, DEFAULT_PROCESSES, DEFAULT_CHUNK_SIZE
+from videoFingerprint import video_fingerprints, find_similar_videos, fingerprint_kind
+from exifReader import date_taken, dates_taken
+from fileIndex import (FileIndex, scan, same_file, IMAGE_EXTS, VIDEO_EXTS,
+                       DEFAULT_WORKERS as DEFAULT_SCAN_WORKERS)
+
+USE_DATE_TAKEN = True
+USE_FILE_SIZE = True
+USE_VIDEO_HASH = False  # Confirm same-size videos by content hash before pairing them
+VIDEO_HASH_ALGORITHM = "sha256"  # Fast choices such as xxh3_128 are re-checked with SHA-256
+VIDEO_IO_STRATEGY = "mmap"  # "buffered", "mmap" or "direct"; see benchmarkHashing.py
+VIDEO_HASH_BLOCK_SIZE = 1024 * 1024
+
+# "size" pairs videos of identical size; "keyframes" compares hashes of frames sampled across each video
+VIDEO_ENGINES = ("keyframes", "size")
+VIDEO_KEYFRAMES = 8  # Frames sampled per video by the keyframes engine
+VIDEO_KEYFRAME_THRESHOLD = 8  # Max mean differing bits per sampled frame
+VIDEO_FINGERPRINT_WORKERS = 4  # Videos decoded concurrently
+
+# "difPy" decodes every image on each scan; the fingerprint engines reuse cached fingerprints
+IMAGE_ENGINES = ("difPy", "dhash", "phash")
+FINGERPRINT_THRESHOLD = DEFAULT_THRESHOLD  # Max differing bits for fingerprint engines
+MATCH_QUERY_BLOCK = 256  # Folder2 fingerprints per vectorized block in two-folder mode
+MATCH_REFERENCE_BLOCK = 16384  # Folder1 fingerprints per vectorized block
+FINGERPRINT_PROCESSES = DEFAULT_PROCESSES  # Worker processes decoding images for fingerprints
+FINGERPRINT_CHUNK_SIZE = DEFAULT_CHUNK_SIZE  # Images sent to a worker process per task
+
+SCAN_WORKERS = DEFAULT_SCAN_WORKERS  # Directories listed concurrently while indexing the folders
+DATE_BATCH_SIZE = 256  # Image pairs whose capture dates are read together before their rows are emitted
+
+# One duplicate pair, in the column order of the GUI's result table
+ScanResult = namedtuple("ScanResult", ["file1", "file2", "date", "size", "size_bytes"])
+OUTPUT_FORMATS = ("jsonl", "csv")
+
+
+def get_date_taken(path):
+    try:
+        ext = os.path.splitext(path)[1].lower()
+        if ext in {".jpg", ".jpeg", ".png", ".tiff"}:
+            # Reads only the EXIF headers and is memoized per (path, mtime)
+            return date_taken(path)
+        else:
+            # Use last modified time as fallback
+            return str(os.path.getmtime(path))
+    except Exception:
+        return None
+
+
+def get_media_files(folder, index=None):
+    """Return the image and video paths under folder, from index when one is given."""
+    media_exts = IMAGE_EXTS | VIDEO_EXTS
+    if index is not None:
+        return index.paths(folder, media_exts)
+    return [record.path for record in scan(folder, media_exts)]
+
+
+def get_file_info(path, index=None):
+    size = index.get(path).size if index is not None else os.path.getsize(path)
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext in VIDEO_EXTS:
+        return (size,)  # Only use file size for video
+    elif ext in IMAGE_EXTS:
+        date_taken = get_date_taken(path) if USE_DATE_TAKEN else None
+        return (size, date_taken)
+    else:
+        return (size,)  # Fallback for unknown types
+
+
+def _video_digests_match(f1, f2, hash_memo, algorithm):
+    for path in (f1, f2):
+        if (path, algorithm) not in hash_memo:
+            try:
+                hash_memo[(path, algorithm)] = hash_file(path, algorithm, VIDEO_HASH_BLOCK_SIZE, VIDEO_IO_STRATEGY)
+            except OSError as e:
+                print(f"Video hash error: {e}", file=sys.stderr)
+                hash_memo[(path, algorithm)] = None
+    digest = hash_memo[(f1, algorithm)]
+    return digest is not None and digest == hash_memo[(f2, algorithm)]
+
+
+def videos_match(f1, f2, hash_memo, algorithm=VIDEO_HASH_ALGORITHM):
+    """Return True if two videos have identical content, hashing each file at most once per scan."""
+    if not _video_digests_match(f1, f2, hash_memo, algorithm):
+        return False
+    # Fast-hash matches are confirmed with SHA-256 so they can safely be offered for deletion
+    if needs_confirmation(algorithm):
+        return _video_digests_match(f1, f2, hash_memo, CONFIRM_ALGORITHM)
+    return True
+
+
+def _log_stderr(message):
+    print(message, file=sys.stderr)
+
+
+class DuplicateScanner:
+    """
+    Duplicate detection behind visualDuplicatesFinder, with no Tk or display imports.
+
+    Each pair is passed to on_result(ScanResult) as soon as it is found. on_progress(stage, info)
+    receives the running pair count and elapsed seconds, and setting cancel_event stops the
+    scan at the next stage boundary.
+    """
+
+    def __init__(self, on_result, on_progress=None, cancel_event=None, log=_log_stderr):
+        self.on_result = on_result
+        self.on_progress = on_progress
+        self.cancel_event = cancel_event if cancel_event is not None else threading.Event()
+        self.log = log
+        self.stats = {}
+        self._start = self._last_mark = time.perf_counter()
+
+    def scan(self, search_mode, folder1, folder2=None, video_algorithm="off", image_engine="dhash",
+             video_engine="keyframes"):
+        """Run a scan and return its stats: pairs found and seconds spent per stage."""
+        self.stats = {"pairs": 0, "image_pairs": 0, "video_pairs": 0, "timings": {}}
+        self._start = self._last_mark = time.perf_counter()
+        self.scan_for_duplicates(search_mode, folder1, folder2, video_algorithm, image_engine, video_engine)
+        self.mark("videos")
+        self.stats["video_pairs"] = self.stats["pairs"] - self.stats["image_pairs"]
+        self.stats["timings"]["total"] = round(time.perf_counter() - self._start, 3)
+        self.stats["cancelled"] = self.cancel_event.is_set()
+        self.progress("done")
+        return self.stats
+
+    def emit(self, f1, f2, date, size, size_bytes):
+        self.stats["pairs"] += 1
+        self.on_result(ScanResult(f1, f2, date, size, size_bytes))
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        if stage not in self.stats["timings"]:
+            self.stats["timings"][stage] = round(now - self._last_mark, 3)
+            if stage == "images":
+                self.stats["image_pairs"] = self.stats["pairs"]
+        self._last_mark = now
+
+    def progress(self, stage):
+        if self.on_progress is not None:
+            self.on_progress(stage, {"pairs": self.stats["pairs"],
+                                     "elapsed": round(time.perf_counter() - self._start, 3)})
+
+    def emit_image_pair(self, img1, img2, seen_pairs, index):
+        # Skip if the files are actually the same file
+        try:
+            record1, record2 = index.get(img1), index.get(img2)
+            if same_file(record1, record2):
+                return
+        except OSError:
+            return
+
+        pair_key = tuple(sorted((os.path.abspath(img1), os.path.abspath(img2))))
+        if pair_key not in seen_pairs:
+            seen_pairs.add(pair_key)
+
+            # Get file info for both files
+            size1 = record1.size
+            size2 = record2.size
+            date1 = get_date_taken(img1)
+            date2 = get_date_taken(img2)
+
+            # Format size and date for display
+            size_str = f"{size1} bytes"
+            if size1 != size2:
+                size_str = f"{size1} vs {size2} bytes (DIFFERENT)"
+
+            date_str = str(date1) if date1 else "N/A"
+            if date1 != date2:
+                date_str = f"{date1} vs {date2} (DIFFERENT)"
+
+            self.emit(img1, img2, date_str, size_str, size1)
+
+    def find_image_pairs_difpy(self, search_mode, folder1, folder2):
+        import difPy
+        if search_mode == "single_folder":
+            # Single folder mode - find duplicates within one folder
+            dif = difPy.build(folder1)
+        else:
+            # Two folder mode - compare between folders
+            dif = difPy.build([folder1, folder2])
+
+        search = difPy.search(dif)
+        for img1, matches in search.result.items():
+            for match in matches:
+                yield img1, match[0]
+
+    def find_image_pairs_fingerprint(self, search_mode, folder1, folder2, kind, index):
+        """Match images by perceptual fingerprints, decoding only files not already in the feature store."""
+        folders = [folder1] if search_mode == "single_folder" else [folder1, folder2]
+        fingerprints = []
+        with FeatureStore() as store:
+            for folder in folders:
+                images = [(record.path, record.stat) for record in index.records(folder, IMAGE_EXTS)]
+                found, stats = store.fingerprints(images, kind,
+                                                  on_error=lambda path, e: self.log(f"Fingerprint error on {path}: {e}"),
+                                                  processes=FINGERPRINT_PROCESSES,
+                                                  chunk_size=FINGERPRINT_CHUNK_SIZE,
+                                                  cancel_event=self.cancel_event)
+                if self.cancel_event.is_set():
+                    return
+                store.prune(folder, [path for path, _ in images], kind)
+                self.log(f"{folder}: {stats['cached']} cached, {stats['computed']} new or changed, "
+                      f"{stats['failed']} failed")
+                fingerprints.append(found)
+
+        if len(fingerprints) == 1:
+            matches = find_similar(fingerprints[0], threshold=FINGERPRINT_THRESHOLD)
+        else:
+            # Folder2 is matched against folder1 in blocked NumPy passes; NumPy is only loaded here
+            from hammingMatcher import find_similar_between
+
+            matches = find_similar_between(fingerprints[0], fingerprints[1], FINGERPRINT_THRESHOLD,
+                                           MATCH_QUERY_BLOCK, MATCH_REFERENCE_BLOCK)
+        for img1, img2, _ in matches:
+            yield img1, img2
+
+    def emit_video_pairs_keyframes(self, search_mode, folder1, folder2, seen_pairs, index):
+        """Match videos by hashes of sampled frames, so re-encoded copies pair and same-size strangers do not."""
+        folders = [folder1] if search_mode == "single_folder" else [folder1, folder2]
+        fingerprints = []
+        with FeatureStore() as store:
+            for folder in folders:
+                videos = [(record.path, record.stat) for record in index.records(folder, VIDEO_EXTS)]
+                found, stats = video_fingerprints(store, videos, VIDEO_KEYFRAMES, VIDEO_FINGERPRINT_WORKERS,
+                                                  on_error=lambda path, e: self.log(f"Video fingerprint error on {path}: {e}"),
+                                                  cancel_event=self.cancel_event)
+                if self.cancel_event.is_set():
+                    return
+                store.prune(folder, [path for path, _ in videos], fingerprint_kind(VIDEO_KEYFRAMES))
+                self.log(f"{folder}: {stats['cached']} cached, {stats['computed']} new or changed videos, "
+                      f"{stats['failed']} failed")
+                fingerprints.append(found)
+
+        second = fingerprints[1] if len(fingerprints) > 1 else None
+        for f1, f2, _ in find_similar_videos(fingerprints[0], second, VIDEO_KEYFRAME_THRESHOLD):
+            pair_key = tuple(sorted((os.path.abspath(f1), os.path.abspath(f2))))
+            if pair_key in seen_pairs:
+                continue
+            seen_pairs.add(pair_key)
+            size1, size2 = index.get(f1).size, index.get(f2).size
+            size_str = f"{size1} bytes" if size1 == size2 else f"{size1} vs {size2} bytes (DIFFERENT)"
+            self.emit(f1, f2, "", size_str, size1)
+
+    def scan_for_duplicates(self, search_mode, folder1, folder2, video_algorithm, image_engine, video_engine):
+        # Each folder is walked and stat'ed once; every stage below reads from this index
+        index = FileIndex(SCAN_WORKERS, on_error=lambda path, e: self.log(f"Scan error on {path}: {e}"))
+        if image_engine == "difPy":
+            image_pairs = self.find_image_pairs_difpy(search_mode, folder1, folder2)
+        else:
+            image_pairs = self.find_image_pairs_fingerprint(search_mode, folder1, folder2, image_engine, index)
+
+        seen_pairs = set()
+        while True:
+            batch = list(islice(image_pairs, DATE_BATCH_SIZE))
+            if not batch:
+                break
+            # Warms the date memo in parallel so emit_image_pair's lookups are cache hits
+            dates_taken({path for pair in batch for path in pair})
+            for img1, img2 in batch:
+                self.emit_image_pair(img1, img2, seen_pairs, index)
+            self.progress("images")
+        self.mark("images")
+        if self.cancel_event.is_set():
+            return
+
+        if video_engine == "keyframes":
+            self.emit_video_pairs_keyframes(search_mode, folder1, folder2, seen_pairs, index)
+            return
+
+        # Video duplicate detection remains the same but needs to handle single folder mode
+        video_hashes = {}
+        if search_mode == "single_folder":
+            info_map = {}
+            for path in index.paths(folder1, VIDEO_EXTS):
+                info = get_file_info(path, index)
+                info_map.setdefault(info, []).append(path)
+
+            for info, paths in info_map.items():
+                if len(paths) > 1:  # Only show groups with duplicates
+                    for i in range(len(paths)):
+                        for j in range(i + 1, len(paths)):
+                            f1 = paths[i]
+                            f2 = paths[j]
+                            if video_algorithm != "off" and not videos_match(f1, f2, video_hashes, video_algorithm):
+                                continue
+                            pair_key = tuple(sorted((os.path.abspath(f1), os.path.abspath(f2))))
+                            if pair_key not in seen_pairs:
+                                seen_pairs.add(pair_key)
+                                date = info[1] if len(info) > 1 else ""
+                                size = info[0]
+                                self.emit(f1, f2, date, f"{size} bytes", size)
+        else:
+            # Original two-folder video comparison logic
+            info_map2 = {}
+            for path in index.paths(folder2, VIDEO_EXTS):
+                info = get_file_info(path, index)
+                info_map2.setdefault(info, []).append(path)
+
+            for f1 in index.paths(folder1, VIDEO_EXTS):
+                info = get_file_info(f1, index)
+                if info in info_map2:
+                    for f2 in info_map2[info]:
+                        try:
+                            if same_file(index.get(f1), index.get(f2)):
+                                continue
+                        except OSError:
+                            pass
+                        if video_algorithm != "off" and not videos_match(f1, f2, video_hashes, video_algorithm):
+                            continue
+
+                        pair_key = tuple(sorted((os.path.abspath(f1), os.path.abspath(f2))))
+                        if pair_key not in seen_pairs:
+                            seen_pairs.add(pair_key)
+                            date = info[1] if len(info) > 1 else ""
+                            size = info[0]
+                            self.emit(f1, f2, date, f"{size} bytes", size)
+
+
+class ResultWriter:
+    """Streams ScanResults to a file as JSON lines or CSV, flushing each row so partial runs are usable."""
+
+    def __init__(self, stream, output_format="jsonl"):
+        self.stream = stream
+        self.output_format = output_format
+        if output_format == "csv":
+            self._csv = csv.writer(stream)
+            self._csv.writerow(ScanResult._fields)
+
+    def write(self, result):
+        if self.output_format == "csv":
+            self._csv.writerow(result)
+        else:
+            self.stream.write(json.dumps(result._asdict()) + "\n")
+        self.stream.flush()
+
+
+def read_results(path):
+    """Read results written by ResultWriter (format chosen by extension) back as ScanResults."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            rows = csv.reader(f)
+            next(rows, None)
+            return [ScanResult(f1, f2, date, size, int(size_bytes)) for f1, f2, date, size, size_bytes in rows]
+        return [ScanResult(**json.loads(line)) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find duplicate images and videos without a GUI, streaming each "
+                                                 "pair as it is found. Results can be opened in "
+                                                 "visualDuplicatesFinder with Load Results.")
+    parser.add_argument("folder1")
+    parser.add_argument("folder2", nargs="?", help="Omit to find duplicates within folder1")
+    parser.add_argument("--image-engine", default="dhash", choices=IMAGE_ENGINES)
+    parser.add_argument("--video-engine", default=VIDEO_ENGINES[0], choices=VIDEO_ENGINES)
+    parser.add_argument("--video-hash", default="off", choices=["off"] + available_algorithms(),
+                        help="Content hash confirming same-size videos (size engine only)")
+    parser.add_argument("--format", default=None, choices=OUTPUT_FORMATS,
+                        help="Output format; defaults to the output file's extension, else jsonl")
+    parser.add_argument("--output", "-o", help="Write results here instead of stdout")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Do not print progress to stderr")
+    args = parser.parse_args()
+
+    output_format = args.format
+    if output_format is None:
+        output_format = "csv" if args.output and args.output.lower().endswith(".csv") else "jsonl"
+    search_mode = "two_folders" if args.folder2 else "single_folder"
+
+    def on_progress(stage, info):
+        if not args.quiet:
+            print(f"[{info['elapsed']:8.1f} s] {stage}: {info['pairs']} pairs", file=sys.stderr)
+
+    stream = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        writer = ResultWriter(stream, output_format)
+        scanner = DuplicateScanner(writer.write, on_progress, log=(lambda message: None) if args.quiet else _log_stderr)
+        stats = scanner.scan(search_mode, args.folder1, args.folder2, args.video_hash, args.image_engine,
+                             args.video_engine)
+    except KeyboardInterrupt:
+        print("Interrupted; results written so far are complete rows.", file=sys.stderr)
+        sys.exit(130)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    print(json.dumps({"stats": stats}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,57 @@
 import os
-import hashlib
-import networkx as nx
-import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
-
-
-def get_file_hash(filepath, hash_algorithm='sha256', chunk_size=4096):
-    print("Called")
-    hasher = hashlib.new(hash_algorithm)
-    with open(filepath, 'rb') as f:
-        while chunk := f.read(chunk_size):
-            hasher.update(chunk)
-    return hasher.hexdigest()
-
-
-def find_duplicates(parent_folder, child_folder, use_hash=False):
-    file_map = {}  # Map of file sizes (and hashes if needed) to file paths
-    duplicates = []  # List of duplicate file pairs
-
-    # Function to traverse directories and store file sizes/hashes
-    def index_files(folder, is_child=False):
-        for root, _, files in os.walk(folder):
-            for file in files:
-                filepath = os.path.join(root, file)
-                try:
-                    file_size = os.path.getsize(filepath)
-                    file_key = file_size
-                    if use_hash:
-                        file_key = (file_size, get_file_hash(filepath))
-
-                    rel_path = os.path.relpath(filepath, parent_folder)
-
-                    if file_key in file_map:
-                        if is_child:
-                            # Check if it's a duplicate of itself
-                            if rel_path != file_map[file_key]:
-                                duplicates.append((rel_path, file_map[file_key]))
-                    else:
-                        file_map[file_key] = rel_path
-                except Exception as e:
-                    print(f"Error processing {filepath}: {e}")
-
-    # Index parent files first
-    index_files(parent_folder)
-    # Then check child files for duplicates
-    index_files(child_folder, is_child=True)
-
-    return duplicates
+from hashCache import HashCache
+from hashEngine import hash_files, available_algorithms, CONFIRM_ALGORITHM, DEFAULT_WORKERS
+
+
+def find_duplicates(parent_folder, child_folder, use_hash=False, cache=None, workers=DEFAULT_WORKERS,
+                    hash_algorithm='sha256'):
+    """
+    Return (child_rel_path, parent_rel_path) pairs for child files that match an earlier file.
+
+    Files are keyed by size, or by (size, hash) when use_hash is set. Parent files are listed
+    first, so a child file pairs with the first file seen with its key. Both folders share one
+    columnar FileCatalog and are grouped by sorting the keys, rather than by a dict per file.
+    """
+    # NumPy and the catalog are loaded here rather than at start-up
+    import numpy as np
+    from fileCatalog import FileCatalog, hash_rows, group_rows
+
+    catalog = FileCatalog.for_algorithm(hash_algorithm)
+    report = lambda path, e: print(f"Error processing {path}: {e}")
+    _, split = catalog.add_folder(parent_folder, on_error=report)
+    _, total = catalog.add_folder(child_folder, on_error=report)
+
+    rows = np.arange(total)
+    if use_hash:
+        # Hash on the shared thread pool; rows that fail to hash drop out of the comparison
+        rows = hash_rows(catalog, rows, workers=workers, algorithm=hash_algorithm, cache=cache, on_error=report)
+        if cache is not None:
+            cache.prune(parent_folder, catalog.paths(0, split))
+            cache.prune(child_folder, catalog.paths(split, total))
+
+    found = []
+    for group in group_rows(catalog, rows, use_digest=use_hash):
+        if len(group) < 2 or group[-1] < split:
+            continue
+        first = os.path.relpath(catalog.path(group[0]), parent_folder)
+        for row in group[1:]:
+            if row < split:
+                continue
+            rel_path = os.path.relpath(catalog.path(row), parent_folder)
+            # Check if it's a duplicate of itself
+            if rel_path != first:
+                found.append((row, rel_path, first))
+
+    # Report in the order the child folder was walked
+    found.sort()
+    return [(rel_path, first) for _, rel_path, first in found]
 
 
 def visualize_duplicates(duplicates):
+    # The plotting stack takes longer to import than the scan itself takes on small folders
+    import networkx as nx
+    import matplotlib.pyplot as plt
+
     G = nx.Graph()
 
     for child, parent in duplicates:
@@ -78,8 +80,16 @@ if __name__ == "__main__":
     parent_folder = input("Enter the parent folder path: ")
     child_folder = input("Enter the child folder path: ")
     use_hash = input("Use hash comparison? (y/n): ").strip().lower() == 'y'
+    hash_algorithm = 'sha256'
+    if use_hash:
+        algorithms = available_algorithms()
+        hash_algorithm = input(f"Hash algorithm ({', '.join(algorithms)}) [sha256]: ").strip().lower() or 'sha256'
+        if hash_algorithm not in algorithms:
+            print(f"Unknown or unavailable hash algorithm '{hash_algorithm}', using sha256.")
+            hash_algorithm = 'sha256'
 
-    duplicates = find_duplicates(parent_folder, child_folder, use_hash)
+    cache = HashCache()
+    duplicates = find_duplicates(parent_folder, child_folder, use_hash, cache, hash_algorithm=hash_algorithm)
 
     if duplicates:
         print("Found duplicate files:")
@@ -89,14 +99,25 @@ if __name__ == "__main__":
         perform_hash_check = input("Do you want to perform a hash check on the duplicates? (y/n): ").strip().lower()
         if perform_hash_check == 'y':
             new_duplicates = []
+            file_hashes = {}
+            if use_hash:
+                # Confirm candidates with SHA-256, hashing every file involved in a pair up front
+                pair_paths = set()
+                for child, parent in duplicates:
+                    pair_paths.add(os.path.join(child_folder, child))
+                    pair_paths.add(os.path.join(parent_folder, parent))
+                existing = [path for path in pair_paths if os.path.exists(path)]
+                file_hashes = {path: digest for path, _, digest in hash_files(existing, algorithm=CONFIRM_ALGORITHM,
+                                                                              cache=cache)}
+
             for child, parent in duplicates:
                 child_file_path = os.path.join(child_folder, child)
                 parent_file_path = os.path.join(parent_folder, parent)
 
                 # Ensure the file paths are correct for both child and parent directories
                 if os.path.exists(child_file_path) and os.path.exists(parent_file_path):
-                    child_hash = get_file_hash(child_file_path) if use_hash else None
-                    parent_hash = get_file_hash(parent_file_path) if use_hash else None
+                    child_hash = file_hashes.get(child_file_path)
+                    parent_hash = file_hashes.get(parent_file_path)
 
                     if child_hash and parent_hash and child_hash == parent_hash:
                         print(f"Hash match found: {child} <--> {parent}")
@@ -110,3 +131,5 @@ if __name__ == "__main__":
                 print("No new hash matches.")
     else:
         print("No duplicates found.")
+
+    cache.close()
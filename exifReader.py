@@ -0,0 +1,236 @@
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+# TIFF tags on the path from IFD0 to the capture date
+EXIF_IFD_POINTER = 0x8769
+DATE_TIME_ORIGINAL = 0x9003
+DATE_TIME_DIGITIZED = 0x9004
+ASCII = 2
+DATE_VALUE_LENGTH = 20  # "YYYY:MM:DD HH:MM:SS" and its NUL terminator
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Dates kept in memory, keyed by (path, mtime_ns) so edited files are re-read
+MEMO_SIZE = 1 << 16
+
+DEFAULT_WORKERS = 8
+
+
+def _tiff_date_original(read, base=0):
+    """Return DateTimeOriginal from a TIFF structure whose header starts at base, or None."""
+    header = read(base, 8)
+    if header[:2] == b"II":
+        endian = "<"
+    elif header[:2] == b"MM":
+        endian = ">"
+    else:
+        return None
+    magic, ifd0 = struct.unpack(endian + "HI", header[2:8])
+    if magic != 42:
+        return None
+    entry = _find_entry(read, base, endian, ifd0, EXIF_IFD_POINTER)
+    if entry is None:
+        return None
+    exif_ifd = struct.unpack(endian + "I", entry[2])[0]
+    entry = _find_entry(read, base, endian, exif_ifd, DATE_TIME_ORIGINAL)
+    if entry is None or entry[0] != ASCII:
+        return None
+    _, count, raw = entry
+    data = raw[:count] if count <= 4 else read(base + struct.unpack(endian + "I", raw)[0], count)
+    value = data.split(b"\x00", 1)[0].decode("ascii", "replace").strip()
+    return value or None
+
+
+def _find_entry(read, base, endian, ifd_offset, wanted):
+    """Return (type, count, raw 4-byte value) for a tag in the IFD at ifd_offset, or None."""
+    (count,) = struct.unpack(endian + "H", read(base + ifd_offset, 2))
+    entries = read(base + ifd_offset + 2, 12 * count)
+    for i in range(count):
+        tag, tag_type, value_count = struct.unpack(endian + "HHI", entries[i * 12:i * 12 + 8])
+        if tag == wanted:
+            return tag_type, value_count, entries[i * 12 + 8:i * 12 + 12]
+    return None
+
+
+def _tiff_value_offsets(read, base, tags):
+    """Return {tag: (offset, type, count)} locating the values of Exif IFD tags in a TIFF structure at base."""
+    header = read(base, 8)
+    if header[:2] == b"II":
+        endian = "<"
+    elif header[:2] == b"MM":
+        endian = ">"
+    else:
+        return {}
+    magic, ifd0 = struct.unpack(endian + "HI", header[2:8])
+    if magic != 42:
+        return {}
+    entry = _find_entry(read, base, endian, ifd0, EXIF_IFD_POINTER)
+    if entry is None:
+        return {}
+    exif_ifd = struct.unpack(endian + "I", entry[2])[0]
+    (count,) = struct.unpack(endian + "H", read(base + exif_ifd, 2))
+    entries = read(base + exif_ifd + 2, 12 * count)
+    found = {}
+    for i in range(count):
+        tag, tag_type, value_count = struct.unpack(endian + "HHI", entries[i * 12:i * 12 + 8])
+        if tag in tags:
+            # Values of up to 4 bytes sit in the entry itself, longer ones at the offset it holds
+            if value_count <= 4:
+                offset = base + exif_ifd + 2 + i * 12 + 8
+            else:
+                offset = base + struct.unpack(endian + "I", entries[i * 12 + 8:i * 12 + 12])[0]
+            found[tag] = (offset, tag_type, value_count)
+    return found
+
+
+def _exif_block(f):
+    """Return (start, end) of the TIFF structure holding the Exif data of a JPEG, TIFF or PNG, or None."""
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(0)
+    magic = f.read(8)
+    if magic[:4] in (b"II*\x00", b"MM\x00*"):
+        return 0, size
+    if magic == PNG_SIGNATURE:
+        chunk = png_exif_chunk(f)
+        return None if chunk is None else (chunk[0], min(chunk[0] + chunk[1], size))
+    if magic[:2] != b"\xff\xd8":
+        return None
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) != 2 or marker[0] != 0xFF or marker[1] in (0xDA, 0xD9):
+            return None
+        (length,) = struct.unpack(">H", f.read(2))
+        start = f.tell()
+        if marker[1] == 0xE1 and f.read(6) == b"Exif\x00\x00":
+            return start + 6, min(start + length - 2, size)
+        f.seek(start + length - 2)
+
+
+def date_value_offsets(f, tags=(DATE_TIME_ORIGINAL, DATE_TIME_DIGITIZED)):
+    """
+    Return {tag: (file offset, type, count)} for the date tags found in an open JPEG, TIFF or PNG.
+
+    Lets a writer overwrite a value where it already sits. Tags that are missing, that do not
+    hold a full DATE_VALUE_LENGTH value or whose value does not lie wholly inside the Exif data
+    (the APP1 segment, the eXIf chunk or the TIFF file) are left out. An empty dict means the
+    file has no readable Exif IFD or is not a JPEG, TIFF or PNG.
+    """
+    try:
+        block = _exif_block(f)
+        if block is None:
+            return {}
+        start, end = block
+        found = _tiff_value_offsets(_file_reader(f), start, tags)
+    except (ValueError, struct.error):
+        return {}  # Truncated or corrupt IFDs
+    return {tag: value for tag, value in found.items()
+            if value[2] == DATE_VALUE_LENGTH and start <= value[0] and value[0] + value[2] <= end}
+
+
+def png_exif_chunk(f):
+    """Return (data offset, length) of the eXIf chunk of an open PNG, or None."""
+    f.seek(0)
+    if f.read(8) != PNG_SIGNATURE:
+        return None
+    while True:
+        header = f.read(8)
+        if len(header) != 8:
+            return None
+        length, chunk_type = struct.unpack(">I4s", header)
+        if chunk_type == b"eXIf":
+            return f.tell(), length
+        if chunk_type in (b"IDAT", b"IEND"):
+            return None
+        f.seek(length + 4, os.SEEK_CUR)
+
+
+def _buffer_reader(data):
+    def read(offset, size):
+        chunk = data[offset:offset + size]
+        if len(chunk) != size:
+            raise ValueError("EXIF offset outside of segment")
+        return chunk
+    return read
+
+
+def _file_reader(f):
+    def read(offset, size):
+        f.seek(offset)
+        chunk = f.read(size)
+        if len(chunk) != size:
+            raise ValueError("EXIF offset outside of file")
+        return chunk
+    return read
+
+
+def _jpeg_date_original(f):
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) != 2 or marker[0] != 0xFF:
+            return None
+        # Start of scan or end of image: metadata segments always come before these
+        if marker[1] in (0xDA, 0xD9):
+            return None
+        (length,) = struct.unpack(">H", f.read(2))
+        if marker[1] == 0xE1:
+            segment = f.read(length - 2)
+            if segment[:6] == b"Exif\x00\x00":
+                return _tiff_date_original(_buffer_reader(segment), 6)
+        else:
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def _png_date_original(f):
+    chunk = png_exif_chunk(f)
+    if chunk is None:
+        return None
+    offset, length = chunk
+    f.seek(offset)
+    return _tiff_date_original(_buffer_reader(f.read(length)))
+
+
+def read_date_original(path):
+    """
+    Return the EXIF DateTimeOriginal string of a JPEG, TIFF or PNG, or None.
+
+    Only the metadata headers are read (the APP1 segment of a JPEG, the IFDs of a TIFF, the
+    chunks before image data in a PNG), never the pixel data.
+    """
+    with open(path, "rb") as f:
+        magic = f.read(8)
+        if magic[:2] == b"\xff\xd8":
+            return _jpeg_date_original(f)
+        if magic[:4] in (b"II*\x00", b"MM\x00*"):
+            return _tiff_date_original(_file_reader(f))
+        if magic == PNG_SIGNATURE:
+            return _png_date_original(f)
+    return None
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _memoized_date(path, mtime_ns):
+    try:
+        return read_date_original(path)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def date_taken(path):
+    """Return DateTimeOriginal for a file, re-reading it only if its mtime has changed."""
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    return _memoized_date(os.path.abspath(path), mtime_ns)
+
+
+def dates_taken(paths, workers=DEFAULT_WORKERS):
+    """Return {path: DateTimeOriginal or None} for many files, reading headers on a thread pool."""
+    paths = list(paths)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(paths, executor.map(date_taken, paths)))
@@ -0,0 +1,174 @@
+import os
+import sys
+import queue
+import shutil
+import threading
+import subprocess
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Outcome of one file handed to ExifTool; message is ExifTool's error text when ok is False
+ExifToolResult = namedtuple("ExifToolResult", ["path", "ok", "message"])
+
+# ExifTool executable; FILETOOLS_EXIFTOOL overrides the bundled Windows copy and the one on PATH
+BUNDLED_EXIFTOOL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools", "exiftool.exe")
+
+# Persistent ExifTool processes run side by side by write_tags
+DEFAULT_PROCESSES = 2
+
+# Seconds to wait for ExifTool to exit after being asked to before killing it
+CLOSE_TIMEOUT = 10
+
+
+def default_executable():
+    """Return the ExifTool to run: FILETOOLS_EXIFTOOL, then the bundled exiftool.exe on Windows, then PATH."""
+    configured = os.environ.get("FILETOOLS_EXIFTOOL")
+    if configured:
+        return configured
+    if sys.platform == "win32" and os.path.isfile(BUNDLED_EXIFTOOL):
+        return BUNDLED_EXIFTOOL
+    return shutil.which("exiftool") or BUNDLED_EXIFTOOL
+
+
+class ExifToolProcess:
+    """
+    One ExifTool process kept running in -stay_open mode and fed commands on stdin.
+
+    Perl start-up costs far more than a single metadata write, so a batch reuses one process
+    instead of launching ExifTool per file. executable may be a path or a command list, which
+    lets a stand-in script take ExifTool's place.
+    """
+
+    def __init__(self, executable=None):
+        command = executable or default_executable()
+        self._command = [command] if isinstance(command, str) else list(command)
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _start(self):
+        # File names are sent as UTF-8; without this ExifTool reads them in the Windows code page
+        self._process = subprocess.Popen(
+            self._command + ["-stay_open", "True", "-@", "-", "-common_args", "-charset", "filename=utf8"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        # stderr is drained on its own thread, so a command that writes a lot of it cannot fill
+        # the pipe and stall ExifTool while stdout is being read
+        self._stderr = queue.Queue()
+        threading.Thread(target=self._drain, args=(self._process.stderr, self._stderr),
+                         name="exiftool-stderr", daemon=True).start()
+
+    @staticmethod
+    def _drain(stream, lines):
+        for line in iter(stream.readline, b""):
+            lines.put(line)
+        lines.put(b"")
+
+    def _restart(self):
+        self._process.kill()
+        self._process.wait()
+        for stream in (self._process.stdin, self._process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass  # unflushed input for the dead process
+        self._start()
+
+    def _read_until(self, read_line, marker):
+        lines = []
+        while True:
+            line = read_line()
+            if not line:
+                raise OSError(f"ExifTool exited unexpectedly (code {self._process.poll()})")
+            if line.rstrip(b"\r\n") == marker:
+                return b"".join(lines).decode("utf-8", "replace")
+            lines.append(line)
+
+    def _execute(self, args):
+        self._sequence += 1
+        ready = f"{{ready{self._sequence}}}"
+        # -echo4 marks the end of this command's stderr the way {readyN} marks its stdout
+        lines = list(args) + ["-echo4", ready, f"-execute{self._sequence}"]
+        self._process.stdin.write("".join(f"{line}\n" for line in lines).encode("utf-8"))
+        self._process.stdin.flush()
+        stdout = self._read_until(self._process.stdout.readline, ready.encode("ascii"))
+        stderr = self._read_until(self._stderr.get, ready.encode("ascii"))
+        return stdout, stderr
+
+    def execute(self, *args):
+        """
+        Run one ExifTool command and return its (stdout, stderr).
+
+        If ExifTool has died, it is started again and the command retried once; OSError is
+        raised if the fresh process dies on it too.
+        """
+        with self._lock:
+            try:
+                return self._execute(args)
+            except OSError:
+                self._restart()
+                return self._execute(args)
+
+    def write_tags(self, path, tags, overwrite_original=True):
+        """Set tags ({name: value}) on one file and return an ExifToolResult."""
+        args = [f"-{name}={value}" for name, value in tags.items()]
+        if overwrite_original:
+            args.append("-overwrite_original")
+        stdout, stderr = self.execute(*args, path)
+        ok = "1 image files updated" in stdout or "1 image files unchanged" in stdout
+        return ExifToolResult(path, ok, stderr.strip() or stdout.strip())
+
+    def close(self):
+        if self._process.poll() is not None:
+            return
+        try:
+            self._process.stdin.write(b"-stay_open\nFalse\n")
+            self._process.stdin.flush()
+            self._process.stdin.close()
+            self._process.wait(timeout=CLOSE_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired):
+            self._process.kill()
+            self._process.wait()
+
+
+def write_tags(paths, tags, executable=None, processes=DEFAULT_PROCESSES, overwrite_original=True):
+    """
+    Set the same tags on many files with a small pool of persistent ExifTool processes.
+
+    Yields an ExifToolResult per file as soon as its write finishes, so callers can report
+    progress while the rest of the batch is still running.
+    """
+    paths = list(paths)
+    processes = max(1, min(processes, len(paths)))
+    if not paths:
+        return
+    idle = queue.Queue()
+    started = []
+    try:
+        for _ in range(processes):
+            process = ExifToolProcess(executable)
+            started.append(process)
+            idle.put(process)
+
+        def write_one(path):
+            process = idle.get()
+            try:
+                return process.write_tags(path, tags, overwrite_original)
+            except OSError as e:
+                return ExifToolResult(path, False, str(e))
+            finally:
+                idle.put(process)
+
+        with ThreadPoolExecutor(max_workers=processes, thread_name_prefix="exiftool") as executor:
+            futures = [executor.submit(write_one, path) for path in paths]
+            for future in as_completed(futures):
+                yield future.result()
+    finally:
+        for process in started:
+            process.close()
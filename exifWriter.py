@@ -0,0 +1,99 @@
+import zlib
+import struct
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from exifReader import date_value_offsets, png_exif_chunk, DATE_TIME_ORIGINAL, DATE_TIME_DIGITIZED, ASCII
+from exifToolProcess import ExifToolResult, write_tags, DEFAULT_PROCESSES
+
+# Files patched at once; each patch is a few small reads and one or two tiny writes
+DEFAULT_WORKERS = 8
+
+DATE_TAGS = (DATE_TIME_ORIGINAL, DATE_TIME_DIGITIZED)
+
+
+def patch_dates(path, date_taken):
+    """
+    Overwrite DateTimeOriginal and DateTimeDigitized of a JPEG, TIFF or PNG where they already sit.
+
+    date_taken is 'YYYY:MM:DD HH:MM:SS'. Only the value bytes are rewritten (and, in a PNG, the
+    eXIf chunk's CRC), so nothing else in the file moves. Returns False, leaving the file
+    untouched, when either tag is missing, holds a value of a different length or points
+    outside the Exif data, since the file would then have to be rewritten.
+    """
+    value = date_taken.encode("ascii") + b"\x00"
+    with open(path, "r+b") as f:
+        found = date_value_offsets(f, DATE_TAGS)
+        if len(found) != len(DATE_TAGS):
+            return False
+        if any(tag_type != ASCII or count != len(value) for _, tag_type, count in found.values()):
+            return False
+        for offset, _, _ in found.values():
+            f.seek(offset)
+            f.write(value)
+        chunk = png_exif_chunk(f)
+        if chunk is not None:
+            # The CRC covers the chunk type and data and follows the data
+            offset, length = chunk
+            f.seek(offset - 4)
+            crc = zlib.crc32(f.read(4 + length))
+            f.seek(offset + length)
+            f.write(struct.pack(">I", crc))
+    return True
+
+
+def insert_dates_piexif(path, date_taken):
+    """Set the date tags of a JPEG through piexif, which rewrites the metadata but not the image data."""
+    import piexif
+
+    exif = piexif.load(path)
+    value = date_taken.encode("ascii")
+    exif["Exif"][piexif.ExifIFD.DateTimeOriginal] = value
+    exif["Exif"][piexif.ExifIFD.DateTimeDigitized] = value
+    piexif.insert(piexif.dump(exif), path)
+
+
+def _write_native(path, date_taken):
+    """Return an ExifToolResult, or None if the file has to go to ExifTool."""
+    try:
+        if patch_dates(path, date_taken):
+            return ExifToolResult(path, True, "patched in place")
+        with open(path, "rb") as f:
+            if f.read(2) != b"\xff\xd8":
+                return None
+    except (OSError, ValueError, struct.error):
+        return None
+    try:
+        insert_dates_piexif(path, date_taken)
+    except Exception:
+        # piexif is missing or cannot handle this file's metadata
+        return None
+    return ExifToolResult(path, True, "written with piexif")
+
+
+def write_dates(paths, date_taken, workers=DEFAULT_WORKERS, executable=None, processes=DEFAULT_PROCESSES):
+    """
+    Set DateTimeOriginal and DateTimeDigitized on many files, yielding an ExifToolResult per file.
+
+    Files are first patched in place on a thread pool. JPEGs that lack the tags are written with
+    piexif when it is installed. Everything else (HEIC, RAW, PNGs without the tags and files
+    that fail to parse) goes to a pool of persistent ExifTool processes.
+    """
+    fallback = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="exif-write") as executor:
+        futures = {executor.submit(_write_native, path, date_taken): path for path in paths}
+        for future in as_completed(futures):
+            result = future.result()
+            if result is None:
+                fallback.append(futures[future])
+            else:
+                yield result
+
+    reported = set()
+    tags = {"DateTimeOriginal": date_taken, "DateTimeDigitized": date_taken}
+    try:
+        for result in write_tags(fallback, tags, executable, processes):
+            reported.add(result.path)
+            yield result
+    except OSError as e:
+        for path in fallback:
+            if path not in reported:
+                yield ExifToolResult(path, False, f"ExifTool could not be started: {e}")
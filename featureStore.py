@@ -0,0 +1,164 @@
+import os
+import sqlite3
+import threading
+from imageFingerprint import fingerprint_files, to_bytes, from_bytes, DEFAULT_PROCESSES, DEFAULT_CHUNK_SIZE
+
+# Location of the shared feature store; override with the FILETOOLS_FEATURE_STORE environment variable
+DEFAULT_STORE_PATH = os.environ.get(
+    "FILETOOLS_FEATURE_STORE",
+    os.path.join(os.path.expanduser("~"), ".fileToolsJason", "features.sqlite3")
+)
+
+# Number of writes to buffer before committing to disk
+COMMIT_INTERVAL = 500
+
+
+class FeatureStore:
+    """
+    On-disk store of per-file image fingerprints, so rescans only decode new or changed files.
+
+    Entries are keyed by (path, kind) and are only trusted while the file's size and mtime_ns
+    still match what was recorded. Values are stored as raw bytes.
+    """
+
+    def __init__(self, db_path=DEFAULT_STORE_PATH):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS features (
+                path TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                value BLOB NOT NULL,
+                PRIMARY KEY (path, kind)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def _key_path(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def load_kind(self, kind):
+        """Return {path: (size, mtime_ns, value)} for every stored entry of a kind in one query."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, mtime_ns, value FROM features WHERE kind = ?", (kind,)
+            ).fetchall()
+        return {path: (size, mtime_ns, value) for path, size, mtime_ns, value in rows}
+
+    def store(self, path, stat_result, kind, value):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO features (path, kind, size, mtime_ns, value) VALUES (?, ?, ?, ?, ?)",
+                (self._key_path(path), kind, stat_result.st_size, stat_result.st_mtime_ns, value)
+            )
+            self._pending += 1
+            if self._pending >= COMMIT_INTERVAL:
+                self._conn.commit()
+                self._pending = 0
+
+    def split_cached(self, paths, kind, decode, on_error=None):
+        """
+        Return ({path: value}, {path: stat_result}, stats) splitting paths into up-to-date entries
+        (decoded with decode) and files that are new or changed and still need computing.
+
+        Items may be paths or (path, stat_result) pairs from a directory scan, which avoids a
+        second stat per file.
+        """
+        stored = self.load_kind(kind)
+        result = {}
+        todo = {}
+        stats = {"cached": 0, "computed": 0, "failed": 0}
+        for item in paths:
+            if isinstance(item, tuple):
+                path, stat_result = item
+            else:
+                path = item
+                try:
+                    stat_result = os.stat(path)
+                except OSError as e:
+                    stats["failed"] += 1
+                    if on_error is not None:
+                        on_error(path, e)
+                    continue
+            entry = stored.get(self._key_path(path))
+            if entry is not None and entry[:2] == (stat_result.st_size, stat_result.st_mtime_ns):
+                result[path] = decode(entry[2])
+                stats["cached"] += 1
+            else:
+                todo[path] = stat_result
+        return result, todo, stats
+
+    def fingerprints(self, paths, kind="dhash", on_error=None, processes=DEFAULT_PROCESSES,
+                     chunk_size=DEFAULT_CHUNK_SIZE, cancel_event=None):
+        """
+        Return ({path: fingerprint}, stats) for paths, computing only files that are new or changed.
+
+        New or changed files are decoded on a pool of worker processes (see fingerprint_files).
+        stats counts how many fingerprints were reused from the store and how many were computed.
+        """
+        result, todo, stats = self.split_cached(paths, kind, from_bytes, on_error)
+        for path, value, error in fingerprint_files(todo, kind, processes, chunk_size, cancel_event):
+            if error is not None:
+                stats["failed"] += 1
+                if on_error is not None:
+                    on_error(path, error)
+                continue
+            self.store(path, todo[path], kind, to_bytes(value))
+            result[path] = value
+            stats["computed"] += 1
+        return result, stats
+
+    def prune(self, folder, seen_paths, kind=None):
+        """
+        Delete entries under folder whose paths were not seen during the latest scan.
+
+        With kind, only entries of that kind are considered, so a scan of images does not drop
+        the video fingerprints stored for the same folder.
+        """
+        prefix = os.path.join(self._key_path(folder), "")
+        seen = {self._key_path(p) for p in seen_paths}
+        with self._lock:
+            if kind is None:
+                rows = self._conn.execute(
+                    "SELECT DISTINCT path FROM features WHERE substr(path, 1, ?) = ?",
+                    (len(prefix), prefix)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT path FROM features WHERE substr(path, 1, ?) = ? AND kind = ?",
+                    (len(prefix), prefix, kind)
+                ).fetchall()
+            stale = [(path,) for (path,) in rows if path not in seen]
+            if stale:
+                if kind is None:
+                    self._conn.executemany("DELETE FROM features WHERE path = ?", stale)
+                else:
+                    self._conn.executemany("DELETE FROM features WHERE path = ? AND kind = ?",
+                                           [(path, kind) for (path,) in stale])
+                self._conn.commit()
+                self._pending = 0
+        return len(stale)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
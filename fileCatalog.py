@@ -0,0 +1,154 @@
+import os
+from array import array
+from collections import namedtuple
+import numpy as np
+from fileIndex import scan
+from hashEngine import hash_files, new_hasher
+
+# The parts of a stat result that HashCache checks, rebuilt from catalog columns when a row is hashed
+CatalogStat = namedtuple("CatalogStat", ["st_dev", "st_ino", "st_size", "st_mtime_ns"])
+
+
+class FileCatalog:
+    """
+    Columnar table of files for scans of millions of entries.
+
+    Paths are stored as one packed byte string addressed by offsets. Sizes, mtimes, devices and
+    inodes are array('q') columns, and digests are raw bytes in one contiguous buffer. This
+    replaces a tuple, a str and a 64-character hex digest per file. Rows are addressed by index,
+    and matching works on NumPy views of the columns by sorting rather than through dicts.
+    """
+
+    def __init__(self, digest_size=32):
+        self.digest_size = digest_size
+        self._names = bytearray()
+        self._offsets = array("q", [0])
+        self.sizes = array("q")
+        self.mtimes = array("q")
+        self.devices = array("q")
+        self.inodes = array("q")
+        self._digests = bytearray()
+
+    @classmethod
+    def for_algorithm(cls, algorithm="sha256"):
+        return cls(new_hasher(algorithm).digest_size)
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def add(self, path, size, mtime_ns=0, device=0, inode=0):
+        """Append a file and return its row."""
+        self._names += os.fsencode(path)
+        self._offsets.append(len(self._names))
+        self.sizes.append(size)
+        self.mtimes.append(mtime_ns)
+        self.devices.append(device)
+        self.inodes.append(inode)
+        self._digests += bytes(self.digest_size)
+        return len(self.sizes) - 1
+
+    def add_folder(self, folder, exts=None, on_error=None):
+        """Append every file under folder and return the (start, stop) range of the new rows."""
+        start = len(self)
+        for record in scan(folder, exts, on_error=on_error):
+            self.add(record.path, record.size, record.mtime_ns, record.stat.st_dev, record.inode)
+        return start, len(self)
+
+    def path(self, row):
+        return os.fsdecode(bytes(self._names[self._offsets[row]:self._offsets[row + 1]]))
+
+    def paths(self, start=0, stop=None):
+        for row in range(start, len(self) if stop is None else stop):
+            yield self.path(row)
+
+    def stat(self, row):
+        return CatalogStat(self.devices[row], self.inodes[row], self.sizes[row], self.mtimes[row])
+
+    def digest(self, row):
+        offset = row * self.digest_size
+        return bytes(self._digests[offset:offset + self.digest_size])
+
+    def set_digest(self, row, digest):
+        """Store a digest given as raw bytes or as a hex string."""
+        if isinstance(digest, str):
+            digest = bytes.fromhex(digest)
+        if len(digest) != self.digest_size:
+            raise ValueError(f"expected a {self.digest_size}-byte digest, got {len(digest)} bytes")
+        offset = row * self.digest_size
+        self._digests[offset:offset + self.digest_size] = digest
+
+    def size_array(self):
+        """Zero-copy int64 view of the size column."""
+        return np.frombuffer(self.sizes, dtype=np.int64)
+
+    def keys(self, rows, use_digest=True):
+        """
+        Return one fixed-width key per row (big-endian size, then the digest) as a NumPy void
+        array, so rows can be sorted, grouped and intersected with plain NumPy calls.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        width = 8 + (self.digest_size if use_digest else 0)
+        packed = np.empty((len(rows), width), dtype=np.uint8)
+        packed[:, :8] = self.size_array()[rows].astype(">i8").view(np.uint8).reshape(-1, 8)
+        if use_digest:
+            digests = np.frombuffer(self._digests, dtype=np.uint8).reshape(-1, self.digest_size)
+            packed[:, 8:] = digests[rows]
+        return packed.view(f"V{width}").ravel()
+
+    def nbytes(self):
+        """Approximate memory held by the catalog's columns."""
+        columns = (self.sizes, self.mtimes, self.devices, self.inodes, self._offsets)
+        return len(self._names) + len(self._digests) + sum(column.itemsize * len(column) for column in columns)
+
+
+def hash_rows(catalog, rows, **hash_options):
+    """
+    Hash the files in rows with hash_files and store each digest in the catalog.
+
+    hash_options are passed to hash_files. Returns the rows that were hashed successfully as a
+    NumPy array; rows whose files failed to hash are left out.
+    """
+    rows = [int(row) for row in rows]
+    items = ((catalog.path(row), catalog.stat(row)) for row in rows)
+    hashed = []
+    pending = iter(rows)
+    # Results come back in input order, so rows are matched to them by walking forward; rows
+    # that are skipped over are the ones whose files failed to hash
+    for result in hash_files(items, ordered=True, **hash_options):
+        for row in pending:
+            if catalog.path(row) == result.path:
+                catalog.set_digest(row, result.digest)
+                hashed.append(row)
+                break
+    return np.array(hashed, dtype=np.intp)
+
+
+def rows_in_both(catalog, rows, split, use_digest=True):
+    """
+    Return the rows whose key occurs both before and at-or-after row index split.
+
+    The catalog holds two folders, the first in rows [0, split) and the second after it. Keys
+    are grouped with np.unique instead of a dict per file.
+    """
+    rows = np.asarray(rows, dtype=np.intp)
+    if len(rows) == 0:
+        return rows
+    _, group = np.unique(catalog.keys(rows, use_digest), return_inverse=True)
+    group = group.ravel()
+    left = np.zeros(group.max() + 1, dtype=bool)
+    right = np.zeros_like(left)
+    left[group[rows < split]] = True
+    right[group[rows >= split]] = True
+    return rows[left[group] & right[group]]
+
+
+def group_rows(catalog, rows, use_digest=True):
+    """Return the rows grouped by key as a list of row arrays, keeping each group in row order."""
+    rows = np.asarray(rows, dtype=np.intp)
+    if len(rows) == 0:
+        return []
+    keys = catalog.keys(rows, use_digest)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    boundaries = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+    return [rows[chunk] for chunk in np.split(order, boundaries)]
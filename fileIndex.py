@@ -0,0 +1,142 @@
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# One file found by a scan. stat is DirEntry.stat(), fetched once; on Windows it comes from the
+# directory listing itself, so its st_dev and st_ino are zero and inode is filled in separately.
+FileRecord = namedtuple("FileRecord", ["path", "size", "mtime_ns", "inode", "ext", "stat"])
+
+# Extensions the media tools treat as images and videos, for passing to scan as exts
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tiff"}
+VIDEO_EXTS = {".mp4", ".mov", ".avi", ".mkv", ".webm", ".wmv"}
+
+# Directories listed concurrently by a parallel scan; 1 walks the tree on the calling thread
+DEFAULT_WORKERS = int(os.environ.get("FILETOOLS_SCAN_WORKERS", 1))
+
+
+def _list_dir(path, exts, follow_symlinks, on_error):
+    """Return (records, subdirectories) for one directory."""
+    records = []
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=follow_symlinks):
+                        subdirs.append(entry.path)
+                        continue
+                    # Links to files are listed like os.walk lists them; links to folders are
+                    # only descended into with follow_symlinks
+                    if not entry.is_file():
+                        continue
+                    ext = os.path.splitext(entry.name)[1].lower()
+                    if exts is not None and ext not in exts:
+                        continue
+                    st = entry.stat()
+                    records.append(FileRecord(entry.path, st.st_size, st.st_mtime_ns,
+                                              st.st_ino or entry.inode(), ext, st))
+                except OSError as e:
+                    if on_error is not None:
+                        on_error(entry.path, e)
+    except OSError as e:
+        if on_error is not None:
+            on_error(path, e)
+    return records, subdirs
+
+
+def scan(folder, exts=None, workers=DEFAULT_WORKERS, follow_symlinks=False, on_error=None):
+    """
+    Yield a FileRecord for every file under folder, stat'ing each file exactly once.
+
+    exts restricts the scan to a set of lowercase extensions such as {".jpg", ".png"}. With
+    workers > 1 subdirectories are listed concurrently, which helps on network shares and
+    cold disks; records then arrive in no particular order.
+    """
+    if exts is not None:
+        exts = {ext.lower() for ext in exts}
+    if workers <= 1:
+        stack = [folder]
+        while stack:
+            records, subdirs = _list_dir(stack.pop(), exts, follow_symlinks, on_error)
+            yield from records
+            stack.extend(reversed(subdirs))
+        return
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan") as executor:
+        pending = {executor.submit(_list_dir, folder, exts, follow_symlinks, on_error)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                records, subdirs = future.result()
+                for subdir in subdirs:
+                    pending.add(executor.submit(_list_dir, subdir, exts, follow_symlinks, on_error))
+                yield from records
+
+
+class FileIndex:
+    """
+    Scans folders once and answers later queries from the same records.
+
+    Tools that look at a tree several times (by extension, by size, for a single file's size)
+    share one FileIndex so the tree is walked and stat'ed only once per run.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, on_error=None):
+        self.workers = workers
+        self.on_error = on_error
+        self._trees = {}
+        self._by_path = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key_path(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def records(self, folder, exts=None):
+        """Return the FileRecords under folder, optionally only those with an extension in exts."""
+        key = self._key_path(folder)
+        with self._lock:
+            records = self._trees.get(key)
+        if records is None:
+            records = list(scan(folder, workers=self.workers, on_error=self.on_error))
+            with self._lock:
+                self._trees[key] = records
+                for record in records:
+                    self._by_path[self._key_path(record.path)] = record
+        if exts is None:
+            return records
+        exts = {ext.lower() for ext in exts}
+        return [record for record in records if record.ext in exts]
+
+    def paths(self, folder, exts=None):
+        return [record.path for record in self.records(folder, exts)]
+
+    def get(self, path):
+        """Return the record for a file in an already scanned folder, or stat it if it is unknown."""
+        with self._lock:
+            record = self._by_path.get(self._key_path(path))
+        if record is not None:
+            return record
+        st = os.stat(path)
+        return FileRecord(path, st.st_size, st.st_mtime_ns, st.st_ino, os.path.splitext(path)[1].lower(), st)
+
+    def invalidate(self, folder=None):
+        """Forget the records of one folder, or of every folder, so the next query rescans it."""
+        with self._lock:
+            if folder is None:
+                self._trees.clear()
+                self._by_path.clear()
+                return
+            prefix = os.path.join(self._key_path(folder), "")
+            self._trees.pop(self._key_path(folder), None)
+            for key in [key for key in self._by_path if key.startswith(prefix)]:
+                del self._by_path[key]
+
+
+def same_file(a, b):
+    """Return True if two records refer to the same file, including hard links to it."""
+    if a.stat.st_dev and b.stat.st_dev:
+        return (a.stat.st_dev, a.inode) == (b.stat.st_dev, b.inode)
+    # Windows directory listings carry no volume id, so ask the OS
+    return os.path.samefile(a.path, b.path)
@@ -0,0 +1,221 @@
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+from collections import namedtuple
+from fileIndex import scan
+
+# kind is "created", "modified", "deleted", "moved" (path -> dest) or "rescan" (events were lost)
+WatchEvent = namedtuple("WatchEvent", ["kind", "path", "dest"])
+
+DEFAULT_POLL_INTERVAL = 30.0
+
+# inotify(7) constants
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+              | IN_ONLYDIR)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_libc():
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+class InotifyWatcher:
+    """
+    Recursive directory watcher built on Linux inotify through ctypes.
+
+    One watch is added per directory. File content changes are reported when the writer closes
+    the file (IN_CLOSE_WRITE), so half-copied files are not hashed. Renames within the watched
+    trees are paired by their cookie into a single "moved" event.
+    """
+
+    def __init__(self, roots):
+        self._libc = _load_libc()
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._paths = {}  # watch descriptor -> directory path
+        for root in roots:
+            self._watch_tree(root)
+
+    def _watch(self, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            if errno == 28:  # ENOSPC
+                print("inotify watch limit reached; raise fs.inotify.max_user_watches or use --poll")
+            return
+        self._paths[wd] = path
+
+    def _watch_tree(self, root):
+        self._watch(root)
+        stack = [root]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            self._watch(entry.path)
+                            stack.append(entry.path)
+            except OSError:
+                continue
+
+    def _renamed_dir(self, src, dest):
+        prefix = os.path.join(src, "")
+        for wd, path in self._paths.items():
+            if path == src:
+                self._paths[wd] = dest
+            elif path.startswith(prefix):
+                self._paths[wd] = os.path.join(dest, path[len(prefix):])
+
+    def poll(self, timeout=1.0):
+        """Return the events that arrive within timeout seconds."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        data = b""
+        while True:
+            try:
+                chunk = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            data += chunk
+
+        events = []
+        moved_from = {}  # cookie -> path, for renames whose destination has not been seen yet
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += _EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                events.append(WatchEvent("rescan", None, None))
+                continue
+            if mask & IN_IGNORED:
+                self._paths.pop(wd, None)
+                continue
+            directory = self._paths.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, os.fsdecode(name)) if name else directory
+            is_dir = bool(mask & IN_ISDIR)
+            if mask & IN_MOVED_FROM:
+                moved_from[cookie] = path
+            elif mask & IN_MOVED_TO:
+                src = moved_from.pop(cookie, None)
+                if src is None:
+                    if is_dir:
+                        self._watch_tree(path)
+                    events.append(WatchEvent("created", path, None))
+                else:
+                    if is_dir:
+                        self._renamed_dir(src, path)
+                    events.append(WatchEvent("moved", src, path))
+            elif mask & IN_CREATE:
+                # New directories need their own watches; files wait for IN_CLOSE_WRITE
+                if is_dir:
+                    self._watch_tree(path)
+                    events.append(WatchEvent("created", path, None))
+            elif mask & (IN_CLOSE_WRITE | IN_ATTRIB):
+                if not is_dir:
+                    events.append(WatchEvent("modified", path, None))
+            elif mask & (IN_DELETE | IN_DELETE_SELF):
+                events.append(WatchEvent("deleted", path, None))
+        # A rename with no matching destination moved the file out of the watched trees
+        events.extend(WatchEvent("deleted", path, None) for path in moved_from.values())
+        return events
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def snapshot_of(records):
+    """Return the {path: (size, mtime_ns, inode)} snapshot PollingWatcher compares between polls."""
+    return {record.path: (record.size, record.mtime_ns, record.inode) for record in records}
+
+
+class PollingWatcher:
+    """
+    Portable watcher that rescans the trees every interval seconds and reports the differences.
+
+    Files that disappear from one path and appear at another with the same inode and size are
+    reported as moves, so their hashes and fingerprints can be carried over. snapshot (see
+    snapshot_of) seeds the first comparison from a scan the caller already made.
+    """
+
+    def __init__(self, roots, interval=DEFAULT_POLL_INTERVAL, snapshot=None):
+        self.roots = list(roots)
+        self.interval = interval
+        self._snapshot = self._take_snapshot() if snapshot is None else snapshot
+        self._next_poll = time.monotonic() + interval
+
+    def _take_snapshot(self):
+        return snapshot_of(record for root in self.roots for record in scan(root))
+
+    def poll(self, timeout=1.0):
+        wait = self._next_poll - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return []
+        time.sleep(max(0.0, wait))
+        self._next_poll = time.monotonic() + self.interval
+
+        old, new = self._snapshot, self._take_snapshot()
+        self._snapshot = new
+        events = []
+        removed = {path: info for path, info in old.items() if path not in new}
+        by_identity = {(info[2], info[0]): path for path, info in removed.items() if info[2]}
+        for path, info in new.items():
+            previous = old.get(path)
+            if previous is None:
+                src = by_identity.pop((info[2], info[0]), None) if info[2] else None
+                if src is not None:
+                    del removed[src]
+                    events.append(WatchEvent("moved", src, path))
+                else:
+                    events.append(WatchEvent("created", path, None))
+            elif previous != info:
+                events.append(WatchEvent("modified", path, None))
+        events.extend(WatchEvent("deleted", path, None) for path in removed)
+        return events
+
+    def close(self):
+        pass
+
+
+def create_watcher(roots, poll_interval=DEFAULT_POLL_INTERVAL, force_polling=False, snapshot=None):
+    """
+    Return an InotifyWatcher on Linux, falling back to a PollingWatcher elsewhere or on failure.
+
+    snapshot is handed to the PollingWatcher, if one is made.
+    """
+    if not force_polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}); polling every {poll_interval:g} s instead")
+    return PollingWatcher(roots, poll_interval, snapshot)
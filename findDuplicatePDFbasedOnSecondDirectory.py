@@ -1,48 +1,65 @@
-import os
-import hashlib
+import argparse
 import tkinter as tk
 from tkinter import ttk, messagebox
-from send2trash import send2trash
 from pathlib import Path
+from hashCache import HashCache
+from fileIndex import scan
+from hashEngine import (hash_files, confirm_groups, needs_confirmation, available_algorithms, peak_memory,
+                        format_bytes, HASH_ALGORITHMS, DEFAULT_WORKERS)
+
+# Read size used when streaming PDFs through the hasher; memory per worker stays at this size
+PDF_CHUNK_SIZE = 1024 * 1024
 
 # --- Helper Functions ---
-def get_pdf_hashes(folder):
+def _report_error(filepath, e):
+    print(f"Error hashing {filepath}: {e}")
+
+def iter_pdf_hashes(folder, cache=None, workers=DEFAULT_WORKERS, chunk_size=PDF_CHUNK_SIZE, algorithm="sha256"):
+    """Yield (path, size, hash) for every PDF under folder, hashing on the shared thread pool."""
+    def walk_pdfs():
+        for record in scan(folder, {".pdf"}):
+            yield record.path, record.stat
+
+    seen_paths = []
+    for result in hash_files(walk_pdfs(), workers=workers, ordered=True, algorithm=algorithm, block_size=chunk_size,
+                             cache=cache, on_error=_report_error):
+        seen_paths.append(result.path)
+        yield result
+    if cache is not None:
+        # Only PDFs were scanned; hashes of other files under folder belong to other tools
+        cache.prune(folder, seen_paths, {".pdf"})
+
+def get_pdf_hashes(folder, cache=None, workers=DEFAULT_WORKERS, chunk_size=PDF_CHUNK_SIZE, algorithm="sha256"):
     hashes = {}
-    for root, _, files in os.walk(folder):
-        for file in files:
-            if file.lower().endswith(".pdf"):
-                filepath = os.path.join(root, file)
-                try:
-                    with open(filepath, 'rb') as f:
-                        file_hash = hashlib.sha256(f.read()).hexdigest()
-                        hashes[file_hash] = filepath
-                except Exception as e:
-                    print(f"Error hashing {filepath}: {e}")
+    for filepath, _, file_hash in iter_pdf_hashes(folder, cache, workers, chunk_size, algorithm):
+        hashes[file_hash] = filepath
     return hashes
 
-def find_duplicates(original_folder, reference_folder):
-    reference_hashes = get_pdf_hashes(reference_folder)
+def find_duplicates(original_folder, reference_folder, cache=None, workers=DEFAULT_WORKERS,
+                    chunk_size=PDF_CHUNK_SIZE, algorithm="sha256", confirm=True):
+    reference_hashes = get_pdf_hashes(reference_folder, cache, workers, chunk_size, algorithm)
     duplicates = []
-    for root, _, files in os.walk(original_folder):
-        for file in files:
-            if file.lower().endswith(".pdf"):
-                orig_path = os.path.join(root, file)
-                try:
-                    with open(orig_path, 'rb') as f:
-                        file_hash = hashlib.sha256(f.read()).hexdigest()
-                        if file_hash in reference_hashes:
-                            duplicates.append((orig_path, reference_hashes[file_hash]))
-                except Exception as e:
-                    print(f"Error hashing {orig_path}: {e}")
+    largest = 0
+    for orig_path, size, file_hash in iter_pdf_hashes(original_folder, cache, workers, chunk_size, algorithm):
+        largest = max(largest, size)
+        if file_hash in reference_hashes:
+            duplicates.append((orig_path, reference_hashes[file_hash]))
+    if confirm and needs_confirmation(algorithm):
+        # Fast-hash matches are re-checked with SHA-256 before they can be offered for deletion
+        confirmed = {tuple(group) for group in confirm_groups(duplicates, workers=workers, cache=cache,
+                                                              on_error=_report_error)}
+        duplicates = [pair for pair in duplicates if pair in confirmed]
+    print(f"Largest PDF hashed: {format_bytes(largest)}; peak process memory: {format_bytes(peak_memory())} "
+          f"({workers} workers x {format_bytes(chunk_size)} read buffers)")
     return duplicates
 
 # --- GUI ---
 class DuplicateFinderGUI:
-    def __init__(self, root, original, reference):
+    def __init__(self, root, original, reference, cache=None, algorithm="sha256", confirm=True):
         self.root = root
         self.root.title("PDF Duplicate Finder")
 
-        self.duplicates = find_duplicates(original, reference)
+        self.duplicates = find_duplicates(original, reference, cache, algorithm=algorithm, confirm=confirm)
         self.check_vars = []
 
         if not self.duplicates:
@@ -80,6 +97,8 @@ class DuplicateFinderGUI:
         self.delete_button.pack(pady=5)
 
     def delete_selected(self):
+        from send2trash import send2trash
+
         deleted = 0
         for var, filepath in self.check_vars:
             if var.get():
@@ -94,6 +113,15 @@ class DuplicateFinderGUI:
 
 # --- Main ---
 def main():
+    parser = argparse.ArgumentParser(description="Find PDFs in 'original' that also exist in 'reference'.")
+    parser.add_argument("--algorithm", default="sha256", choices=list(HASH_ALGORITHMS),
+                        help="Hash used to match PDFs; xxh3_128 and blake3 are faster than sha256")
+    parser.add_argument("--no-confirm", action="store_true",
+                        help="Skip the SHA-256 confirmation of matches found with a non-cryptographic hash")
+    args = parser.parse_args()
+    if args.algorithm not in available_algorithms():
+        parser.error(f"Hash algorithm '{args.algorithm}' needs an optional package that is not installed.")
+
     original_folder = "original"
     reference_folder = "reference"
 
@@ -102,7 +130,8 @@ def main():
         return
 
     root = tk.Tk()
-    app = DuplicateFinderGUI(root, original_folder, reference_folder)
+    with HashCache() as cache:
+        app = DuplicateFinderGUI(root, original_folder, reference_folder, cache, args.algorithm, not args.no_confirm)
     root.mainloop()
 
 if __name__ == "__main__":
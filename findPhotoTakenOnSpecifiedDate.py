@@ -1,4 +1,5 @@
 import os
+from fileIndex import scan
 
 
 def find_files_with_prefix(folder_path, prefix):
@@ -12,15 +13,7 @@ def find_files_with_prefix(folder_path, prefix):
     Returns:
         List of matching file paths.
     """
-    matching_files = []
-
-    for root, dirs, files in os.walk(folder_path):
-        for file in files:
-            if file.startswith(prefix):
-                full_path = os.path.join(root, file)
-                matching_files.append(full_path)
-
-    return matching_files
+    return [record.path for record in scan(folder_path) if os.path.basename(record.path).startswith(prefix)]
 
 
 if __name__ == "__main__":
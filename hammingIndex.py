@@ -0,0 +1,90 @@
+from itertools import combinations
+
+DEFAULT_BITS = 64
+DEFAULT_CHUNKS = 4
+
+
+def _flip_masks(width, radius):
+    """Return every mask of width bits with at most radius bits set."""
+    masks = [0]
+    for r in range(1, radius + 1):
+        for positions in combinations(range(width), r):
+            mask = 0
+            for position in positions:
+                mask |= 1 << position
+            masks.append(mask)
+    return masks
+
+
+class HammingIndex:
+    """
+    Multi-index hash table for finding fingerprints within a Hamming distance threshold.
+
+    Each fingerprint is split into `chunks` substrings, each indexed in its own dict. By the
+    pigeonhole principle two fingerprints within `threshold` bits differ by at most
+    threshold // chunks bits in at least one substring, so a query only probes the buckets
+    within that radius of its own substrings instead of comparing against every entry.
+    """
+
+    def __init__(self, threshold, bits=DEFAULT_BITS, chunks=DEFAULT_CHUNKS):
+        self.threshold = threshold
+        self.bits = bits
+        self.chunks = max(1, min(chunks, bits))
+        self.values = []
+        # Split bits as evenly as possible: (shift, width) for each chunk
+        self._layout = []
+        shift = 0
+        for i in range(self.chunks):
+            width = bits // self.chunks + (1 if i < bits % self.chunks else 0)
+            self._layout.append((shift, width))
+            shift += width
+        radius = threshold // self.chunks
+        self._masks = {width: _flip_masks(width, radius) for _, width in self._layout}
+        self._tables = [{} for _ in range(self.chunks)]
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, value):
+        """Index a fingerprint and return its id (its position in self.values)."""
+        value_id = len(self.values)
+        self.values.append(value)
+        for table, (shift, width) in zip(self._tables, self._layout):
+            key = (value >> shift) & ((1 << width) - 1)
+            table.setdefault(key, []).append(value_id)
+        return value_id
+
+    def remove(self, value_id):
+        """Drop a fingerprint from the tables; its id is not reused and values[value_id] becomes None."""
+        value = self.values[value_id]
+        if value is None:
+            return
+        for table, (shift, width) in zip(self._tables, self._layout):
+            key = (value >> shift) & ((1 << width) - 1)
+            bucket = table[key]
+            bucket.remove(value_id)
+            if not bucket:
+                del table[key]
+        self.values[value_id] = None
+
+    def candidates(self, value):
+        """Return the ids that share a substring within the probe radius of value."""
+        found = set()
+        for table, (shift, width) in zip(self._tables, self._layout):
+            key = (value >> shift) & ((1 << width) - 1)
+            for mask in self._masks[width]:
+                bucket = table.get(key ^ mask)
+                if bucket:
+                    found.update(bucket)
+        return found
+
+    def query(self, value):
+        """Return [(id, distance)] for every indexed fingerprint within the threshold of value."""
+        values = self.values
+        threshold = self.threshold
+        matches = []
+        for value_id in self.candidates(value):
+            distance = (value ^ values[value_id]).bit_count()
+            if distance <= threshold:
+                matches.append((value_id, distance))
+        return matches
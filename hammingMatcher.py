@@ -0,0 +1,66 @@
+import numpy as np
+
+# Query and reference rows per block; a block holds QUERY_BLOCK * REFERENCE_BLOCK distances,
+# so the defaults cap the working set at roughly 4M pairs (about 50 MB of temporaries)
+DEFAULT_QUERY_BLOCK = 256
+DEFAULT_REFERENCE_BLOCK = 16384
+
+# Bit counts of every 16-bit value; a uint64 is popcounted as four table lookups
+_POPCOUNT16 = np.array([bin(i).count("1") for i in range(1 << 16)], dtype=np.uint8)
+
+
+def pack_fingerprints(values):
+    """Return fingerprints as a contiguous uint64 array."""
+    return np.ascontiguousarray(np.fromiter(values, dtype=np.uint64))
+
+
+def _popcount64_table(x):
+    x = np.ascontiguousarray(x)
+    counts = np.take(_POPCOUNT16, x.view(np.uint16)).reshape(x.shape + (4,))
+    return counts[..., 0] + counts[..., 1] + counts[..., 2] + counts[..., 3]
+
+
+def popcount64(x):
+    """Return the number of set bits in each element of a uint64 array."""
+    # NumPy 2 exposes the CPU popcount instruction; older versions use the lookup table
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x)
+    return _popcount64_table(x)
+
+
+def match_blocked(query, reference, threshold, query_block=DEFAULT_QUERY_BLOCK,
+                  reference_block=DEFAULT_REFERENCE_BLOCK):
+    """
+    Compare every query fingerprint with every reference fingerprint in blocks.
+
+    Returns (i, j, distance) arrays for pairs with query[i] and reference[j] within threshold
+    bits. Each block is one XOR broadcast and one popcount, so the Python loop runs once per
+    block rather than once per pair; memory is bounded by the block sizes.
+    """
+    query = np.asarray(query, dtype=np.uint64)
+    reference = np.asarray(reference, dtype=np.uint64)
+    found_i, found_j, found_d = [], [], []
+    for q_start in range(0, len(query), query_block):
+        q = query[q_start:q_start + query_block, None]
+        for r_start in range(0, len(reference), reference_block):
+            distances = popcount64(q ^ reference[None, r_start:r_start + reference_block])
+            i, j = np.nonzero(distances <= threshold)
+            if len(i):
+                found_i.append(i + q_start)
+                found_j.append(j + r_start)
+                found_d.append(distances[i, j])
+    if not found_i:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty.copy(), np.empty(0, dtype=np.uint8)
+    return np.concatenate(found_i), np.concatenate(found_j), np.concatenate(found_d)
+
+
+def find_similar_between(fingerprints1, fingerprints2, threshold, query_block=DEFAULT_QUERY_BLOCK,
+                         reference_block=DEFAULT_REFERENCE_BLOCK):
+    """Yield (path1, path2, distance) for {path: fingerprint} mappings, matching folder2 against folder1."""
+    paths1, values1 = list(fingerprints1), fingerprints1.values()
+    paths2, values2 = list(fingerprints2), fingerprints2.values()
+    reference = pack_fingerprints(values1)
+    query = pack_fingerprints(values2)
+    for i, j, distance in zip(*match_blocked(query, reference, threshold, query_block, reference_block)):
+        yield paths1[j], paths2[i], int(distance)
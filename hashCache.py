@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import threading
+
+# Location of the shared hash cache; override with the FILETOOLS_HASH_CACHE environment variable
+DEFAULT_CACHE_PATH = os.environ.get(
+    "FILETOOLS_HASH_CACHE",
+    os.path.join(os.path.expanduser("~"), ".fileToolsJason", "hash_cache.sqlite3")
+)
+
+# Number of writes to buffer before committing to disk
+COMMIT_INTERVAL = 500
+
+
+def _same_identity(recorded, current):
+    """Compare (device, inode) pairs, treating a zero on either side as unknown."""
+    return all(a == b for a, b in zip(recorded, current) if a and b)
+
+
+class HashCache:
+    """
+    On-disk cache of file content hashes shared by the duplicate finding scripts.
+
+    Entries are keyed by (path, algorithm) and are only trusted while the file's
+    device, inode, size and mtime_ns still match what was recorded. Device and inode are only
+    compared when both sides know them: on Windows a directory scan reports them as zero while
+    os.stat does not, and every tool sharing the cache must agree on whether a file changed.
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS hashes (
+                path TEXT NOT NULL,
+                algorithm TEXT NOT NULL,
+                device INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                PRIMARY KEY (path, algorithm)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def _key_path(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def lookup(self, path, stat_result, algorithm="sha256"):
+        """Return the cached digest for path, or None if missing or stale."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT device, inode, size, mtime_ns, digest FROM hashes WHERE path = ? AND algorithm = ?",
+                (self._key_path(path), algorithm)
+            ).fetchone()
+        if row is None:
+            return None
+        device, inode, size, mtime_ns, digest = row
+        if (size, mtime_ns) != (stat_result.st_size, stat_result.st_mtime_ns):
+            return None  # File changed since it was hashed; the entry is overwritten on store()
+        if not _same_identity((device, inode), (stat_result.st_dev, stat_result.st_ino)):
+            return None  # Another file now sits at this path
+        return digest
+
+    def store(self, path, stat_result, digest, algorithm="sha256"):
+        """Record the digest of path as of stat_result."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO hashes (path, algorithm, device, inode, size, mtime_ns, digest) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._key_path(path), algorithm, stat_result.st_dev, stat_result.st_ino,
+                 stat_result.st_size, stat_result.st_mtime_ns, digest)
+            )
+            self._pending += 1
+            if self._pending >= COMMIT_INTERVAL:
+                self._conn.commit()
+                self._pending = 0
+
+    def get_or_compute(self, path, hash_func, algorithm="sha256", stat_result=None):
+        """Return the digest of path, calling hash_func(path) only if the cache has no valid entry."""
+        if stat_result is None:
+            stat_result = os.stat(path)
+        digest = self.lookup(path, stat_result, algorithm)
+        if digest is None:
+            digest = hash_func(path)
+            self.store(path, stat_result, digest, algorithm)
+        return digest
+
+    def prune(self, folder, seen_paths, exts=None):
+        """
+        Delete entries under folder whose paths were not seen during the latest scan.
+
+        exts limits pruning to files with those (lowercase, dotted) extensions, for scans that
+        only looked at some file types; entries of other types are left alone.
+        """
+        prefix = os.path.join(self._key_path(folder), "")
+        seen = {self._key_path(p) for p in seen_paths}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT path FROM hashes WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix)
+            ).fetchall()
+            stale = [(path,) for (path,) in rows
+                     if path not in seen and (exts is None or os.path.splitext(path)[1].lower() in exts)]
+            if stale:
+                self._conn.executemany("DELETE FROM hashes WHERE path = ?", stale)
+                self._conn.commit()
+                self._pending = 0
+        return len(stale)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
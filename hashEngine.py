@@ -0,0 +1,309 @@
+import os
+import sys
+import mmap
+import hashlib
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Worker threads used for hashing; hashlib releases the GIL so threads overlap reads and hashing
+DEFAULT_WORKERS = int(os.environ.get("FILETOOLS_HASH_WORKERS", min(16, (os.cpu_count() or 1) + 4)))
+
+# Default number of queued/running hash jobs per worker before the producer is throttled
+IN_FLIGHT_PER_WORKER = 4
+
+DEFAULT_BLOCK_SIZE = 65536
+
+# I/O backends for hash_file: plain buffered reads, zero-copy slices of a memory map, or
+# page-cache-bypassing O_DIRECT reads into an aligned buffer (Linux only)
+IO_STRATEGIES = ("buffered", "mmap", "direct")
+DEFAULT_IO_STRATEGY = os.environ.get("FILETOOLS_IO_STRATEGY", "buffered")
+
+# Files smaller than this are always read buffered; mapping them costs more than it saves
+MMAP_MIN_SIZE = 4 * 1024 * 1024
+
+# Size of each memoryview slice handed to hashlib from a memory map
+MMAP_CHUNK_SIZE = 16 * 1024 * 1024
+
+# O_DIRECT requires offsets, lengths and buffer addresses aligned to the logical block size
+DIRECT_ALIGNMENT = 4096
+
+HashResult = namedtuple("HashResult", ["path", "size", "digest"])
+
+
+def _xxh3_128():
+    import xxhash
+    return xxhash.xxh3_128()
+
+
+def _blake3():
+    from blake3 import blake3
+    return blake3(max_threads=1)
+
+
+# Hash algorithms selectable by name. xxh3_128 and blake3 are much faster than SHA-256 and are
+# meant for candidate grouping; they need the optional xxhash / blake3 packages.
+HASH_ALGORITHMS = {
+    "sha256": hashlib.sha256,
+    "blake2b": hashlib.blake2b,
+    "xxh3_128": _xxh3_128,
+    "blake3": _blake3,
+}
+
+# Algorithms strong enough that a match needs no further confirmation before deleting anything
+CRYPTOGRAPHIC_ALGORITHMS = {"sha256", "blake2b", "blake3"}
+
+CONFIRM_ALGORITHM = "sha256"
+
+
+def new_hasher(algorithm):
+    """Return a new hash object for a registered algorithm or any name hashlib.new() accepts."""
+    factory = HASH_ALGORITHMS.get(algorithm)
+    if factory is not None:
+        return factory()
+    return hashlib.new(algorithm)
+
+
+def available_algorithms():
+    """Return the registered algorithm names whose backing packages are installed."""
+    names = []
+    for name, factory in HASH_ALGORITHMS.items():
+        try:
+            factory()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def needs_confirmation(algorithm):
+    return algorithm not in CRYPTOGRAPHIC_ALGORITHMS and algorithm not in hashlib.algorithms_guaranteed
+
+# One read buffer per thread and block size, reused for every file that thread hashes
+_buffers = threading.local()
+
+
+def _read_buffer(block_size):
+    views = getattr(_buffers, "views", None)
+    if views is None:
+        views = _buffers.views = {}
+    view = views.get(block_size)
+    if view is None:
+        view = views[block_size] = memoryview(bytearray(block_size))
+    return view
+
+
+def _aligned_buffer(block_size):
+    # Anonymous maps are page aligned, which satisfies O_DIRECT's buffer alignment
+    buffers = getattr(_buffers, "aligned", None)
+    if buffers is None:
+        buffers = _buffers.aligned = {}
+    buf = buffers.get(block_size)
+    if buf is None:
+        buf = buffers[block_size] = mmap.mmap(-1, block_size)
+    return buf
+
+
+def _hash_buffered(f, hasher, block_size):
+    view = _read_buffer(block_size)
+    while n := f.readinto(view):
+        hasher.update(view[:n])
+
+
+def _hash_mmap(f, hasher, file_size):
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        with memoryview(mm) as view:
+            for offset in range(0, file_size, MMAP_CHUNK_SIZE):
+                hasher.update(view[offset:offset + MMAP_CHUNK_SIZE])
+
+
+def _hash_direct(filepath, hasher, block_size):
+    """Hash with O_DIRECT reads, returning False if the platform or filesystem does not support it."""
+    if not hasattr(os, "O_DIRECT"):
+        return False
+    block_size = max(DIRECT_ALIGNMENT, block_size - block_size % DIRECT_ALIGNMENT)
+    try:
+        fd = os.open(filepath, os.O_RDONLY | os.O_DIRECT)
+    except OSError:
+        return False  # e.g. EINVAL on tmpfs and some network filesystems
+    try:
+        buf = _aligned_buffer(block_size)
+        with memoryview(buf) as view:
+            while n := os.readv(fd, [buf]):
+                hasher.update(view[:n])
+    finally:
+        os.close(fd)
+    return True
+
+
+def hash_file(filepath, algorithm="sha256", block_size=DEFAULT_BLOCK_SIZE, io_strategy=DEFAULT_IO_STRATEGY):
+    """
+    Calculate the hex digest of a file, streaming it through a reusable buffer.
+
+    Memory use is bounded by block_size regardless of file size: chunks are read with
+    readinto() into a per-thread buffer, so no new bytes object is allocated per read.
+    io_strategy selects "buffered", "mmap" or "direct" reads; files below MMAP_MIN_SIZE
+    and platforms without the chosen backend fall back to buffered reads.
+    """
+    if io_strategy not in IO_STRATEGIES:
+        raise ValueError(f"Unknown I/O strategy '{io_strategy}', expected one of {', '.join(IO_STRATEGIES)}")
+    hasher = new_hasher(algorithm)
+    with open(filepath, "rb", buffering=0) as f:
+        if io_strategy != "buffered":
+            file_size = os.fstat(f.fileno()).st_size
+            if file_size >= MMAP_MIN_SIZE:
+                if io_strategy == "mmap":
+                    _hash_mmap(f, hasher, file_size)
+                    return hasher.hexdigest()
+                if _hash_direct(filepath, hasher, block_size):
+                    return hasher.hexdigest()
+        _hash_buffered(f, hasher, block_size)
+    return hasher.hexdigest()
+
+
+def peak_memory():
+    """Return the peak resident memory of this process in bytes, or None if it cannot be determined."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            get_process_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+            get_process_memory_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS),
+                                                wintypes.DWORD]
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if not get_process_memory_info(handle, ctypes.byref(counters), counters.cb):
+                return None
+            return counters.PeakWorkingSetSize
+
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError, AttributeError):
+        return None
+
+
+def format_bytes(num_bytes):
+    """Return a human readable size such as '12.3 MiB'."""
+    if num_bytes is None:
+        return "unknown"
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if num_bytes < 1024 or unit == "GiB":
+            return f"{num_bytes:.1f} {unit}" if unit != "B" else f"{num_bytes} B"
+        num_bytes /= 1024
+
+
+def _hash_one(item, algorithm, block_size, io_strategy, cache, hash_func):
+    if isinstance(item, tuple):
+        filepath, stat_result = item
+    else:
+        filepath, stat_result = item, os.stat(item)
+
+    if hash_func is not None:
+        digest = hash_func(filepath, stat_result)
+    elif cache is not None:
+        digest = cache.get_or_compute(
+            filepath,
+            lambda path: hash_file(path, algorithm, block_size, io_strategy),
+            algorithm=algorithm,
+            stat_result=stat_result
+        )
+    else:
+        digest = hash_file(filepath, algorithm, block_size, io_strategy)
+    return HashResult(filepath, stat_result.st_size, digest)
+
+
+def hash_files(paths, workers=DEFAULT_WORKERS, max_in_flight=None, ordered=False, algorithm="sha256",
+               block_size=DEFAULT_BLOCK_SIZE, io_strategy=DEFAULT_IO_STRATEGY, cache=None, hash_func=None,
+               on_error=None):
+    """
+    Hash many files on a bounded thread pool, yielding HashResult(path, size, digest).
+
+    paths may contain plain paths or (path, stat_result) tuples when the caller has already
+    stat'ed the files. At most max_in_flight jobs are queued at once, so memory stays flat no
+    matter how long paths is. Results are yielded in input order when ordered is True,
+    otherwise as soon as they complete. io_strategy is passed through to hash_file.
+
+    hash_func(path, stat_result) replaces the default full-content hash (the cache is then not
+    used). Files that fail to hash are skipped and reported to on_error(path, exception).
+    """
+    if max_in_flight is None:
+        max_in_flight = max(1, workers) * IN_FLIGHT_PER_WORKER
+
+    def finish(future):
+        try:
+            return future.result()
+        except Exception as e:
+            if on_error is not None:
+                on_error(future.path, e)
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = deque() if ordered else set()
+        for item in paths:
+            future = executor.submit(_hash_one, item, algorithm, block_size, io_strategy, cache, hash_func)
+            future.path = item[0] if isinstance(item, tuple) else item
+            if ordered:
+                pending.append(future)
+                while len(pending) >= max_in_flight:
+                    result = finish(pending.popleft())
+                    if result is not None:
+                        yield result
+            else:
+                pending.add(future)
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = finish(future)
+                        if result is not None:
+                            yield result
+
+        if ordered:
+            while pending:
+                result = finish(pending.popleft())
+                if result is not None:
+                    yield result
+        else:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = finish(future)
+                    if result is not None:
+                        yield result
+
+
+def confirm_groups(groups, algorithm=CONFIRM_ALGORITHM, workers=DEFAULT_WORKERS, cache=None,
+                   io_strategy=DEFAULT_IO_STRATEGY, on_error=None):
+    """
+    Re-hash candidate groups with a cryptographic algorithm and split them by the new digest.
+
+    groups is an iterable of path lists that matched under a fast hash. Returns a list of
+    groups whose members have identical digests; groups that shrink to one path are dropped.
+    Only files inside groups are read, so this pass costs nothing for unique files.
+    """
+    groups = [list(group) for group in groups if len(group) > 1]
+    paths = {path for group in groups for path in group}
+    digests = {path: digest for path, _, digest in hash_files(paths, workers=workers, algorithm=algorithm,
+                                                              io_strategy=io_strategy, cache=cache,
+                                                              on_error=on_error)}
+    confirmed = []
+    for group in groups:
+        by_digest = {}
+        for path in group:
+            if path in digests:
+                by_digest.setdefault(digests[path], []).append(path)
+        confirmed.extend(members for members in by_digest.values() if len(members) > 1)
+    return confirmed
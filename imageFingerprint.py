@@ -0,0 +1,166 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from hammingIndex import HammingIndex
+
+# Bits in an image fingerprint; hashes are stored as unsigned integers of this width
+HASH_BITS = 64
+HASH_SIZE = 8
+
+# Maximum Hamming distance between two fingerprints for the images to count as duplicates
+DEFAULT_THRESHOLD = 6
+
+# Worker processes used to decode and fingerprint images, and files handed to a worker per task
+DEFAULT_PROCESSES = int(os.environ.get("FILETOOLS_FINGERPRINT_PROCESSES", os.cpu_count() or 1))
+DEFAULT_CHUNK_SIZE = 64
+
+
+def _load_grayscale(path, size):
+    # Pillow is imported on first use so tools that only match stored fingerprints start faster
+    from PIL import Image
+
+    with Image.open(path) as img:
+        # For JPEGs, draft() lets the decoder downscale by up to 1/8 instead of decoding every pixel
+        img.draft("L", (size[0] * 4, size[1] * 4))
+        return img.convert("L").resize(size, Image.Resampling.BOX)
+
+
+def dhash(path, hash_size=HASH_SIZE):
+    """Return the difference hash of an image: one bit per horizontally adjacent pixel comparison."""
+    img = _load_grayscale(path, (hash_size + 1, hash_size))
+    pixels = img.tobytes()
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+
+def phash(path, hash_size=HASH_SIZE):
+    """Return the DCT-based perceptual hash of an image (requires ImageHash)."""
+    import imagehash
+    from PIL import Image
+
+    with Image.open(path) as img:
+        img.draft("L", (hash_size * 16, hash_size * 16))
+        return int(str(imagehash.phash(img, hash_size=hash_size)), 16)
+
+
+# Fingerprint kinds selectable by name
+FINGERPRINTS = {
+    "dhash": dhash,
+    "phash": phash,
+}
+
+
+def _fingerprint_chunk(paths, kind):
+    """Fingerprint a chunk of files in a worker process, returning compact arrays rather than images."""
+    compute = FINGERPRINTS[kind]
+    indices = array("I")
+    values = array("Q")
+    errors = []
+    for index, path in enumerate(paths):
+        try:
+            values.append(compute(path))
+            indices.append(index)
+        except Exception as e:
+            errors.append((index, f"{type(e).__name__}: {e}"))
+    return indices, values, errors
+
+
+def fingerprint_files(paths, kind="dhash", processes=DEFAULT_PROCESSES, chunk_size=DEFAULT_CHUNK_SIZE,
+                      cancel_event=None):
+    """
+    Yield (path, fingerprint, error) for paths, decoding on a pool of worker processes.
+
+    Files are sent to workers in chunks of chunk_size with at most two chunks queued per
+    worker. Setting cancel_event stops submitting work, cancels queued chunks and returns.
+    error is None on success, otherwise fingerprint is None and error describes the failure.
+    """
+    paths = list(paths)
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    if processes <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            indices, values, errors = _fingerprint_chunk(chunk, kind)
+            yield from _unpack_chunk(chunk, indices, values, errors)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=processes)
+    try:
+        pending = {}
+        next_chunk = 0
+        while next_chunk < len(chunks) or pending:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            while next_chunk < len(chunks) and len(pending) < processes * 2:
+                chunk = chunks[next_chunk]
+                pending[executor.submit(_fingerprint_chunk, chunk, kind)] = chunk
+                next_chunk += 1
+            # Wake up periodically so a cancel request is noticed while chunks are running
+            done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = pending.pop(future)
+                yield from _unpack_chunk(chunk, *future.result())
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _unpack_chunk(chunk, indices, values, errors):
+    for index, value in zip(indices, values):
+        yield chunk[index], value, None
+    for index, error in errors:
+        yield chunk[index], None, error
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+def to_bytes(value):
+    return value.to_bytes(HASH_BITS // 8, "big")
+
+
+def from_bytes(data):
+    return int.from_bytes(data, "big")
+
+
+def find_similar(fingerprints1, fingerprints2=None, threshold=DEFAULT_THRESHOLD):
+    """
+    Yield (path1, path2, distance) for fingerprints within threshold bits of each other.
+
+    With one mapping of {path: fingerprint}, pairs are found within it; with two, only pairs
+    with one path from each side are reported. Identical fingerprints are grouped first and the
+    distinct values are looked up in a multi-index Hamming table instead of compared pairwise.
+    """
+    def group(fingerprints):
+        groups = {}
+        for path, value in fingerprints.items():
+            groups.setdefault(value, []).append(path)
+        return groups
+
+    groups1 = group(fingerprints1)
+    index = HammingIndex(threshold, HASH_BITS)
+    for value in groups1:
+        index.add(value)
+    values = index.values
+
+    if fingerprints2 is None:
+        for a_id, a in enumerate(values):
+            paths = groups1[a]
+            for x in range(len(paths)):
+                for y in range(x + 1, len(paths)):
+                    yield paths[x], paths[y], 0
+            for b_id, distance in index.query(a):
+                if b_id > a_id:
+                    for p1 in paths:
+                        for p2 in groups1[values[b_id]]:
+                            yield p1, p2, distance
+    else:
+        for b, paths2 in group(fingerprints2).items():
+            for a_id, distance in index.query(b):
+                for p1 in groups1[values[a_id]]:
+                    for p2 in paths2:
+                        yield p1, p2, distance
@@ -0,0 +1,399 @@
+import os
+import sqlite3
+import hashlib
+import threading
+from collections import namedtuple
+from hashEngine import hash_files, new_hasher, DEFAULT_WORKERS
+
+# Location of the directory digest manifest; override with the FILETOOLS_TREE_MANIFEST environment variable
+DEFAULT_MANIFEST_PATH = os.environ.get(
+    "FILETOOLS_TREE_MANIFEST",
+    os.path.join(os.path.expanduser("~"), ".fileToolsJason", "tree_manifest.sqlite3")
+)
+
+# Number of writes to buffer before committing to disk
+COMMIT_INTERVAL = 500
+
+# Result of comparing two trees. Paths are relative to the compared roots; moved holds
+# (left path, right path) pairs, errors holds paths that could not be read and skipped_dirs
+# counts the subtrees that were found identical without being descended into.
+TreeDiff = namedtuple("TreeDiff", ["left_only", "right_only", "differing", "moved", "errors", "skipped_dirs"])
+
+
+class TreeNode:
+    """One directory of a scanned tree: its files' stat results, its subdirectories and its digests."""
+
+    __slots__ = ("path", "files", "dirs", "signature", "digest", "file_digests", "errors")
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}  # name -> stat_result
+        self.dirs = {}  # name -> TreeNode
+        self.signature = None  # Hash of the names, sizes and mtimes below this directory
+        self.digest = None  # Merkle digest of the contents below this directory; None if any of it was unreadable
+        self.file_digests = {}  # name -> content digest, filled in only when the files are hashed
+        self.errors = []  # On the root of a built tree, paths below it that could not be read
+
+    def walk(self):
+        """Yield this node and every node below it, parents before children."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.dirs.values())
+
+
+class DigestManifest:
+    """
+    On-disk cache of per-directory Merkle digests.
+
+    Entries are keyed by (path, algorithm) and are only trusted while the directory's signature,
+    a hash of the names, sizes and mtimes of everything below it, still matches. An unchanged
+    subtree therefore gets its digest back without any of its files being read.
+    """
+
+    def __init__(self, db_path=DEFAULT_MANIFEST_PATH):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS directories (
+                path TEXT NOT NULL,
+                algorithm TEXT NOT NULL,
+                signature TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                PRIMARY KEY (path, algorithm)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def _key_path(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def load(self, folder, algorithm="sha256"):
+        """Return {path: (signature, digest)} for folder and every directory below it in one query."""
+        key = self._key_path(folder)
+        prefix = os.path.join(key, "")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, signature, digest FROM directories "
+                "WHERE algorithm = ? AND (path = ? OR substr(path, 1, ?) = ?)",
+                (algorithm, key, len(prefix), prefix)
+            ).fetchall()
+        return {path: (signature, digest) for path, signature, digest in rows}
+
+    def store(self, path, signature, digest, algorithm="sha256"):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO directories (path, algorithm, signature, digest) VALUES (?, ?, ?, ?)",
+                (self._key_path(path), algorithm, signature, digest)
+            )
+            self._pending += 1
+            if self._pending >= COMMIT_INTERVAL:
+                self._conn.commit()
+                self._pending = 0
+
+    def prune(self, folder, seen_paths):
+        """Delete entries under folder whose directories were not seen during the latest scan."""
+        key = self._key_path(folder)
+        prefix = os.path.join(key, "")
+        seen = {self._key_path(p) for p in seen_paths}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT path FROM directories WHERE path = ? OR substr(path, 1, ?) = ?",
+                (key, len(prefix), prefix)
+            ).fetchall()
+            stale = [(path,) for (path,) in rows if path not in seen]
+            if stale:
+                self._conn.executemany("DELETE FROM directories WHERE path = ?", stale)
+                self._conn.commit()
+                self._pending = 0
+        return len(stale)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+
+def scan_tree(root, on_error=None):
+    """Return the TreeNode for root with every file stat'ed once and every signature filled in."""
+    top = TreeNode(root)
+    nodes = []
+    stack = [top]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        try:
+            with os.scandir(node.path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            child = TreeNode(entry.path)
+                            node.dirs[entry.name] = child
+                            stack.append(child)
+                        elif entry.is_file(follow_symlinks=False):
+                            node.files[entry.name] = entry.stat(follow_symlinks=False)
+                    except OSError as e:
+                        if on_error is not None:
+                            on_error(entry.path, e)
+        except OSError as e:
+            if on_error is not None:
+                on_error(node.path, e)
+
+    # Children were appended after their parents, so walking backwards signs every child first
+    for node in reversed(nodes):
+        hasher = hashlib.blake2b(digest_size=16)
+        for name in sorted(node.files):
+            st = node.files[name]
+            hasher.update(f"f\0{name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8", "surrogateescape"))
+        for name in sorted(node.dirs):
+            hasher.update(f"d\0{name}\0{node.dirs[name].signature}\n".encode("utf-8", "surrogateescape"))
+        node.signature = hasher.hexdigest()
+    return top
+
+
+def _hash_into(entries, algorithm, cache, workers, on_error):
+    """Hash the files named by (node, name) entries and store each digest on its node."""
+    owners = {}
+    items = []
+    for node, name in entries:
+        path = os.path.join(node.path, name)
+        owners[path] = (node, name)
+        items.append((path, node.files[name]))
+    for result in hash_files(items, workers=workers, algorithm=algorithm, cache=cache, on_error=on_error):
+        node, name = owners[result.path]
+        node.file_digests[name] = result.digest
+
+
+def ensure_file_digests(nodes, algorithm="sha256", cache=None, workers=DEFAULT_WORKERS, on_error=None):
+    """Hash the files of nodes that have no digest yet, in one pass over a shared thread pool."""
+    entries = [(node, name) for node in nodes for name in node.files if name not in node.file_digests]
+    _hash_into(entries, algorithm, cache, workers, on_error)
+
+
+def match_moves(left, right, algorithm="sha256", cache=None, workers=DEFAULT_WORKERS, on_error=None):
+    """
+    Pair files that left one tree with files that arrived in the other with the same contents.
+
+    left and right are lists of (relative path, path, stat_result, digest or None). Both go into
+    one FileCatalog; only files whose size occurs on both sides are hashed (known digests are
+    reused) and pairs are found by sorting (size, digest) keys, never by comparing entries
+    pairwise. Returns (moved, left_unmatched, right_unmatched); moved holds (left, right) pairs
+    of relative paths.
+    """
+    import numpy as np
+    from fileCatalog import FileCatalog, hash_rows, rows_in_both, group_rows
+
+    catalog = FileCatalog.for_algorithm(algorithm)
+    rels = []
+    known = []
+    for rel, path, st, digest in left + right:
+        row = catalog.add(path, st.st_size, st.st_mtime_ns, st.st_dev, st.st_ino)
+        if digest is not None:
+            catalog.set_digest(row, digest)
+        rels.append(rel)
+        known.append(digest is not None)
+    split = len(left)
+    known = np.array(known, dtype=bool)
+
+    # Only a size present on both sides can be a move, so everything else is never read
+    rows = rows_in_both(catalog, np.arange(len(catalog)), split, use_digest=False)
+    hashed = hash_rows(catalog, rows[~known[rows]], workers=workers, algorithm=algorithm, cache=cache,
+                       on_error=on_error)
+    rows = rows_in_both(catalog, np.union1d(rows[known[rows]], hashed), split)
+
+    moved = []
+    matched = np.zeros(len(catalog), dtype=bool)
+    for group in group_rows(catalog, rows):
+        # Copies are paired in path order; any surplus on either side stays unmatched
+        for src, dest in zip(group[group < split], group[group >= split]):
+            moved.append((rels[src], rels[dest]))
+            matched[src] = matched[dest] = True
+    left_unmatched = [rels[row] for row in np.flatnonzero(~matched[:split])]
+    right_unmatched = [rels[row] for row in np.flatnonzero(~matched[split:]) + split]
+    return moved, left_unmatched, right_unmatched
+
+
+def _merkle_digest(node, algorithm):
+    """
+    Return the digest of a directory whose files and subdirectories are digested, or None.
+
+    A directory holding a file that could not be hashed, or a subdirectory without a digest, has
+    no digest, so neither it nor any directory above it is stored or compared as a whole.
+    """
+    hasher = new_hasher(algorithm)
+    for name in sorted(node.files):
+        digest = node.file_digests.get(name)
+        if digest is None:
+            return None
+        hasher.update(f"f\0{name}\0{node.files[name].st_size}\0{digest}\n".encode("utf-8", "surrogateescape"))
+    for name in sorted(node.dirs):
+        child = node.dirs[name]
+        if child.digest is None:
+            return None
+        hasher.update(f"d\0{name}\0{child.digest}\n".encode("utf-8", "surrogateescape"))
+    return hasher.hexdigest()
+
+
+def build_tree(root, algorithm="sha256", cache=None, manifest=None, workers=DEFAULT_WORKERS, on_error=None):
+    """
+    Scan root and give every directory a Merkle digest built from its files' content hashes.
+
+    A directory whose signature matches the manifest takes its digest from there and nothing
+    below it is hashed. Everything else is hashed through hash_files (and cache, a HashCache),
+    and the new digests are written back to the manifest. Paths that could not be read are
+    listed in the root's errors, and the directories holding them get no digest.
+    """
+    errors = []
+
+    def report(path, e):
+        errors.append(path)
+        if on_error is not None:
+            on_error(path, e)
+
+    top = scan_tree(root, report)
+    known = manifest.load(root, algorithm) if manifest is not None else {}
+
+    stale = []
+    stack = [top]
+    while stack:
+        node = stack.pop()
+        # Subdirectories are checked on their own even below a hit, since a directory missing
+        # from the manifest (say, one that could not be read last time) must still be hashed
+        stack.extend(node.dirs.values())
+        entry = known.get(os.path.normcase(os.path.abspath(node.path)))
+        if entry is not None and entry[0] == node.signature:
+            node.digest = entry[1]
+        else:
+            stale.append(node)
+
+    ensure_file_digests(stale, algorithm, cache, workers, report)
+    # stale lists parents before children, so walking backwards digests every child first
+    for node in reversed(stale):
+        node.digest = _merkle_digest(node, algorithm)
+        if node.digest is not None and manifest is not None:
+            manifest.store(node.path, node.signature, node.digest, algorithm)
+    top.errors = errors
+    if manifest is not None:
+        manifest.prune(root, (node.path for node in top.walk()))
+    return top
+
+
+def _join(rel, name):
+    return os.path.join(rel, name) if rel else name
+
+
+def relative_to_roots(path, roots):
+    """
+    Return path relative to whichever of roots contains it, preferring the deepest one.
+
+    A plain prefix test is used rather than os.path.commonpath, which raises ValueError when
+    the roots are on different Windows drives. Paths under none of the roots come back as is.
+    """
+    key = os.path.normcase(os.path.abspath(path))
+    best, best_length = None, -1
+    for root in roots:
+        prefix = os.path.join(os.path.normcase(os.path.abspath(root)), "")
+        if key.startswith(prefix) and len(prefix) > best_length:
+            best, best_length = root, len(prefix)
+    return os.path.relpath(path, best) if best is not None else path
+
+
+def diff_trees(left, right, algorithm="sha256", cache=None, workers=DEFAULT_WORKERS, on_error=None):
+    """
+    Compare two trees from build_tree and return a TreeDiff.
+
+    Subtrees with equal digests are skipped without looking inside them, so only the branches
+    that actually diverge are descended into and have their files' digests loaded.
+    """
+    skipped = 0
+    diverged = []  # (left node, right node, relative path) of directories that differ
+    left_only_nodes = []  # (node, relative path) of directories that exist on one side only
+    right_only_nodes = []
+    pairs = [(left, right, "")]
+    while pairs:
+        lnode, rnode, rel = pairs.pop()
+        if lnode.digest is not None and lnode.digest == rnode.digest:
+            skipped += 1
+            continue
+        diverged.append((lnode, rnode, rel))
+        for name, child in lnode.dirs.items():
+            other = rnode.dirs.get(name)
+            if other is not None:
+                pairs.append((child, other, _join(rel, name)))
+            else:
+                left_only_nodes.append((child, _join(rel, name)))
+        for name, child in rnode.dirs.items():
+            if name not in lnode.dirs:
+                right_only_nodes.append((child, _join(rel, name)))
+
+    def one_sided(pairs_of_nodes):
+        found = []
+        for top, top_rel in pairs_of_nodes:
+            rels = {top.path: top_rel}
+            for node in top.walk():
+                node_rel = rels[node.path]
+                for name, child in node.dirs.items():
+                    rels[child.path] = _join(node_rel, name)
+                found.extend((node, name, _join(node_rel, name)) for name in node.files)
+        return found
+
+    left_only = one_sided(left_only_nodes)
+    right_only = one_sided(right_only_nodes)
+    for lnode, rnode, rel in diverged:
+        left_only.extend((lnode, name, _join(rel, name)) for name in lnode.files if name not in rnode.files)
+        right_only.extend((rnode, name, _join(rel, name)) for name in rnode.files if name not in lnode.files)
+
+    errors = [relative_to_roots(path, (left.path, right.path)) for path in left.errors + right.errors]
+
+    def report(path, e):
+        errors.append(relative_to_roots(path, (left.path, right.path)))
+        if on_error is not None:
+            on_error(path, e)
+
+    # Files present on both sides only need reading when their sizes match
+    same_size = []
+    for lnode, rnode, rel in diverged:
+        for name, st in lnode.files.items():
+            other = rnode.files.get(name)
+            if other is not None and st.st_size == other.st_size:
+                same_size.extend((node, name) for node in (lnode, rnode) if name not in node.file_digests)
+    _hash_into(same_size, algorithm, cache, workers, report)
+
+    differing = []
+    for lnode, rnode, rel in diverged:
+        for name, st in lnode.files.items():
+            other = rnode.files.get(name)
+            if other is None:
+                continue
+            if st.st_size != other.st_size:
+                differing.append(_join(rel, name))
+                continue
+            ldigest, rdigest = lnode.file_digests.get(name), rnode.file_digests.get(name)
+            if ldigest is not None and rdigest is not None and ldigest != rdigest:
+                differing.append(_join(rel, name))
+
+    # A file that left one place and reappeared with the same contents elsewhere was moved
+    def entries(found):
+        return [(rel, os.path.join(node.path, name), node.files[name], node.file_digests.get(name))
+                for node, name, rel in found]
+
+    moved, gone, arrived = match_moves(entries(left_only), entries(right_only), algorithm, cache, workers, report)
+    return TreeDiff(sorted(gone), sorted(arrived), sorted(differing), sorted(moved), sorted(set(errors)), skipped)
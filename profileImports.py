@@ -0,0 +1,176 @@
+import os
+import re
+import sys
+import json
+import glob
+import time
+import argparse
+import statistics
+import subprocess
+from collections import namedtuple
+
+# One line of `python -X importtime` output; times are in microseconds and depth is the nesting level
+ImportRecord = namedtuple("ImportRecord", ["module", "self_us", "cumulative_us", "depth"])
+
+# An entry point is a script run as __main__ directly or frozen by a PyInstaller .spec file
+EntryPoint = namedtuple("EntryPoint", ["name", "script", "source"])
+
+DEFAULT_RUNS = 7  # Timed interpreter launches per entry point; the median is compared to the budget
+DEFAULT_TOP = 10  # Slowest modules listed per entry point
+DEFAULT_BUDGET_MS = 250  # Interpreter start plus importing the entry point, before main() runs
+# Entry points with a budget of their own instead of DEFAULT_BUDGET_MS
+STARTUP_BUDGETS_MS = {
+    "visualDuplicatesFinder": 350,  # Tk itself takes a large share of this
+    "deleteFromSecondFolder": 150,  # NumPy and send2trash are only loaded once folders are chosen
+    "duplicatesChildParent": 150,  # NumPy, networkx and matplotlib are only loaded when used
+}
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)\s*$")
+_SPEC_SCRIPTS = re.compile(r"Analysis\(\s*\[([^\]]*)\]")
+
+
+def discover_entry_points(root):
+    """Return the scripts under root with a __main__ block, plus every script named in a .spec file."""
+    entry_points = []
+    for path in sorted(glob.glob(os.path.join(root, "*.py"))):
+        if os.path.basename(path) == os.path.basename(__file__):
+            continue
+        with open(path, encoding="utf-8", errors="replace") as f:
+            if re.search(r"""^if __name__ == ['"]__main__['"]""", f.read(), re.MULTILINE):
+                entry_points.append(EntryPoint(os.path.splitext(os.path.basename(path))[0], path, "script"))
+    for spec in sorted(glob.glob(os.path.join(root, "*.spec"))):
+        with open(spec, encoding="utf-8", errors="replace") as f:
+            match = _SPEC_SCRIPTS.search(f.read())
+        if not match:
+            continue
+        for script in re.findall(r"""['"]([^'"]+)['"]""", match.group(1)):
+            path = os.path.join(root, script)
+            entry_points.append(EntryPoint(os.path.splitext(os.path.basename(script))[0], path,
+                                           os.path.basename(spec)))
+    return entry_points
+
+
+def parse_importtime(stderr):
+    """Parse the `-X importtime` lines of a child's stderr into ImportRecords, in the order printed."""
+    records = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(ImportRecord(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return records
+
+
+def profile_imports(module, cwd, python=sys.executable):
+    """Import module in a fresh interpreter with -X importtime; return (records, error message or None)."""
+    result = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"], cwd=cwd,
+                            capture_output=True, text=True)
+    error = None
+    if result.returncode != 0:
+        lines = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        error = lines[-1] if lines else f"exit code {result.returncode}"
+    return parse_importtime(result.stderr), error
+
+
+def startup_ms(code, cwd, runs=DEFAULT_RUNS, python=sys.executable):
+    """Return the median wall-clock milliseconds of running `python -c code`, after one warm-up run."""
+    # The warm-up run writes any missing .pyc files so they are not charged to the timed runs
+    subprocess.run([python, "-c", code], cwd=cwd, capture_output=True)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([python, "-c", code], cwd=cwd, capture_output=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def budget_for(name, override=None):
+    if override is not None:
+        return override
+    return STARTUP_BUDGETS_MS.get(name, DEFAULT_BUDGET_MS)
+
+
+def profile_entry_point(entry_point, root, runs=DEFAULT_RUNS, top=DEFAULT_TOP, budget_ms=None):
+    """Profile one entry point and return its report as a dict."""
+    report = {"name": entry_point.name, "source": entry_point.source, "script": entry_point.script,
+              "budget_ms": budget_for(entry_point.name, budget_ms)}
+    if not os.path.exists(entry_point.script):
+        report["status"] = "missing"
+        return report
+    records, error = profile_imports(entry_point.name, root)
+    own = [i for i, record in enumerate(records) if record.module == entry_point.name and record.depth == 0]
+    if own:
+        # A module is printed after everything it imported, so its subtree is the run of nested lines before it
+        end = own[-1]
+        start = end
+        while start > 0 and records[start - 1].depth > 0:
+            start -= 1
+        report["import_ms"] = records[end].cumulative_us / 1000
+        children = [record for record in records[start:end] if record.depth == 1]
+    else:
+        # The import failed part way; fall back to everything that did get imported
+        report["import_ms"] = None
+        children = [record for record in records if record.depth == 0 and record.module != "site"]
+    # Direct imports only, so a package is not also counted through its submodules
+    slowest = sorted(children, key=lambda record: record.cumulative_us, reverse=True)[:top]
+    report["slowest"] = [{"module": record.module, "cumulative_ms": record.cumulative_us / 1000,
+                          "self_ms": record.self_us / 1000} for record in slowest]
+    if error is not None:
+        report["status"] = "error"
+        report["error"] = error
+        return report
+    report["startup_ms"] = startup_ms(f"import {entry_point.name}", root, runs)
+    report["status"] = "ok" if report["startup_ms"] <= report["budget_ms"] else "over budget"
+    return report
+
+
+def print_report(reports, baseline_ms):
+    print(f"Bare interpreter start: {baseline_ms:.1f} ms")
+    for report in reports:
+        label = report["name"] if report["source"] == "script" else f"{report['name']} ({report['source']})"
+        if report["status"] == "missing":
+            print(f"\n{label}: script {report['script']} does not exist")
+            continue
+        if report["status"] == "error":
+            print(f"\n{label}: import failed: {report['error']}")
+        else:
+            print(f"\n{label}: {report['startup_ms']:.1f} ms startup (budget {report['budget_ms']} ms), "
+                  f"{report['import_ms']:.1f} ms importing - {report['status']}")
+        for module in report["slowest"]:
+            print(f"  {module['cumulative_ms']:8.1f} ms  {module['module']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Profile the imports of every entry point with -X importtime and check startup budgets.")
+    parser.add_argument("--root", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="Folder holding the scripts and .spec files")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="Profile only these entry points")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Timed launches per entry point")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="Slowest imports listed per entry point")
+    parser.add_argument("--budget-ms", type=float,
+                        help=f"Startup budget for every entry point (default {DEFAULT_BUDGET_MS} ms, "
+                             f"with per-tool exceptions)")
+    parser.add_argument("--json", metavar="PATH", help="Also write the full report as JSON")
+    args = parser.parse_args()
+
+    entry_points = discover_entry_points(args.root)
+    if args.only:
+        entry_points = [entry_point for entry_point in entry_points if entry_point.name in args.only]
+
+    baseline_ms = startup_ms("pass", args.root, args.runs)
+    reports = [profile_entry_point(entry_point, args.root, args.runs, args.top, args.budget_ms)
+               for entry_point in entry_points]
+    print_report(reports, baseline_ms)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"baseline_ms": baseline_ms, "entry_points": reports}, f, indent=2)
+
+    over = [report["name"] for report in reports if report["status"] in ("over budget", "error")]
+    if over:
+        print(f"\nOver budget or failing to import: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
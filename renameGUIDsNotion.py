@@ -1,6 +1,7 @@
 import os
 import re
 import shutil
+from fileIndex import scan
 
 # GUID pattern: space + 32 hex characters
 GUID_REGEX = re.compile(r'(?: ?)([a-fA-F0-9]{32})')
@@ -51,22 +52,23 @@ def rename_files_and_folders(root_dir):
                 os.rename(old_path, new_path)
 
 def fix_markdown_links(root_dir):
-    for dirpath, _, filenames in os.walk(root_dir):
-        for filename in filenames:
-            if filename.endswith('.md'):
-                file_path = os.path.join(dirpath, filename)
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+    for record in scan(root_dir, {'.md'}):
+        file_path = record.path
+        # scan matches extensions case-insensitively; only lowercase .md files are Notion pages
+        if not file_path.endswith('.md'):
+            continue
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
 
-                # Replace %20 + GUID patterns
-                updated_content = re.sub(r'%20[a-fA-F0-9]{32}', '', content)
-                # Also catch plain space + GUID if they somehow got encoded incorrectly
-                updated_content = re.sub(r' ?[a-fA-F0-9]{32}', '', updated_content)
+        # Replace %20 + GUID patterns
+        updated_content = re.sub(r'%20[a-fA-F0-9]{32}', '', content)
+        # Also catch plain space + GUID if they somehow got encoded incorrectly
+        updated_content = re.sub(r' ?[a-fA-F0-9]{32}', '', updated_content)
 
-                if content != updated_content:
-                    print(f"Fixing markdown links in: {file_path}")
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(updated_content)
+        if content != updated_content:
+            print(f"Fixing markdown links in: {file_path}")
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(updated_content)
 
 if __name__ == '__main__':
     import argparse
@@ -0,0 +1,42 @@
+"""
+Stand-in for "exiftool -stay_open True -@ -" used by the ExifTool process tests.
+
+It answers each -executeN with ExifTool's "1 image files updated" on stdout, followed by
+{readyN}, and the -echo4 text on stderr. A file name containing "bad" gets an error on
+stderr instead, "noisy" floods stderr before answering, and "crash" exits without answering.
+"""
+import sys
+
+
+def main():
+    args = []
+    for raw in sys.stdin.buffer:
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if line == "-stay_open":
+            continue
+        if line == "False":
+            return
+        if not line.startswith("-execute"):
+            args.append(line)
+            continue
+        sequence = line[len("-execute"):]
+        echo = args[args.index("-echo4") + 1]
+        path = args[args.index("-echo4") - 1]
+        args = []
+        if "crash" in path:
+            sys.exit(3)
+        if "noisy" in path:
+            sys.stderr.write("Warning: minor problem\n" * 20000)
+        if "bad" in path:
+            sys.stderr.write(f"Error: Not a valid JPG - {path}\n")
+            sys.stdout.write("    0 image files updated\n    1 files weren't updated due to errors\n")
+        else:
+            sys.stdout.write("    1 image files updated\n")
+        sys.stdout.write(f"{{ready{sequence}}}\n")
+        sys.stdout.flush()
+        sys.stderr.write(f"{echo}\n")
+        sys.stderr.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compareTwoDirs import compare_directories
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+
+def _make_pair(tmp_path):
+    left, right = tmp_path / "left", tmp_path / "right"
+    _write(left / "same.txt", b"unchanged")
+    _write(left / "photos" / "a.jpg", b"moved into another folder")
+    _write(left / "notes.txt", b"renamed in place")
+    _write(left / "gone.txt", b"only on the left")
+    _write(right / "same.txt", b"unchanged")
+    _write(right / "archive" / "2020" / "a.jpg", b"moved into another folder")
+    _write(right / "notes-old.txt", b"renamed in place")
+    _write(right / "new.txt", b"only on the right")
+    # Same size as gone.txt but different content, so it must not be taken for a move
+    _write(right / "lookalike.txt", b"only on the lef!")
+    return str(left), str(right)
+
+
+def test_moves_and_renames_are_paired(tmp_path):
+    left, right = _make_pair(tmp_path)
+
+    diff = compare_directories(left, right, workers=1)
+
+    assert diff.moved == sorted([(os.path.join("photos", "a.jpg"), os.path.join("archive", "2020", "a.jpg")),
+                                 ("notes.txt", "notes-old.txt")])
+    assert diff.left_only == ["gone.txt"]
+    assert diff.right_only == ["lookalike.txt", "new.txt"]
+    assert diff.differing == []
+    assert diff.errors == []
+
+
+def test_without_move_detection_one_sided_entries_stay(tmp_path):
+    left, right = _make_pair(tmp_path)
+
+    diff = compare_directories(left, right, detect_moves=False)
+
+    assert diff.moved == []
+    assert diff.left_only == ["gone.txt", "notes.txt", "photos"]
+    assert diff.right_only == ["archive", "lookalike.txt", "new.txt", "notes-old.txt"]
@@ -0,0 +1,45 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deleteFromSecondFolder import PARTIAL_HASH_SIZE, find_duplicates_staged
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+def _large(middle):
+    # Larger than both partial hash windows, with identical head and tail
+    return b"h" * PARTIAL_HASH_SIZE + middle * 1000 + b"t" * PARTIAL_HASH_SIZE
+
+
+def test_same_size_files_differing_only_in_the_middle_are_kept(tmp_path):
+    _write(tmp_path / "a" / "original.bin", _large(b"1"))
+    _write(tmp_path / "a" / "small.txt", b"same small file")
+    different = _write(tmp_path / "b" / "different.bin", _large(b"2"))
+    copy = _write(tmp_path / "b" / "nested" / "copy.bin", _large(b"1"))
+    small_copy = _write(tmp_path / "b" / "small.txt", b"same small file")
+    _write(tmp_path / "b" / "other.txt", b"same small size")
+
+    duplicates, stats = find_duplicates_staged(str(tmp_path / "a"), str(tmp_path / "b"), workers=1)
+
+    assert sorted(duplicates) == sorted([copy, small_copy])
+    assert different not in duplicates
+    # The two large folder2 files share the original's head and tail, so both reach the full hash
+    assert stats["partial_hashed"] == 3
+    assert stats["full_hashed"] == 6
+    assert stats["duplicates"] == 2
+
+
+def test_nothing_in_common(tmp_path):
+    _write(tmp_path / "a" / "one.txt", b"one")
+    _write(tmp_path / "b" / "two.txt", b"two!")
+
+    duplicates, stats = find_duplicates_staged(str(tmp_path / "a"), str(tmp_path / "b"), workers=1)
+
+    assert duplicates == []
+    assert stats["size_candidates"] == 0
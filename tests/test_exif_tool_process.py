@@ -0,0 +1,56 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from exifToolProcess import ExifToolProcess, write_tags
+
+FAKE_EXIFTOOL = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_exiftool.py")]
+
+TAGS = {"DateTimeOriginal": "2020:01:02 03:04:05"}
+
+
+def test_ready_markers_frame_each_command():
+    with ExifToolProcess(FAKE_EXIFTOOL) as exiftool:
+        for name in ("a.jpg", "b.jpg", "c.jpg"):
+            stdout, stderr = exiftool.execute(f"-DateTimeOriginal={TAGS['DateTimeOriginal']}", name)
+            assert stdout.strip() == "1 image files updated"
+            assert stderr == ""
+
+
+def test_errors_are_read_from_stderr():
+    with ExifToolProcess(FAKE_EXIFTOOL) as exiftool:
+        result = exiftool.write_tags("bad.jpg", TAGS)
+        assert not result.ok
+        assert result.message == "Error: Not a valid JPG - bad.jpg"
+        assert exiftool.write_tags("good.jpg", TAGS).ok
+
+
+def test_large_stderr_does_not_stall():
+    with ExifToolProcess(FAKE_EXIFTOOL) as exiftool:
+        result = exiftool.write_tags("noisy.jpg", TAGS)
+        assert result.ok
+        assert result.message.count("Warning") == 20000
+
+
+def test_restarts_after_process_dies():
+    with ExifToolProcess(FAKE_EXIFTOOL) as exiftool:
+        assert exiftool.write_tags("a.jpg", TAGS).ok
+        exiftool._process.kill()
+        exiftool._process.wait()
+        assert exiftool.write_tags("b.jpg", TAGS).ok
+
+
+def test_command_that_kills_exiftool_raises_and_next_one_works():
+    with ExifToolProcess(FAKE_EXIFTOOL) as exiftool:
+        with pytest.raises(OSError):
+            exiftool.write_tags("crash.jpg", TAGS)
+        assert exiftool.write_tags("a.jpg", TAGS).ok
+
+
+def test_write_tags_reports_every_file():
+    paths = ["a.jpg", "bad.jpg", "crash.jpg", "b.jpg", "c.jpg"]
+    results = {result.path: result.ok for result in write_tags(paths, TAGS, FAKE_EXIFTOOL, processes=2)}
+    assert results == {"a.jpg": True, "bad.jpg": False, "crash.jpg": False, "b.jpg": True, "c.jpg": True}
@@ -0,0 +1,100 @@
+import os
+import sys
+import zlib
+import struct
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from exifReader import read_date_original
+from exifWriter import patch_dates
+
+OLD_DATE = "2001:02:03 04:05:06"
+NEW_DATE = "2024:12:31 23:59:58"
+
+
+def _tiff(endian, date=OLD_DATE, count=20, value_offsets=(56, 76)):
+    """A TIFF structure holding only IFD0 -> Exif IFD -> DateTimeOriginal and DateTimeDigitized."""
+    mark = b"II" if endian == "<" else b"MM"
+    data = mark + struct.pack(endian + "HI", 42, 8)
+    data += struct.pack(endian + "H", 1) + struct.pack(endian + "HHII", 0x8769, 4, 1, 26) + struct.pack(endian + "I", 0)
+    data += struct.pack(endian + "H", 2)
+    for tag, offset in zip((0x9003, 0x9004), value_offsets):
+        data += struct.pack(endian + "HHII", tag, 2, count, offset)
+    data += struct.pack(endian + "I", 0)
+    return data + (date.encode("ascii") + b"\x00") * 2
+
+
+def _jpeg(tiff):
+    app1 = b"Exif\x00\x00" + tiff
+    return (b"\xff\xd8" + b"\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1
+            + b"\xff\xda\x00\x02" + b"\x12\x34" * 64 + b"\xff\xd9")
+
+
+def _png_chunk(chunk_type, data):
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+
+def _png(tiff):
+    header = struct.pack(">IIBBBBB", 1, 1, 8, 0, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", header) + _png_chunk(b"eXIf", tiff)
+            + _png_chunk(b"IDAT", zlib.compress(b"\x00\x00")) + _png_chunk(b"IEND", b""))
+
+
+def _changed_bytes(before, after):
+    assert len(before) == len(after)
+    return {i for i, (a, b) in enumerate(zip(before, after)) if a != b}
+
+
+def _date_bytes(data):
+    """Offsets of the two stored date values, terminators included."""
+    first = data.index(OLD_DATE.encode("ascii"))
+    second = data.index(OLD_DATE.encode("ascii"), first + 20)
+    return set(range(first, first + 20)) | set(range(second, second + 20))
+
+
+def _patch(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    ok = patch_dates(str(path), NEW_DATE)
+    return ok, path.read_bytes()
+
+
+@pytest.mark.parametrize("name, data", [
+    ("little.jpg", _jpeg(_tiff("<"))),
+    ("big.jpg", _jpeg(_tiff(">"))),
+    ("little.tif", _tiff("<")),
+    ("big.tif", _tiff(">")),
+], ids=lambda value: value if isinstance(value, str) else "")
+def test_only_the_date_bytes_change(tmp_path, name, data):
+    ok, patched = _patch(tmp_path, name, data)
+    assert ok
+    assert read_date_original(str(tmp_path / name)) == NEW_DATE
+    assert _changed_bytes(data, patched) <= _date_bytes(data)
+
+
+def test_png_exif_chunk_is_patched_with_a_valid_crc(tmp_path):
+    data = _png(_tiff(">"))
+    ok, patched = _patch(tmp_path, "photo.png", data)
+    assert ok
+    assert read_date_original(str(tmp_path / "photo.png")) == NEW_DATE
+    exif_start = data.index(b"eXIf") + 4
+    (length,) = struct.unpack(">I", data[exif_start - 8:exif_start - 4])
+    crc_offset = exif_start + length
+    assert _changed_bytes(data, patched) <= _date_bytes(data) | set(range(crc_offset, crc_offset + 4))
+    (crc,) = struct.unpack(">I", patched[crc_offset:crc_offset + 4])
+    assert crc == zlib.crc32(patched[exif_start - 4:crc_offset])
+
+
+@pytest.mark.parametrize("name, data", [
+    ("truncated.tif", _tiff("<")[:40]),
+    ("truncated.jpg", _jpeg(_tiff(">"))[:50]),
+    ("past_end.tif", _tiff("<", value_offsets=(56, 90))),
+    ("short_count.tif", _tiff("<", count=19)),
+    ("outside_segment.jpg", _jpeg(_tiff(">", value_offsets=(56, 200)))),
+], ids=lambda value: value if isinstance(value, str) else "")
+def test_corrupt_files_are_refused_and_left_untouched(tmp_path, name, data):
+    ok, patched = _patch(tmp_path, name, data)
+    assert not ok
+    assert patched == data
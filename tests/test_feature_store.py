@@ -0,0 +1,58 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from featureStore import FeatureStore
+import imageFingerprint
+import videoFingerprint
+from videoFingerprint import fingerprint_kind
+
+
+def _touch(path, data=b"x"):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def test_image_scan_keeps_video_fingerprints(tmp_path):
+    image = _touch(tmp_path / "photo.jpg")
+    video = _touch(tmp_path / "clip.mp4")
+    video_kind = fingerprint_kind()
+    with FeatureStore(str(tmp_path / "features.sqlite3")) as store:
+        store.store(image, os.stat(image), "dhash", imageFingerprint.to_bytes(1))
+        store.store(video, os.stat(video), video_kind, videoFingerprint.to_bytes((2, 3)))
+
+        # An image scan only sees the image, then prunes its own kind
+        assert store.prune(str(tmp_path), [image], "dhash") == 0
+        cached, todo, stats = store.split_cached([video], video_kind, videoFingerprint.from_bytes)
+        assert cached == {video: (2, 3)}
+        assert not todo
+
+        # A video scan that no longer finds the clip drops only the video entry
+        assert store.prune(str(tmp_path), [], video_kind) == 1
+        assert store.split_cached([video], video_kind, videoFingerprint.from_bytes)[1]
+        assert store.split_cached([image], "dhash", imageFingerprint.from_bytes)[0] == {image: 1}
+
+
+def test_prune_without_kind_drops_every_kind(tmp_path):
+    image = _touch(tmp_path / "photo.jpg")
+    with FeatureStore(str(tmp_path / "features.sqlite3")) as store:
+        store.store(image, os.stat(image), "dhash", imageFingerprint.to_bytes(1))
+        store.store(image, os.stat(image), "phash", imageFingerprint.to_bytes(1))
+        assert store.prune(str(tmp_path), []) == 1
+        assert store.load_kind("dhash") == {} and store.load_kind("phash") == {}
+
+
+def test_prune_commits_its_deletes(tmp_path):
+    image = _touch(tmp_path / "photo.jpg")
+    db_path = str(tmp_path / "features.sqlite3")
+    for kind in (None, "dhash"):
+        with FeatureStore(db_path) as store:
+            store.store(image, os.stat(image), "dhash", imageFingerprint.to_bytes(1))
+        store = FeatureStore(db_path)
+        assert store.prune(str(tmp_path), [], kind) == 1
+        # A second connection only sees what the prune committed
+        with FeatureStore(db_path) as other:
+            assert other.load_kind("dhash") == {}
+        store.close()
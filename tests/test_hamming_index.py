@@ -0,0 +1,58 @@
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hammingIndex import HammingIndex
+from imageFingerprint import find_similar
+
+
+def _fingerprints(seed, count=400, bits=64):
+    """Random fingerprints plus near copies of some of them, so every distance gets exercised."""
+    rng = random.Random(seed)
+    values = [rng.getrandbits(bits) for _ in range(count)]
+    for value in values[:count // 2]:
+        copy = value
+        for _ in range(rng.randint(0, 14)):
+            copy ^= 1 << rng.randrange(bits)
+        values.append(copy)
+    return values
+
+
+def _brute_force(values, query, threshold, removed=()):
+    return sorted((value_id, (query ^ value).bit_count()) for value_id, value in enumerate(values)
+                  if value_id not in removed and (query ^ value).bit_count() <= threshold)
+
+
+def test_radius_query_matches_brute_force():
+    values = _fingerprints(1)
+    for threshold, chunks in ((0, 4), (5, 4), (10, 4), (12, 8)):
+        index = HammingIndex(threshold, 64, chunks)
+        for value in values:
+            index.add(value)
+        for query in values[::7]:
+            assert sorted(index.query(query)) == _brute_force(values, query, threshold)
+
+
+def test_removed_values_are_not_returned():
+    values = _fingerprints(2, count=100)
+    index = HammingIndex(10)
+    for value in values:
+        index.add(value)
+    removed = set(range(0, len(values), 3))
+    for value_id in removed:
+        index.remove(value_id)
+    assert len(index) == len(values)
+    for query in values:
+        assert sorted(index.query(query)) == _brute_force(values, query, 10, removed)
+
+
+def test_find_similar_matches_all_pairs():
+    values = _fingerprints(3, count=150)
+    fingerprints = {f"img{i}.jpg": value for i, value in enumerate(values)}
+    fingerprints["copy.jpg"] = values[0]
+    expected = {frozenset((a, b)) for (a, x) in fingerprints.items() for (b, y) in fingerprints.items()
+                if a < b and (x ^ y).bit_count() <= 10}
+    found = {frozenset((a, b)) for a, b, _ in find_similar(fingerprints, threshold=10)}
+    assert found == expected
@@ -0,0 +1,48 @@
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from hammingMatcher import _popcount64_table, popcount64, pack_fingerprints, match_blocked, find_similar_between
+
+
+def _values(seed, count):
+    rng = random.Random(seed)
+    values = [rng.getrandbits(64) for _ in range(count)]
+    # Near copies of the first few, so there is something inside the threshold
+    values += [value ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for value in values[:count // 4]]
+    return values
+
+
+def test_popcount_matches_python():
+    values = [0, 1, (1 << 64) - 1, 0x8000000000000000] + _values(1, 200)
+    packed = pack_fingerprints(values)
+    expected = [value.bit_count() for value in values]
+    assert popcount64(packed).tolist() == expected
+    assert _popcount64_table(packed).tolist() == expected
+
+
+def test_blocked_match_equals_brute_force_for_any_block_size():
+    query, reference = _values(2, 70), _values(3, 90) + _values(2, 20)
+    expected = sorted((i, j, (q ^ r).bit_count()) for i, q in enumerate(query) for j, r in enumerate(reference)
+                      if (q ^ r).bit_count() <= 12)
+    assert expected
+    for query_block, reference_block in ((1, 1), (7, 13), (256, 16384)):
+        i, j, d = match_blocked(pack_fingerprints(query), pack_fingerprints(reference), 12, query_block,
+                                reference_block)
+        assert sorted(zip(i.tolist(), j.tolist(), d.tolist())) == expected
+
+
+def test_no_matches_gives_empty_arrays():
+    i, j, d = match_blocked(pack_fingerprints([0]), pack_fingerprints([(1 << 64) - 1]), 3)
+    assert len(i) == len(j) == len(d) == 0
+    assert i.dtype == np.intp
+
+
+def test_find_similar_between_names_both_sides():
+    first = {"a.jpg": 0b1111, "b.jpg": 1 << 40}
+    second = {"c.jpg": 0b0111, "d.jpg": (1 << 63) | 0xFFFF}
+    assert list(find_similar_between(first, second, 2)) == [("a.jpg", "c.jpg", 1)]
@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fileCatalog import CatalogStat
+from hashCache import HashCache
+
+
+def test_entries_are_shared_between_stat_shapes(tmp_path):
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"data")
+    st = os.stat(path)
+    # What os.stat, a Windows directory scan and the catalog record for the same file
+    shapes = [
+        st,
+        CatalogStat(0, 0, st.st_size, st.st_mtime_ns),
+        CatalogStat(0, st.st_ino, st.st_size, st.st_mtime_ns),
+    ]
+    with HashCache(str(tmp_path / "cache.sqlite3")) as cache:
+        for stored in shapes:
+            cache.store(str(path), stored, "abc")
+            for looked_up in shapes:
+                assert cache.lookup(str(path), looked_up) == "abc"
+
+
+def test_changed_or_replaced_files_are_stale(tmp_path):
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"data")
+    st = os.stat(path)
+    with HashCache(str(tmp_path / "cache.sqlite3")) as cache:
+        cache.store(str(path), st, "abc")
+        assert cache.lookup(str(path), CatalogStat(st.st_dev, st.st_ino, st.st_size + 1, st.st_mtime_ns)) is None
+        assert cache.lookup(str(path), CatalogStat(st.st_dev, st.st_ino + 1, st.st_size, st.st_mtime_ns)) is None
+        assert cache.lookup(str(path), CatalogStat(st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)) == "abc"
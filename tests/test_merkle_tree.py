@@ -0,0 +1,69 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hashEngine
+from merkleTree import DigestManifest, build_tree, diff_trees
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _make_tree(root, files):
+    for rel, data in files.items():
+        _write(os.path.join(root, rel), data)
+    return str(root)
+
+
+def _lock_files(monkeypatch, *names):
+    """Make files with these names fail to hash, like files the user may not read."""
+    real_hash_file = hashEngine.hash_file
+
+    def hash_file(path, *args, **kwargs):
+        if os.path.basename(path) in names:
+            raise PermissionError(13, "Permission denied", path)
+        return real_hash_file(path, *args, **kwargs)
+
+    monkeypatch.setattr(hashEngine, "hash_file", hash_file)
+
+
+def test_identical_subtrees_are_skipped_and_differences_found(tmp_path):
+    common = {"a/one.txt": b"one", "a/b/two.txt": b"two"}
+    left = _make_tree(tmp_path / "left", {**common, "c/same.txt": b"abc", "gone.txt": b"gone"})
+    right = _make_tree(tmp_path / "right", {**common, "c/same.txt": b"abd", "new.txt": b"new"})
+    diff = diff_trees(build_tree(left), build_tree(right))
+    assert diff.differing == [os.path.join("c", "same.txt")]
+    assert diff.left_only == ["gone.txt"] and diff.right_only == ["new.txt"]
+    assert diff.skipped_dirs == 1
+
+
+def test_unreadable_file_is_reported_and_not_cached(tmp_path, monkeypatch):
+    files = {"sub/ok.txt": b"ok", "sub/locked.txt": b"secret", "top.txt": b"top"}
+    left = _make_tree(tmp_path / "left", files)
+    right = _make_tree(tmp_path / "right", files)
+    _lock_files(monkeypatch, "locked.txt")
+    with DigestManifest(str(tmp_path / "manifest.sqlite3")) as manifest:
+        for _ in range(2):
+            # The second run reads the manifest written by the first
+            left_tree = build_tree(left, manifest=manifest)
+            right_tree = build_tree(right, manifest=manifest)
+            assert left_tree.digest is None and left_tree.dirs["sub"].digest is None
+            diff = diff_trees(left_tree, right_tree)
+            assert diff.errors == [os.path.join("sub", "locked.txt")]
+            assert not diff.differing and not diff.left_only and not diff.right_only
+        stored = manifest.load(left)
+    assert os.path.normcase(os.path.abspath(left)) not in stored
+    assert os.path.normcase(os.path.abspath(os.path.join(left, "sub"))) not in stored
+
+
+def test_different_unreadable_files_do_not_compare_equal(tmp_path, monkeypatch):
+    left = _make_tree(tmp_path / "left", {"d/locked.txt": b"one"})
+    right = _make_tree(tmp_path / "right", {"d/locked.txt": b"two"})
+    _lock_files(monkeypatch, "locked.txt")
+    diff = diff_trees(build_tree(left), build_tree(right))
+    assert diff.skipped_dirs == 0
+    assert diff.errors == [os.path.join("d", "locked.txt")]
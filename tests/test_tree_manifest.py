@@ -0,0 +1,83 @@
+import os
+import sys
+import hashlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from treeManifest import write_manifest, read_manifest, read_manifest_header, diff_manifest
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+
+FILES = {
+    "a-b.txt": b"dash",
+    "a/b.txt": b"slash",
+    "a/z/deep.txt": b"deep",
+    "tab\there.txt": b"tab",
+    "new\nline.txt": b"newline",
+    "back\\slash.txt": b"backslash",
+}
+
+
+def _make_tree(root):
+    for rel, data in FILES.items():
+        _write(root.joinpath(*rel.split("/")), data)
+
+
+def test_round_trip(tmp_path):
+    root = tmp_path / "tree"
+    _make_tree(root)
+    # A manifest kept inside the tree it describes is not listed in itself
+    manifest = root / "tree.manifest.gz"
+
+    assert write_manifest(str(root), str(manifest), workers=1) == len(FILES)
+
+    header, entries = read_manifest(str(manifest))
+    entries = list(entries)
+    assert header == read_manifest_header(str(manifest))
+    assert header["algorithm"] == "sha256"
+    assert header["root"] == os.path.abspath(root)
+    # Sorted by path component, so a/ and its subfolders come before a-b.txt
+    assert [rel for rel, _, _, _ in entries] == ["a/b.txt", "a/z/deep.txt", "a-b.txt", "back\\slash.txt",
+                                                 "new\nline.txt", "tab\there.txt"]
+    for rel, size, mtime_ns, digest in entries:
+        path = root.joinpath(*rel.split("/"))
+        assert size == len(FILES[rel])
+        assert mtime_ns == path.stat().st_mtime_ns
+        assert digest == hashlib.sha256(FILES[rel]).hexdigest()
+
+
+def test_diff_reports_a_moved_file(tmp_path):
+    root = tmp_path / "tree"
+    _make_tree(root)
+    manifest = str(tmp_path / "tree.manifest.gz")
+    write_manifest(str(root), manifest, workers=1)
+
+    os.makedirs(root / "moved")
+    os.replace(root / "a" / "z" / "deep.txt", root / "moved" / "deep.txt")
+    (root / "a" / "b.txt").write_bytes(b"SLASH")
+    (root / "a-b.txt").unlink()
+    _write(root / "added.txt", b"added")
+
+    diff, header = diff_manifest(manifest, str(root), workers=1)
+
+    assert header["algorithm"] == "sha256"
+    assert diff.moved == [("a/z/deep.txt", "moved/deep.txt")]
+    assert diff.differing == ["a/b.txt"]
+    assert diff.left_only == ["a-b.txt"]
+    assert diff.right_only == ["added.txt"]
+    assert diff.errors == []
+
+
+def test_unchanged_tree_has_no_differences(tmp_path):
+    root = tmp_path / "tree"
+    _make_tree(root)
+    manifest = str(root / "tree.manifest.gz")
+    write_manifest(str(root), manifest, workers=1)
+
+    diff, _ = diff_manifest(manifest, str(root), workers=1)
+
+    assert diff.moved == diff.differing == diff.left_only == diff.right_only == diff.errors == []
@@ -0,0 +1,162 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from fileIndex import IMAGE_EXTS, VIDEO_EXTS
+
+THUMBNAIL_SIZE = (250, 250)
+
+# Thumbnails are kept on disk here, keyed by path, size and mtime, so they survive restarts
+DEFAULT_THUMBNAIL_DIR = os.environ.get(
+    "FILETOOLS_THUMBNAIL_CACHE",
+    os.path.join(os.path.expanduser("~"), ".fileToolsJason", "thumbnails")
+)
+
+# Upper bound on decoded thumbnail pixels held in memory
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+
+DEFAULT_WORKERS = 4
+
+
+def _image_bytes(img):
+    return img.width * img.height * len(img.getbands())
+
+
+def decode_thumbnail(path, size=THUMBNAIL_SIZE):
+    """Decode a downscaled preview of an image or the first frame of a video, or return None."""
+    from PIL import Image
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext in IMAGE_EXTS:
+        with Image.open(path) as img:
+            # For JPEGs, draft() makes the decoder scale by 1/2, 1/4 or 1/8 while decoding
+            img.draft("RGB", size)
+            img.thumbnail(size)
+            return img.convert("RGB") if img.mode not in ("RGB", "RGBA", "L") else img.copy()
+    if ext in VIDEO_EXTS:
+        import cv2
+        cap = cv2.VideoCapture(path)
+        try:
+            success, frame = cap.read()
+        finally:
+            cap.release()
+        if success:
+            # Convert BGR to RGB and then to PIL
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            img = Image.fromarray(frame)
+            img.thumbnail(size)
+            return img
+    return None
+
+
+class ThumbnailCache:
+    """
+    Thumbnail loader with a background thread pool, an in-memory LRU bounded by decoded bytes and
+    an on-disk cache. Returns PIL images; turning them into PhotoImages is left to the Tk thread.
+
+    The memory LRU is keyed by path and remembers the size and mtime each image was made from.
+    Files are only stat'ed on the worker threads, which reload a thumbnail whose file changed,
+    so a slow network share never stalls the Tk thread.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_THUMBNAIL_DIR, max_bytes=DEFAULT_MEMORY_BYTES, workers=DEFAULT_WORKERS,
+                 size=THUMBNAIL_SIZE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.size = size
+        self._memory = OrderedDict()  # absolute path -> (image, nbytes, size, mtime_ns)
+        self._memory_bytes = 0
+        self._pending = {}  # absolute path -> Future
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(f"{key[0]}|{key[1]}|{key[2]}|{self.size}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + ".jpg")
+
+    def _remember(self, key, img):
+        key_path, size, mtime_ns = key
+        nbytes = _image_bytes(img)
+        with self._lock:
+            if key_path in self._memory:
+                self._memory_bytes -= self._memory.pop(key_path)[1]
+            self._memory[key_path] = (img, nbytes, size, mtime_ns)
+            self._memory_bytes += nbytes
+            while self._memory_bytes > self.max_bytes and len(self._memory) > 1:
+                _, (_, evicted, _, _) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted
+
+    def _lookup_memory(self, key_path, size=None, mtime_ns=None):
+        with self._lock:
+            entry = self._memory.get(key_path)
+            if entry is None or (size is not None and entry[2:] != (size, mtime_ns)):
+                return None
+            self._memory.move_to_end(key_path)
+            return entry[0]
+
+    def _load(self, path):
+        from PIL import Image
+
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        img = self._lookup_memory(*key)
+        if img is not None:
+            return img
+
+        disk_path = self._disk_path(key)
+        img = None
+        if os.path.exists(disk_path):
+            try:
+                with Image.open(disk_path) as cached:
+                    img = cached.copy()
+            except OSError:
+                img = None
+        if img is None:
+            img = decode_thumbnail(path, self.size)
+            if img is not None:
+                try:
+                    os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+                    img.convert("RGB").save(disk_path, "JPEG", quality=85)
+                except OSError as e:
+                    print(f"Thumbnail cache write error: {e}")
+        if img is not None:
+            self._remember(key, img)
+        return img
+
+    def _finish(self, key_path, future):
+        with self._lock:
+            if self._pending.get(key_path) is future:
+                del self._pending[key_path]
+
+    def get(self, path):
+        """Return the thumbnail last loaded for path if it is in memory, otherwise None, without touching the disk."""
+        return self._lookup_memory(os.path.abspath(path))
+
+    def request(self, path):
+        """
+        Return a Future resolving to the thumbnail (or None), loaded in the background.
+
+        The worker checks the file's size and mtime, so an up-to-date thumbnail in memory is
+        returned without decoding and one for a changed file is replaced.
+        """
+        key_path = os.path.abspath(path)
+        with self._lock:
+            future = self._pending.get(key_path)
+            if future is not None:
+                return future
+            future = self._executor.submit(self._load, path)
+            self._pending[key_path] = future
+        future.add_done_callback(lambda f: self._finish(key_path, f))
+        return future
+
+    def prefetch(self, paths):
+        """Start loading, or re-checking, thumbnails that are likely to be viewed next."""
+        for path in paths:
+            self.request(path)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,207 @@
+import os
+import re
+import gzip
+from collections import deque
+from hashEngine import hash_files, DEFAULT_WORKERS
+from merkleTree import TreeDiff, match_moves, relative_to_roots
+
+# First line of every manifest; the version changes if the line format does
+MANIFEST_MAGIC = "# fileToolsJason manifest v1"
+
+# gzip level used when writing; manifests are written once and read many times
+COMPRESS_LEVEL = 6
+
+_ESCAPES = {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"}
+_UNESCAPES = {value: key for key, value in _ESCAPES.items()}
+_ESCAPED = re.compile(r"\\[\\tnr]")
+
+
+def _escape(text):
+    for char, escaped in _ESCAPES.items():
+        text = text.replace(char, escaped)
+    return text
+
+
+def _unescape(text):
+    return _ESCAPED.sub(lambda match: _UNESCAPES[match.group(0)], text) if "\\" in text else text
+
+
+def order_key(rel):
+    """Sort key of a manifest path: component by component, so a folder's files stay together."""
+    return rel.split("/")
+
+
+def _sorted_entries(path, on_error):
+    try:
+        with os.scandir(path) as entries:
+            return iter(sorted(entries, key=lambda entry: entry.name))
+    except OSError as e:
+        if on_error is not None:
+            on_error(path, e)
+        return iter(())
+
+
+def walk_sorted(root, on_error=None, skip=None):
+    """
+    Yield (relative path, path, stat_result) for every file under root in manifest order.
+
+    Relative paths use "/" on every platform. Only the directories on the current branch are
+    held in memory, so a walk of any size needs memory for the largest single directory.
+    skip is a file left out of the walk, such as a manifest kept inside root.
+    """
+    skip_rel = None
+    if skip is not None:
+        skip = os.path.abspath(skip)
+        rel = relative_to_roots(skip, [root])
+        skip_rel = os.path.normcase(rel) if rel != skip else None
+    stack = [("", _sorted_entries(root, on_error))]
+    while stack:
+        rel_dir, entries = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append((rel, _sorted_entries(entry.path, on_error)))
+            elif entry.is_file(follow_symlinks=False):
+                if skip_rel is not None and os.path.normcase(rel) == skip_rel:
+                    continue
+                yield rel, entry.path, entry.stat(follow_symlinks=False)
+        except OSError as e:
+            if on_error is not None:
+                on_error(entry.path, e)
+
+
+def write_manifest(root, manifest_path, algorithm="sha256", cache=None, workers=DEFAULT_WORKERS, on_error=None):
+    """
+    Hash every file under root and write a gzip-compressed manifest to manifest_path.
+
+    Each line holds the relative path, size, mtime_ns and digest of one file, tab separated and
+    sorted by order_key. Files are hashed as the walk reaches them and written in order, so
+    memory does not grow with the size of the tree. Returns the number of files written.
+    """
+    pending = deque()  # (path, relative path, mtime_ns) handed to hash_files and not yet written
+
+    def items():
+        for rel, path, st in walk_sorted(root, on_error, skip=manifest_path):
+            pending.append((path, rel, st.st_mtime_ns))
+            yield path, st
+
+    count = 0
+    with gzip.open(manifest_path, "wt", encoding="utf-8", errors="surrogateescape", newline="\n",
+                   compresslevel=COMPRESS_LEVEL) as f:
+        f.write(f"{MANIFEST_MAGIC}\talgorithm={algorithm}\troot={_escape(os.path.abspath(root))}\n")
+        for result in hash_files(items(), workers=workers, ordered=True, algorithm=algorithm, cache=cache,
+                                 on_error=on_error):
+            # Results come back in walk order; files skipped over failed to hash and are left out
+            path, rel, mtime_ns = pending.popleft()
+            while path != result.path:
+                path, rel, mtime_ns = pending.popleft()
+            f.write(f"{_escape(rel)}\t{result.size}\t{mtime_ns}\t{result.digest}\n")
+            count += 1
+    return count
+
+
+def _open_manifest(manifest_path):
+    """Open a manifest and return (file positioned after the header, header)."""
+    f = gzip.open(manifest_path, "rt", encoding="utf-8", errors="surrogateescape", newline="\n")
+    try:
+        first = f.readline().rstrip("\n").split("\t")
+        if first[0] != MANIFEST_MAGIC:
+            raise ValueError(f"{manifest_path} is not a manifest written by this version")
+    except BaseException:
+        f.close()
+        raise
+    header = dict(field.split("=", 1) for field in first[1:])
+    header["root"] = _unescape(header.get("root", ""))
+    return f, header
+
+
+def read_manifest_header(manifest_path):
+    """Return the header dict of a manifest (see read_manifest) without reading its entries."""
+    f, header = _open_manifest(manifest_path)
+    f.close()
+    return header
+
+
+def read_manifest(manifest_path):
+    """
+    Return (header, entries) for a manifest written by write_manifest.
+
+    header is a dict holding at least "algorithm"; entries is a generator of
+    (relative path, size, mtime_ns, digest) in manifest order, read lazily from the file.
+    """
+    f, header = _open_manifest(manifest_path)
+
+    def entries():
+        with f:
+            previous = None
+            for line in f:
+                rel, size, mtime_ns, digest = line.rstrip("\n").split("\t")
+                rel = _unescape(rel)
+                key = order_key(rel)
+                if previous is not None and key <= previous:
+                    raise ValueError(f"{manifest_path} is not sorted at {rel!r}")
+                previous = key
+                yield rel, int(size), int(mtime_ns), digest
+
+    return header, entries()
+
+
+def diff_manifest(manifest_path, root, cache=None, workers=DEFAULT_WORKERS, on_error=None):
+    """
+    Compare a live tree against a saved manifest and return (TreeDiff, header).
+
+    The manifest is the left side. Both sides are read in manifest order and merged like sorted
+    lists, so memory holds only the differences and the files being hashed; files on both sides
+    are read only when their sizes match. Files found on one side only are then matched with
+    match_moves, using the manifest's digests as they are.
+    """
+    from fileCatalog import CatalogStat
+
+    header, saved = read_manifest(manifest_path)
+    algorithm = header["algorithm"]
+    left_only, right_only, differing, errors = [], [], [], []
+    pending = deque()  # (path, relative path, expected digest) handed to hash_files
+
+    def report(path, e):
+        errors.append(os.path.relpath(path, root))
+        if on_error is not None:
+            on_error(path, e)
+
+    def same_size_files():
+        live = walk_sorted(root, report, skip=manifest_path)
+        left = next(saved, None)
+        right = next(live, None)
+        while left is not None or right is not None:
+            if right is None or (left is not None and order_key(left[0]) < order_key(right[0])):
+                rel, size, mtime_ns, digest = left
+                left_only.append((rel, rel, CatalogStat(0, 0, size, mtime_ns), digest))
+                left = next(saved, None)
+            elif left is None or order_key(right[0]) < order_key(left[0]):
+                right_only.append((right[0], right[1], right[2], None))
+                right = next(live, None)
+            else:
+                rel, path, st = right
+                if st.st_size != left[1]:
+                    differing.append(rel)
+                else:
+                    pending.append((path, rel, left[3]))
+                    yield path, st
+                left = next(saved, None)
+                right = next(live, None)
+
+    for result in hash_files(same_size_files(), workers=workers, ordered=True, algorithm=algorithm, cache=cache,
+                             on_error=report):
+        path, rel, expected = pending.popleft()
+        while path != result.path:
+            path, rel, expected = pending.popleft()
+        if result.digest != expected:
+            differing.append(rel)
+
+    moved, gone, arrived = match_moves(left_only, right_only, algorithm, cache, workers, report)
+    diff = TreeDiff(sorted(gone, key=order_key), sorted(arrived, key=order_key),
+                    sorted(differing, key=order_key), sorted(moved), sorted(errors), 0)
+    return diff, header
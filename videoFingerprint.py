@@ -0,0 +1,136 @@
+from concurrent.futures import ThreadPoolExecutor
+from hammingIndex import HammingIndex
+from imageFingerprint import HASH_BITS, HASH_SIZE
+
+# Frames sampled per video; decoding cost per file is bounded by this, not by the video's duration
+DEFAULT_FRAMES = 8
+
+# Maximum mean Hamming distance per sampled frame for two videos to count as duplicates
+DEFAULT_THRESHOLD = 8
+
+# Threads decoding videos; OpenCV releases the GIL while seeking and decoding
+DEFAULT_WORKERS = 4
+
+FRAME_BYTES = HASH_BITS // 8
+
+
+def _frame_dhash(cv2, frame, hash_size=HASH_SIZE):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = 0
+    for row in small:
+        for col in range(hash_size):
+            bits = (bits << 1) | int(row[col] > row[col + 1])
+    return bits
+
+
+def keyframe_hashes(path, frames=DEFAULT_FRAMES):
+    """
+    Return a tuple of dhashes for frames sampled evenly across a video.
+
+    Each sample is read by seeking to a timestamp, so only the frames near the sample points are
+    decoded. Samples sit at the middle of equal slices of the duration, which keeps them aligned
+    between a video and its re-encoded or remuxed copies.
+    """
+    import cv2
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise OSError(f"cannot open video {path}")
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        if fps <= 0 or frame_count <= 0:
+            raise ValueError(f"unknown duration for {path}")
+        duration_ms = frame_count / fps * 1000
+        hashes = []
+        for i in range(frames):
+            cap.set(cv2.CAP_PROP_POS_MSEC, duration_ms * (i + 0.5) / frames)
+            success, frame = cap.read()
+            if not success:
+                raise ValueError(f"cannot read frame {i + 1} of {frames} from {path}")
+            hashes.append(_frame_dhash(cv2, frame))
+        return tuple(hashes)
+    finally:
+        cap.release()
+
+
+def to_bytes(hashes):
+    return b"".join(value.to_bytes(FRAME_BYTES, "big") for value in hashes)
+
+
+def from_bytes(data):
+    return tuple(int.from_bytes(data[i:i + FRAME_BYTES], "big") for i in range(0, len(data), FRAME_BYTES))
+
+
+def fingerprint_kind(frames=DEFAULT_FRAMES):
+    """Feature store kind for a sampling density, so changing the frame count invalidates old entries."""
+    return f"video_dhash{frames}"
+
+
+def video_fingerprints(store, paths, frames=DEFAULT_FRAMES, workers=DEFAULT_WORKERS, on_error=None,
+                       cancel_event=None):
+    """
+    Return ({path: hashes}, stats) for videos, decoding only files not already in the feature store.
+
+    store is a FeatureStore; stats counts cached, computed and failed files like
+    FeatureStore.fingerprints.
+    """
+    kind = fingerprint_kind(frames)
+    result, todo, stats = store.split_cached(paths, kind, from_bytes, on_error)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="video-fingerprint") as executor:
+        futures = {executor.submit(keyframe_hashes, path, frames): path for path in todo}
+        for future, path in futures.items():
+            if cancel_event is not None and cancel_event.is_set():
+                executor.shutdown(wait=False, cancel_futures=True)
+                break
+            try:
+                hashes = future.result()
+            except Exception as e:
+                stats["failed"] += 1
+                if on_error is not None:
+                    on_error(path, e)
+                continue
+            store.store(path, todo[path], kind, to_bytes(hashes))
+            result[path] = hashes
+            stats["computed"] += 1
+    return result, stats
+
+
+def sequence_distance(a, b):
+    """Mean per-frame Hamming distance between two hash sequences of equal length."""
+    return sum((x ^ y).bit_count() for x, y in zip(a, b)) / len(a)
+
+
+def find_similar_videos(fingerprints1, fingerprints2=None, threshold=DEFAULT_THRESHOLD):
+    """
+    Yield (path1, path2, distance) for videos whose mean frame distance is within threshold.
+
+    Every sampled frame is indexed in a multi-index Hamming table. A pair within a mean distance
+    of threshold must have at least one frame within threshold, so only videos sharing such a
+    frame are compared in full. With two mappings only pairs across them are reported.
+    """
+    paths1 = list(fingerprints1)
+    index = HammingIndex(threshold, HASH_BITS)
+    owners = []
+    for video_id, path in enumerate(paths1):
+        for value in fingerprints1[path]:
+            index.add(value)
+            owners.append(video_id)
+
+    single = fingerprints2 is None
+    queries = fingerprints1 if single else fingerprints2
+    for query_id, path in enumerate(queries):
+        hashes = queries[path]
+        candidates = set()
+        for value in hashes:
+            for frame_id, _ in index.query(value):
+                candidates.add(owners[frame_id])
+        for video_id in sorted(candidates):
+            if single and video_id <= query_id:
+                continue
+            other = fingerprints1[paths1[video_id]]
+            if len(other) != len(hashes):
+                continue
+            distance = sequence_distance(other, hashes)
+            if distance <= threshold:
+                yield paths1[video_id], path, distance
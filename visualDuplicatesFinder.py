@@ -1,68 +1,156 @@
 import os
+import bisect
+import multiprocessing
+import queue
 import threading
-from PIL import Image, ExifTags, ImageTk
 from tkinter import filedialog, messagebox, ttk
 import tkinter as tk
-from send2trash import send2trash
-import cv2
-import difPy
-
-USE_DATE_TAKEN = True
-USE_FILE_SIZE = True
-
-IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tiff"}
-VIDEO_EXTS = {".mp4", ".mov", ".avi", ".mkv", ".webm", ".wmv"}
-
-
-def get_date_taken(path):
-    try:
-        ext = os.path.splitext(path)[1].lower()
-        if ext in {".jpg", ".jpeg", ".png", ".tiff"}:
-            img = Image.open(path)
-            exif = img._getexif()
-            if not exif:
-                return None
-            for tag, value in exif.items():
-                if ExifTags.TAGS.get(tag) == "DateTimeOriginal":
-                    return value
-        else:
-            # Use last modified time as fallback
-            return str(os.path.getmtime(path))
-    except Exception:
-        return None
-
-
-def get_media_files(folder):
-    image_exts = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tiff"}
-    video_exts = {".mp4", ".mov", ".avi", ".mkv", ".webm", ".wmv"}
-
-    files = []
-    for root, _, filenames in os.walk(folder):
-        for fname in filenames:
-            ext = os.path.splitext(fname)[1].lower()
-            if ext in image_exts or ext in video_exts:
-                files.append(os.path.join(root, fname))
-    return files
-
-
-def get_file_info(path):
-    size = os.path.getsize(path)
-    ext = os.path.splitext(path)[1].lower()
-
-    if ext in VIDEO_EXTS:
-        return (size,)  # Only use file size for video
-    elif ext in IMAGE_EXTS:
-        date_taken = get_date_taken(path) if USE_DATE_TAKEN else None
-        return (size, date_taken)
-    else:
-        return (size,)  # Fallback for unknown types
+from hashEngine import available_algorithms
+from thumbnailCache import ThumbnailCache
+from duplicateEngine import (DuplicateScanner, read_results, IMAGE_ENGINES, VIDEO_ENGINES, USE_VIDEO_HASH,
+                             VIDEO_HASH_ALGORITHM)
+
+DELETE_MARK = "🗑️"
+
+RESULT_POLL_MS = 50  # How often the Tk loop drains results produced by the scan thread
+RESULT_BATCH_SIZE = 5000  # Maximum rows moved from the queue into the model per poll
+DEFAULT_ROW_HEIGHT = 20  # Used when the Treeview style does not report a row height
+
+PREVIEW_POLL_MS = 30  # How often the Tk loop checks for thumbnails finished by the preview threads
+PREVIEW_PREFETCH_ROWS = 5  # Rows above and below the selection whose thumbnails are loaded ahead
+
+
+class _Descending:
+    """Sort key wrapper that inverts comparisons, so bisect can search a list sorted in reverse."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+class ResultModel:
+    """
+    Duplicate pairs held outside the Treeview so the view only ever renders the visible rows.
+
+    rows maps iid -> (file1, file2, date, size_str, size_bytes), flags maps iid -> [del1, del2],
+    and view is the list of iids that pass the current filter in the current sort order.
+    """
+
+    SORT_KEYS = {
+        "file1": lambda row: (os.path.dirname(row[0]).lower(), os.path.basename(row[0]).lower()),
+        "file2": lambda row: (os.path.dirname(row[1]).lower(), os.path.basename(row[1]).lower()),
+        "date": lambda row: str(row[2]),
+        "size": lambda row: row[4],
+    }
+
+    FILTER_FIELDS = {
+        "folder": lambda row: os.path.dirname(row[0]) + "\n" + os.path.dirname(row[1]),
+        "date": lambda row: str(row[2]),
+        "size": lambda row: row[3],
+    }
+
+    def __init__(self):
+        self.rows = {}
+        self.flags = {}
+        self.view = []
+        self.sort_column = None
+        self.sort_reverse = False
+        self.filter_field = "folder"
+        self.filter_text = ""
+        self._view_sorted = True
+
+    def clear(self):
+        self.rows.clear()
+        self.flags.clear()
+        self.view = []
+
+    def __len__(self):
+        return len(self.view)
+
+    def _matches(self, row):
+        if not self.filter_text:
+            return True
+        return self.filter_text in self.FILTER_FIELDS[self.filter_field](row).lower()
+
+    def add_rows(self, rows):
+        for row in rows:
+            iid = f"{row[0]}|{row[1]}"
+            if iid in self.rows:
+                continue
+            self.rows[iid] = row
+            self.flags[iid] = [False, False]
+            if not self._matches(row):
+                continue
+            if self.sort_column is None or not self._view_sorted:
+                self.view.append(iid)
+            else:
+                # Rows arriving while a sort is active go straight to their place, instead of
+                # re-sorting the whole view on the next repaint
+                bisect.insort(self.view, iid, key=self._insort_key())
+
+    def _insort_key(self):
+        key = self.SORT_KEYS[self.sort_column]
+        if self.sort_reverse:
+            return lambda iid: _Descending(key(self.rows[iid]))
+        return lambda iid: key(self.rows[iid])
+
+    def ensure_sorted(self):
+        if not self._view_sorted:
+            key = self.SORT_KEYS[self.sort_column]
+            self.view.sort(key=lambda iid: key(self.rows[iid]), reverse=self.sort_reverse)
+            self._view_sorted = True
+
+    def sort(self, column):
+        """Sort by column, toggling the direction when it is already the sort column."""
+        if column not in self.SORT_KEYS:
+            return
+        self.sort_reverse = not self.sort_reverse if column == self.sort_column else False
+        self.sort_column = column
+        self._view_sorted = False
+        self.ensure_sorted()
+
+    def set_filter(self, field, text):
+        self.filter_field = field
+        self.filter_text = text.strip().lower()
+        self.view = [iid for iid, row in self.rows.items() if self._matches(row)]
+        self._view_sorted = self.sort_column is None
+        self.ensure_sorted()
+
+    def window(self, offset, count):
+        self.ensure_sorted()
+        return self.view[offset:offset + count]
+
+    def remove(self, iids):
+        iids = set(iids)
+        for iid in iids:
+            self.rows.pop(iid, None)
+            self.flags.pop(iid, None)
+        self.view = [iid for iid in self.view if iid not in iids]
+
+    def values(self, iid):
+        f1, f2, date, size, _ = self.rows[iid]
+        del1, del2 = self.flags[iid]
+        return f1, f2, date, size, DELETE_MARK if del1 else "", DELETE_MARK if del2 else ""
 
 
 class DuplicateFinderApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Image Duplicate Finder")
+        self.thumbnails = ThumbnailCache()
+        self.cancel_event = threading.Event()
         self.setup_gui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self):
+        # Stops a running scan from queueing more fingerprint work before the window goes away
+        self.cancel_event.set()
+        self.thumbnails.shutdown()
+        self.root.destroy()
 
     def setup_gui(self):
         self.root.geometry("1100x700")
@@ -81,6 +169,7 @@ class DuplicateFinderApp:
         self.folder2_label.grid(row=2, column=0, columnspan=2, sticky="w")
         self.batch_button = tk.Button(top, text="Run Batch Mode", command=self.batch_mode)
         self.batch_button.grid(row=0, column=2)
+        tk.Button(top, text="Load Results", command=self.load_results).grid(row=1, column=2)
 
         self.search_mode = tk.StringVar(value="two_folders")
         mode_frame = tk.Frame(top)
@@ -90,6 +179,27 @@ class DuplicateFinderApp:
         tk.Radiobutton(mode_frame, text="Find duplicates in one folder", variable=self.search_mode,
                        value="single_folder").pack(anchor="w")
 
+        hash_frame = tk.Frame(top)
+        hash_frame.grid(row=0, column=4, padx=10)
+        tk.Label(hash_frame, text="Video hash check:").pack(anchor="w")
+        self.video_hash = tk.StringVar(value=VIDEO_HASH_ALGORITHM if USE_VIDEO_HASH else "off")
+        ttk.Combobox(hash_frame, textvariable=self.video_hash, state="readonly", width=10,
+                     values=["off"] + available_algorithms()).pack(anchor="w")
+
+        video_engine_frame = tk.Frame(top)
+        video_engine_frame.grid(row=0, column=6, padx=10)
+        tk.Label(video_engine_frame, text="Video engine:").pack(anchor="w")
+        self.video_engine = tk.StringVar(value=VIDEO_ENGINES[0])
+        ttk.Combobox(video_engine_frame, textvariable=self.video_engine, state="readonly", width=10,
+                     values=VIDEO_ENGINES).pack(anchor="w")
+
+        engine_frame = tk.Frame(top)
+        engine_frame.grid(row=0, column=5, padx=10)
+        tk.Label(engine_frame, text="Image engine:").pack(anchor="w")
+        self.image_engine = tk.StringVar(value=IMAGE_ENGINES[0])
+        ttk.Combobox(engine_frame, textvariable=self.image_engine, state="readonly", width=10,
+                     values=IMAGE_ENGINES).pack(anchor="w")
+
         # Preview
         self.preview_frame = tk.Frame(self.root)
         self.preview_frame.grid(row=1, column=0, sticky="ew")
@@ -105,15 +215,42 @@ class DuplicateFinderApp:
         self.tree_frame = tk.Frame(self.root)
         self.tree_frame.grid(row=2, column=0, sticky="nsew")
 
+        # Only the visible window of the result model is inserted into the tree; the scrollbar
+        # and mouse wheel move the window instead of scrolling the widget
+        filter_bar = tk.Frame(self.tree_frame)
+        filter_bar.pack(fill=tk.X)
+        tk.Label(filter_bar, text="Filter").pack(side=tk.LEFT)
+        self.filter_field = tk.StringVar(value="folder")
+        ttk.Combobox(filter_bar, textvariable=self.filter_field, state="readonly", width=8,
+                     values=list(ResultModel.FILTER_FIELDS)).pack(side=tk.LEFT)
+        self.filter_text = tk.StringVar()
+        filter_entry = tk.Entry(filter_bar, textvariable=self.filter_text)
+        filter_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        filter_entry.bind("<Return>", self.apply_filter)
+        tk.Button(filter_bar, text="Apply", command=self.apply_filter).pack(side=tk.LEFT)
+        self.count_label = tk.Label(filter_bar, text="")
+        self.count_label.pack(side=tk.RIGHT)
+
+        self.scrollbar = ttk.Scrollbar(self.tree_frame, orient="vertical", command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.tree = ttk.Treeview(self.tree_frame, columns=("file1", "file2", "date", "size", "del1", "del2"),
-                                 show="headings")
+                                 show="headings", selectmode="browse")
         for col in ["file1", "file2", "date", "size", "del1", "del2"]:
-            self.tree.heading(col, text=col)
+            self.tree.heading(col, text=col, command=lambda c=col: self.sort_results(c))
         self.tree.column("del1", width=100, anchor="center")
         self.tree.column("del2", width=100, anchor="center")
         self.tree.pack(fill=tk.BOTH, expand=True)
 
         self.tree.bind("<<TreeviewSelect>>", self.update_preview)
+        self.tree.bind("<Configure>", lambda e: self.render_results())
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_rows(-1 if e.delta > 0 else 1) or "break")
+        self.tree.bind("<Button-4>", lambda e: self.scroll_rows(-3) or "break")
+        self.tree.bind("<Button-5>", lambda e: self.scroll_rows(3) or "break")
+        self.tree.bind("<Up>", lambda e: self.move_selection(-1) or "break")
+        self.tree.bind("<Down>", lambda e: self.move_selection(1) or "break")
+        self.tree.bind("<Prior>", lambda e: self.move_selection(-self.visible_rows()) or "break")
+        self.tree.bind("<Next>", lambda e: self.move_selection(self.visible_rows()) or "break")
+        self.tree.bind("<ButtonRelease-1>", self.on_checkbox_click)
 
         # Select All Checkboxes - replaced with buttons
         bottom = tk.Frame(self.root)
@@ -128,8 +265,12 @@ class DuplicateFinderApp:
 
         self.folder1 = None
         self.folder2 = None
-        self.duplicates = []
-        self.delete_flags = {}
+        self.results = ResultModel()
+        self.result_queue = queue.Queue()
+        self.view_offset = 0
+        self.selected_iid = None
+        self.preview_iid = None
+        self.scan_running = False
 
     def select_folder1(self):
         self.folder1 = filedialog.askdirectory()
@@ -140,26 +281,127 @@ class DuplicateFinderApp:
         self.folder2_label.config(text=f"Folder2: {self.folder2}")
 
     def select_all_folder1(self):
-        for iid in self.delete_flags:
-            self.delete_flags[iid][0] = True
-            self.refresh_tree_item(iid)
+        self.set_all_flags(0, True)
 
     def select_all_folder2(self):
-        for iid in self.delete_flags:
-            self.delete_flags[iid][1] = True
-            self.refresh_tree_item(iid)
+        self.set_all_flags(1, True)
 
     def deselect_all_folder1(self):
-        for iid in self.delete_flags:
-            self.delete_flags[iid][0] = False
-            self.refresh_tree_item(iid)
+        self.set_all_flags(0, False)
 
     def deselect_all_folder2(self):
-        for iid in self.delete_flags:
-            self.delete_flags[iid][1] = False
-            self.refresh_tree_item(iid)
+        self.set_all_flags(1, False)
+
+    def set_all_flags(self, index, value):
+        """Set one delete flag on every row that passes the filter; only the visible rows are redrawn."""
+        for iid in self.results.view:
+            self.results.flags[iid][index] = value
+        self.render_results()
+
+    def add_result(self, f1, f2, date, size, size_bytes):
+        """Queue a result row; safe to call from the scan thread."""
+        self.result_queue.put((f1, f2, date, size, size_bytes))
+
+    def drain_results(self):
+        """Move queued rows into the model in batches on the Tk thread, then redraw the visible window."""
+        rows = []
+        try:
+            while len(rows) < RESULT_BATCH_SIZE:
+                item = self.result_queue.get_nowait()
+                if item is None:
+                    self.scan_running = False
+                    break
+                rows.append(item)
+        except queue.Empty:
+            pass
+
+        if rows:
+            self.results.add_rows(rows)
+            self.render_results()
+
+        if self.scan_running or not self.result_queue.empty():
+            self.root.after(RESULT_POLL_MS, self.drain_results)
+        else:
+            self.batch_button.config(state=tk.NORMAL)
+            self.update_count_label()
+            if not self.results.rows:
+                messagebox.showinfo("No duplicates", "No duplicate files were found.")
+
+    def visible_rows(self):
+        row_height = ttk.Style().lookup("Treeview", "rowheight")
+        try:
+            row_height = int(row_height)
+        except (TypeError, ValueError):
+            row_height = DEFAULT_ROW_HEIGHT
+        # Leave room for the heading row
+        return max(1, self.tree.winfo_height() // row_height - 1)
+
+    def render_results(self):
+        """Show only the rows of the model that fit in the tree at the current offset."""
+        count = self.visible_rows()
+        total = len(self.results)
+        self.view_offset = max(0, min(self.view_offset, total - count))
+        window = self.results.window(self.view_offset, count)
+
+        self.tree.delete(*self.tree.get_children())
+        for iid in window:
+            self.tree.insert("", tk.END, iid=iid, values=self.results.values(iid))
+        if self.selected_iid in window:
+            self.tree.selection_set(self.selected_iid)
+
+        if total:
+            self.scrollbar.set(self.view_offset / total, min(1.0, (self.view_offset + count) / total))
+        else:
+            self.scrollbar.set(0, 1)
+        self.update_count_label()
+
+    def update_count_label(self):
+        status = " (scanning...)" if self.scan_running else ""
+        self.count_label.config(text=f"{len(self.results)} of {len(self.results.rows)} pairs{status}")
+
+    def on_scroll(self, *args):
+        count = self.visible_rows()
+        if args[0] == "moveto":
+            self.view_offset = int(float(args[1]) * len(self.results))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (count if args[2] == "pages" else 1)
+            self.view_offset += step
+        self.render_results()
+
+    def scroll_rows(self, delta):
+        self.view_offset += delta
+        self.render_results()
+
+    def move_selection(self, delta):
+        """Move the selection through the whole model, scrolling the window when it reaches an edge."""
+        if not len(self.results):
+            return
+        self.results.ensure_sorted()
+        try:
+            index = self.results.view.index(self.selected_iid)
+        except ValueError:
+            index = self.view_offset - 1 if delta > 0 else self.view_offset
+        index = max(0, min(len(self.results) - 1, index + delta))
+        count = self.visible_rows()
+        if index < self.view_offset:
+            self.view_offset = index
+        elif index >= self.view_offset + count:
+            self.view_offset = index - count + 1
+        self.selected_iid = self.results.view[index]
+        self.render_results()
+
+    def sort_results(self, column):
+        self.results.sort(column)
+        self.render_results()
+
+    def apply_filter(self, event=None):
+        self.results.set_filter(self.filter_field.get(), self.filter_text.get())
+        self.view_offset = 0
+        self.render_results()
 
     def batch_mode(self):
+        if self.scan_running:
+            return
         if self.search_mode.get() == "two_folders":
             if not self.folder1 or not self.folder2:
                 messagebox.showwarning("Folders missing", "Please select both folders first.")
@@ -169,165 +411,80 @@ class DuplicateFinderApp:
                 messagebox.showwarning("Folder missing", "Please select a folder first.")
                 return
 
-        threading.Thread(target=self.find_duplicates).start()
-
-    def find_duplicates(self):
-        self.tree.delete(*self.tree.get_children())
-        self.duplicates.clear()
-        self.delete_flags.clear()
-
-        if self.search_mode.get() == "single_folder":
-            # Single folder mode - find duplicates within one folder
-            dif = difPy.build(self.folder1)
-        else:
-            # Two folder mode - compare between folders
-            dif = difPy.build([self.folder1, self.folder2])
-
-        search = difPy.search(dif)
-        image_duplicates = search.result
-
-        # Process duplicates (same as before but without the folder comparison logic)
-        seen_pairs = set()
-        for img1, matches in image_duplicates.items():
-            for match in matches:
-                img2 = match[0]
-
-                # Skip if the files are actually the same file
-                try:
-                    if os.path.samefile(img1, img2):
-                        continue
-                except:
-                    pass
-
-                pair_key = tuple(sorted((os.path.abspath(img1), os.path.abspath(img2))))
-                if pair_key not in seen_pairs:
-                    seen_pairs.add(pair_key)
-
-                    # Get file info for both files
-                    size1 = os.path.getsize(img1)
-                    size2 = os.path.getsize(img2)
-                    date1 = get_date_taken(img1)
-                    date2 = get_date_taken(img2)
-
-                    # Format size and date for display
-                    size_str = f"{size1} bytes"
-                    if size1 != size2:
-                        size_str = f"{size1} vs {size2} bytes (DIFFERENT)"
-
-                    date_str = str(date1) if date1 else "N/A"
-                    if date1 != date2:
-                        date_str = f"{date1} vs {date2} (DIFFERENT)"
-
-                    self.duplicates.append((img1, img2, date_str, size_str))
-                    iid = f"{img1}|{img2}"
-                    self.tree.insert("", tk.END, iid=iid, values=(img1, img2, date_str, size_str, "", ""))
-                    self.delete_flags[iid] = [False, False]
-
-        # Video duplicate detection remains the same but needs to handle single folder mode
-        if self.search_mode.get() == "single_folder":
-            files = get_media_files(self.folder1)
-            info_map = {}
-            for path in files:
-                ext = os.path.splitext(path)[1].lower()
-                if ext in VIDEO_EXTS:
-                    info = get_file_info(path)
-                    info_map.setdefault(info, []).append(path)
-
-            for info, paths in info_map.items():
-                if len(paths) > 1:  # Only show groups with duplicates
-                    for i in range(len(paths)):
-                        for j in range(i + 1, len(paths)):
-                            f1 = paths[i]
-                            f2 = paths[j]
-                            pair_key = tuple(sorted((os.path.abspath(f1), os.path.abspath(f2))))
-                            if pair_key not in seen_pairs:
-                                seen_pairs.add(pair_key)
-                                date = info[1] if len(info) > 1 else ""
-                                size = info[0]
-                                self.duplicates.append((f1, f2, date, f"{size} bytes"))
-                                iid = f"{f1}|{f2}"
-                                self.tree.insert("", tk.END, iid=iid, values=(f1, f2, date, f"{size} bytes", "", ""))
-                                self.delete_flags[iid] = [False, False]
-        else:
-            # Original two-folder video comparison logic
-            files1 = get_media_files(self.folder1)
-            files2 = get_media_files(self.folder2)
-            info_map2 = {}
-            for path in files2:
-                ext = os.path.splitext(path)[1].lower()
-                if ext in VIDEO_EXTS:
-                    info = get_file_info(path)
-                    info_map2.setdefault(info, []).append(path)
-
-            for f1 in files1:
-                ext = os.path.splitext(f1)[1].lower()
-                if ext in VIDEO_EXTS:
-                    info = get_file_info(f1)
-                    if info in info_map2:
-                        for f2 in info_map2[info]:
-                            try:
-                                if os.path.samefile(f1, f2):
-                                    continue
-                            except Exception:
-                                pass
-
-                            pair_key = tuple(sorted((os.path.abspath(f1), os.path.abspath(f2))))
-                            if pair_key not in seen_pairs:
-                                seen_pairs.add(pair_key)
-                                date = info[1] if len(info) > 1 else ""
-                                size = info[0]
-                                self.duplicates.append((f1, f2, date, f"{size} bytes"))
-                                iid = f"{f1}|{f2}"
-                                self.tree.insert("", tk.END, iid=iid, values=(f1, f2, date, f"{size} bytes", "", ""))
-                                self.delete_flags[iid] = [False, False]
-
-        self.tree.bind("<ButtonRelease-1>", self.on_checkbox_click)
+        self.results.clear()
+        self.view_offset = 0
+        self.selected_iid = None
+        self.preview_iid = None
+        self.render_results()
+        self.scan_running = True
+        self.batch_button.config(state=tk.DISABLED)
+
+        # The scan thread never touches Tk; it only reads these copies and feeds result_queue
+        args = (self.search_mode.get(), self.folder1, self.folder2, self.video_hash.get(), self.image_engine.get(),
+                self.video_engine.get())
+        threading.Thread(target=self.find_duplicates, args=args, daemon=True).start()
+        self.root.after(RESULT_POLL_MS, self.drain_results)
+
+    def find_duplicates(self, search_mode, folder1, folder2, video_algorithm, image_engine, video_engine):
+        # Detection lives in duplicateEngine; this thread only forwards its results to the Tk loop
+        scanner = DuplicateScanner(self.result_queue.put, cancel_event=self.cancel_event, log=print)
+        try:
+            stats = scanner.scan(search_mode, folder1, folder2, video_algorithm, image_engine, video_engine)
+            print(f"Scan finished: {stats['pairs']} pairs, timings {stats['timings']}")
+        except Exception as e:
+            print(f"Scan error: {e}")
+        finally:
+            self.result_queue.put(None)
 
-        if not self.duplicates:
-            messagebox.showinfo("No duplicates", "No duplicate files were found.")
+    def load_results(self):
+        """Show results saved by duplicateEngine's command line (JSONL or CSV) for review."""
+        if self.scan_running:
             return
-
-        self.tree.bind("<ButtonRelease-1>", self.on_checkbox_click)
+        path = filedialog.askopenfilename(title="Open scan results",
+                                          filetypes=[("Scan results", "*.jsonl *.csv"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            rows = read_results(path)
+        except (OSError, ValueError, TypeError) as e:
+            messagebox.showerror("Error", f"Could not read {path}: {e}")
+            return
+        self.results.clear()
+        self.view_offset = 0
+        self.selected_iid = None
+        self.preview_iid = None
+        self.results.add_rows(rows)
+        self.render_results()
+        self.update_count_label()
 
     def on_checkbox_click(self, event):
         item = self.tree.identify_row(event.y)
         if not item:
             return
 
+        flags = self.results.flags[item]
         col = self.tree.identify_column(event.x)
         if col == "#5":  # del1
-            self.delete_flags[item][0] = not self.delete_flags[item][0]
+            flags[0] = not flags[0]
         elif col == "#6":  # del2
-            self.delete_flags[item][1] = not self.delete_flags[item][1]
+            flags[1] = not flags[1]
 
         self.refresh_tree_item(item)
 
-    def toggle_all1(self):
-        for iid in self.delete_flags:
-            self.delete_flags[iid][0] = bool(self.select_all1.get())
-            self.refresh_tree_item(iid)
-
-    def toggle_all2(self):
-        for iid in self.delete_flags:
-            self.delete_flags[iid][1] = bool(self.select_all2.get())
-            self.refresh_tree_item(iid)
-
     def refresh_tree_item(self, iid):
-        f1, f2, date, size = iid.split("|")[0], iid.split("|")[1], "", ""
-        for tup in self.duplicates:
-            if tup[0] == f1 and tup[1] == f2:
-                date, size = tup[2], tup[3]
-                break
-        d1, d2 = ("🗑️" if self.delete_flags[iid][0] else ""), ("🗑️" if self.delete_flags[iid][1] else "")
-
-        self.tree.item(iid, values=(f1, f2, date, size, d1, d2))
+        if self.tree.exists(iid):
+            self.tree.item(iid, values=self.results.values(iid))
 
     def apply_deletions(self):
+        from send2trash import send2trash
+
         deleted_count = 0
         items_to_remove = []
 
-        for iid, (del1, del2) in self.delete_flags.items():
-            f1, f2 = iid.split("|")
+        for iid, (del1, del2) in self.results.flags.items():
+            if not (del1 or del2):
+                continue
+            f1, f2 = self.results.rows[iid][:2]
             f1 = os.path.normpath(f1)
             f2 = os.path.normpath(f2)
 
@@ -348,15 +505,9 @@ class DuplicateFinderApp:
                 except Exception as e:
                     print(f"Error deleting {f2}: {e}")
 
-        # Remove the rows for deleted items
-        for iid in set(items_to_remove):  # Use set to avoid duplicates
-            if iid in self.delete_flags:
-                del self.delete_flags[iid]
-            self.tree.delete(iid)
-
-            # Also remove from duplicates list
-            self.duplicates = [dup for dup in self.duplicates
-                               if not (dup[0] == iid.split("|")[0] and dup[1] == iid.split("|")[1])]
+        # Remove the rows for deleted items from the model and redraw the visible window
+        self.results.remove(items_to_remove)
+        self.render_results()
 
         messagebox.showinfo("Done", f"{deleted_count} files were moved to the Recycle Bin.")
 
@@ -365,40 +516,64 @@ class DuplicateFinderApp:
         if not selected:
             return
         iid = selected[0]
-        f1, f2 = self.tree.item(iid)["values"][:2]
+        self.selected_iid = iid
+        # Re-rendering the window re-selects the same row; don't reload its preview
+        if iid == self.preview_iid:
+            return
+        self.preview_iid = iid
+        f1, f2 = self.results.rows[iid][:2]
         self.show_preview(f1, f2)
+        self.prefetch_previews(iid)
+
+    def prefetch_previews(self, iid):
+        """Warm the thumbnail cache for the rows around the selection so arrow-keying doesn't stall."""
+        try:
+            index = self.results.view.index(iid)
+        except ValueError:
+            return
+        # Nearest rows first, alternating below and above the selection
+        paths = []
+        for distance in range(1, PREVIEW_PREFETCH_ROWS + 1):
+            for neighbour in (index + distance, index - distance):
+                if 0 <= neighbour < len(self.results.view):
+                    paths.extend(self.results.rows[self.results.view[neighbour]][:2])
+        self.thumbnails.prefetch(paths)
 
     def show_preview(self, file1, file2):
-        img1 = self.load_preview(file1)
-        img2 = self.load_preview(file2)
-        self.img1_label.configure(image=img1)
-        self.img1_label.image = img1
-        self.img2_label.configure(image=img2)
-        self.img2_label.image = img2
-
-    def load_preview(self, path):
+        for label, path in ((self.img1_label, file1), (self.img2_label, file2)):
+            label.preview_path = path
+            img = self.thumbnails.get(path)
+            if img is not None:
+                self.set_preview_image(label, img)
+            else:
+                self.set_preview_image(label, None)
+                self.wait_for_preview(label, path, self.thumbnails.request(path))
+
+    def wait_for_preview(self, label, path, future):
+        """Poll a background thumbnail load and show it unless the selection has moved on."""
+        if not future.done():
+            self.root.after(PREVIEW_POLL_MS, self.wait_for_preview, label, path, future)
+            return
+        if label.preview_path != path:
+            return
         try:
-            ext = os.path.splitext(path)[1].lower()
-            if ext in {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tiff"}:
-                img = Image.open(path)
-                img.thumbnail((250, 250))
-                return ImageTk.PhotoImage(img)
-            elif ext in {".mp4", ".mov", ".avi", ".mkv", ".webm", ".wmv"}:
-                cap = cv2.VideoCapture(path)
-                success, frame = cap.read()
-                cap.release()
-                if success:
-                    # Convert BGR to RGB and then to PIL
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    img = Image.fromarray(frame)
-                    img.thumbnail((250, 250))
-                    return ImageTk.PhotoImage(img)
+            img = future.result()
         except Exception as e:
             print(f"Preview load error: {e}")
-            return None
+            img = None
+        self.set_preview_image(label, img)
+
+    def set_preview_image(self, label, img):
+        from PIL import ImageTk
+
+        photo = ImageTk.PhotoImage(img) if img is not None else ""
+        label.configure(image=photo)
+        label.image = photo
 
 
 if __name__ == "__main__":
+    # Needed for the fingerprint worker processes in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = DuplicateFinderApp(root)
     root.mainloop()
\ No newline at end of file
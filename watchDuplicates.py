@@ -0,0 +1,375 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import defaultdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from hashCache import HashCache
+from featureStore import FeatureStore
+from fileIndex import scan, FileRecord, IMAGE_EXTS
+from fileWatcher import create_watcher, snapshot_of, WatchEvent, DEFAULT_POLL_INTERVAL
+from hammingIndex import HammingIndex
+from hashEngine import hash_file, hash_files, available_algorithms, DEFAULT_WORKERS
+from imageFingerprint import FINGERPRINTS, DEFAULT_THRESHOLD, HASH_BITS
+
+DEFAULT_PORT = 8765
+
+
+def _under(path, root):
+    return path == root or path.startswith(os.path.join(root, ""))
+
+
+class LiveIndex:
+    """
+    In-memory duplicate index over one or more trees that is kept current by file events.
+
+    Files are grouped by size, and only files sharing a size with another file are hashed.
+    Hashes go through HashCache and fingerprints through FeatureStore, so the nightly batch
+    tools reuse everything computed here. When fingerprint_kind is set, images also keep a
+    live set of similar pairs. Queries read the maintained groups and never touch the disk.
+    """
+
+    def __init__(self, roots, algorithm="sha256", cache=None, store=None, fingerprint_kind=None,
+                 threshold=DEFAULT_THRESHOLD, workers=DEFAULT_WORKERS):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.algorithm = algorithm
+        self.cache = cache
+        self.store = store
+        self.fingerprint_kind = fingerprint_kind
+        self.threshold = threshold
+        self.workers = workers
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._files = {}  # path -> FileRecord
+        self._by_size = defaultdict(set)
+        self._digests = {}  # path -> digest
+        self._by_digest = defaultdict(set)
+        self._duplicate_digests = set()
+        self._fingerprint_index = HammingIndex(self.threshold, HASH_BITS)
+        self._fingerprint_ids = {}  # path -> id in _fingerprint_index
+        self._fingerprint_paths = {}  # id -> path
+        self._similar = defaultdict(dict)  # path -> {other path: distance}
+        self.built_at = None
+
+    # --- Building ---
+
+    def build(self):
+        """Scan every root and hash or fingerprint whatever the caches do not already cover."""
+        start = time.perf_counter()
+        with self._lock:
+            self._reset()
+            for root in self.roots:
+                seen = []
+                for record in scan(root):
+                    self._files[record.path] = record
+                    self._by_size[record.size].add(record.path)
+                    seen.append(record.path)
+                if self.cache is not None:
+                    self.cache.prune(root, seen)
+            pending = [(path, self._files[path].stat) for paths in self._by_size.values() if len(paths) > 1
+                       for path in paths]
+
+        for path, _, digest in hash_files(pending, workers=self.workers, algorithm=self.algorithm,
+                                          cache=self.cache, on_error=self._report):
+            with self._lock:
+                self._set_digest(path, digest)
+
+        if self.fingerprint_kind is not None:
+            images = [(record.path, record.stat) for record in self._files.values() if record.ext in IMAGE_EXTS]
+            found, _ = self.store.fingerprints(images, self.fingerprint_kind, on_error=self._report)
+            with self._lock:
+                for path, value in found.items():
+                    self._add_fingerprint(path, value)
+        self.built_at = time.time()
+        return time.perf_counter() - start
+
+    @staticmethod
+    def _report(path, e):
+        print(f"Error processing {path}: {e}")
+
+    # --- Table maintenance (callers hold the lock) ---
+
+    def _set_digest(self, path, digest):
+        self._drop_digest(path)
+        self._digests[path] = digest
+        group = self._by_digest[digest]
+        group.add(path)
+        if len(group) > 1:
+            self._duplicate_digests.add(digest)
+
+    def _drop_digest(self, path):
+        digest = self._digests.pop(path, None)
+        if digest is None:
+            return
+        group = self._by_digest[digest]
+        group.discard(path)
+        if len(group) < 2:
+            self._duplicate_digests.discard(digest)
+        if not group:
+            del self._by_digest[digest]
+
+    def _add_fingerprint(self, path, value):
+        self._drop_fingerprint(path)
+        for other_id, distance in self._fingerprint_index.query(value):
+            other = self._fingerprint_paths[other_id]
+            self._similar[path][other] = distance
+            self._similar[other][path] = distance
+        value_id = self._fingerprint_index.add(value)
+        self._fingerprint_ids[path] = value_id
+        self._fingerprint_paths[value_id] = path
+
+    def _drop_fingerprint(self, path):
+        value_id = self._fingerprint_ids.pop(path, None)
+        if value_id is None:
+            return
+        self._fingerprint_index.remove(value_id)
+        del self._fingerprint_paths[value_id]
+        for other in self._similar.pop(path, {}):
+            self._similar[other].pop(path, None)
+            if not self._similar[other]:
+                del self._similar[other]
+
+    def _remove(self, path):
+        record = self._files.pop(path, None)
+        if record is None:
+            return
+        bucket = self._by_size[record.size]
+        bucket.discard(path)
+        if not bucket:
+            del self._by_size[record.size]
+        self._drop_digest(path)
+        self._drop_fingerprint(path)
+
+    def _paths_under(self, path):
+        if path in self._files:
+            return [path]
+        prefix = os.path.join(path, "")
+        return [p for p in self._files if p.startswith(prefix)]
+
+    # --- Events ---
+
+    def apply(self, event):
+        """Apply one WatchEvent from fileWatcher."""
+        if event.kind == "rescan":
+            print("Watcher lost events; rebuilding the index")
+            self.build()
+        elif event.kind == "deleted":
+            self.apply_deleted(event.path)
+        elif event.kind == "moved":
+            self._move(event.path, event.dest)
+        elif os.path.isdir(event.path):
+            for record in scan(event.path):
+                self._refresh(record)
+        else:
+            try:
+                st = os.stat(event.path)
+            except OSError:
+                with self._lock:
+                    self._remove(event.path)
+                return
+            self._refresh(FileRecord(event.path, st.st_size, st.st_mtime_ns, st.st_ino,
+                                     os.path.splitext(event.path)[1].lower(), st))
+
+    def _move(self, src, dest):
+        """Carry digests and fingerprints over to the new paths instead of reading the files again."""
+        if not any(_under(dest, root) for root in self.roots):
+            self.apply_deleted(src)
+            return
+        with self._lock:
+            moved = []
+            for path in self._paths_under(src):
+                record = self._files[path]
+                digest = self._digests.get(path)
+                value_id = self._fingerprint_ids.get(path)
+                value = self._fingerprint_index.values[value_id] if value_id is not None else None
+                self._remove(path)
+                new_path = dest if path == src else os.path.join(dest, path[len(src) + 1:])
+                moved.append((record._replace(path=new_path), digest, value))
+            for record, digest, value in moved:
+                self._files[record.path] = record
+                self._by_size[record.size].add(record.path)
+                if digest is not None:
+                    self._set_digest(record.path, digest)
+                    if self.cache is not None:
+                        self.cache.store(record.path, record.stat, digest, self.algorithm)
+                if value is not None:
+                    self._add_fingerprint(record.path, value)
+        if not moved:
+            # Unknown source (for example moved in from outside the trees): index it as new
+            self.apply(WatchEvent("created", dest, None))
+
+    def apply_deleted(self, path):
+        with self._lock:
+            for p in self._paths_under(path):
+                self._remove(p)
+
+    def _refresh(self, record):
+        with self._lock:
+            old = self._files.get(record.path)
+            if old is not None and (old.size, old.mtime_ns, old.inode) == (record.size, record.mtime_ns,
+                                                                            record.inode):
+                return
+            self._remove(record.path)
+            self._files[record.path] = record
+            bucket = self._by_size[record.size]
+            bucket.add(record.path)
+            need = [self._files[p] for p in bucket if p not in self._digests] if len(bucket) > 1 else []
+
+        # Hash and fingerprint outside the lock so queries are never blocked by disk reads
+        for pending in need:
+            try:
+                if self.cache is not None:
+                    digest = self.cache.get_or_compute(pending.path, lambda p: hash_file(p, self.algorithm),
+                                                       self.algorithm, pending.stat)
+                else:
+                    digest = hash_file(pending.path, self.algorithm)
+            except OSError as e:
+                self._report(pending.path, e)
+                continue
+            with self._lock:
+                if self._files.get(pending.path) is pending:
+                    self._set_digest(pending.path, digest)
+
+        if self.fingerprint_kind is not None and record.ext in IMAGE_EXTS:
+            found, _ = self.store.fingerprints([(record.path, record.stat)], self.fingerprint_kind, processes=1,
+                                               on_error=self._report)
+            with self._lock:
+                if record.path in found and self._files.get(record.path) is record:
+                    self._add_fingerprint(record.path, found[record.path])
+
+    # --- Queries ---
+
+    def duplicate_groups(self, under=None):
+        """Return groups of paths with identical content, optionally only groups touching a folder."""
+        under = os.path.abspath(under) if under else None
+        with self._lock:
+            groups = [sorted(self._by_digest[digest]) for digest in self._duplicate_digests]
+        if under is not None:
+            groups = [group for group in groups if any(_under(path, under) for path in group)]
+        return sorted(groups)
+
+    def duplicates_in(self, reference, target):
+        """Return files under target that duplicate a file under reference (deleteFromSecondFolder's question)."""
+        reference, target = os.path.abspath(reference), os.path.abspath(target)
+        found = []
+        for group in self.duplicate_groups():
+            right = [path for path in group if _under(path, target)]
+            if right and len(right) < len(group) and any(_under(path, reference) for path in group):
+                found.extend(right)
+        return sorted(found)
+
+    def similar_pairs(self):
+        """Return (path1, path2, distance) for every pair of images within the fingerprint threshold."""
+        with self._lock:
+            return sorted((a, b, distance) for a, others in self._similar.items()
+                          for b, distance in others.items() if a < b)
+
+    def snapshot(self):
+        """Return the indexed files in PollingWatcher's snapshot format, so polling need not rescan them."""
+        with self._lock:
+            return snapshot_of(self._files.values())
+
+    def status(self):
+        with self._lock:
+            return {
+                "roots": self.roots,
+                "files": len(self._files),
+                "hashed": len(self._digests),
+                "duplicate_groups": len(self._duplicate_digests),
+                "fingerprinted": len(self._fingerprint_ids),
+                "built_at": self.built_at,
+            }
+
+
+def watch(index, watcher, stop_event):
+    """Apply watcher events to index until stop_event is set."""
+    while not stop_event.is_set():
+        for event in watcher.poll(1.0):
+            try:
+                index.apply(event)
+            except Exception as e:
+                print(f"Error applying {event.kind} event for {event.path}: {e}")
+
+
+def make_handler(index):
+    class QueryHandler(BaseHTTPRequestHandler):
+        """GET /status, /duplicates[?under=DIR or ?reference=DIR&target=DIR] and /similar as JSON."""
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            start = time.perf_counter()
+            if url.path == "/status":
+                body = index.status()
+            elif url.path == "/duplicates" and "reference" in params and "target" in params:
+                body = {"duplicates": index.duplicates_in(params["reference"], params["target"])}
+            elif url.path == "/duplicates":
+                body = {"groups": index.duplicate_groups(params.get("under"))}
+            elif url.path == "/similar":
+                body = {"pairs": index.similar_pairs()}
+            else:
+                self.send_error(404)
+                return
+            body["query_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return QueryHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep a live duplicate index of one or more folders and answer "
+                                                 "queries over HTTP on localhost.")
+    parser.add_argument("folders", nargs="+", help="Folders to index and watch")
+    parser.add_argument("--algorithm", default="sha256", choices=available_algorithms())
+    parser.add_argument("--fingerprint", choices=list(FINGERPRINTS),
+                        help="Also keep similar-image pairs using this fingerprint")
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--poll", action="store_true", help="Poll for changes instead of using inotify")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    with HashCache() as cache, FeatureStore() as store:
+        index = LiveIndex(args.folders, args.algorithm, cache, store, args.fingerprint, args.threshold, args.workers)
+        watcher = None
+        if not args.poll and sys.platform.startswith("linux"):
+            # Start inotify before the initial build so changes made during it are not missed
+            watcher = create_watcher(index.roots, args.poll_interval)
+        print(f"Indexing {', '.join(index.roots)}...")
+        elapsed = index.build()
+        if watcher is None:
+            # Polling compares against the files the build just scanned instead of walking the trees again
+            watcher = create_watcher(index.roots, args.poll_interval, True, index.snapshot())
+        status = index.status()
+        print(f"Indexed {status['files']} files in {elapsed:.1f} s; {status['duplicate_groups']} duplicate groups")
+
+        stop_event = threading.Event()
+        threading.Thread(target=watch, args=(index, watcher, stop_event), daemon=True).start()
+        server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(index))
+        print(f"Serving queries on http://127.0.0.1:{args.port}/duplicates (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop_event.set()
+            server.server_close()
+            watcher.close()
+
+
+if __name__ == "__main__":
+    main()